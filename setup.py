@@ -33,6 +33,18 @@ setup_args = dict(
     packages=find_packages(exclude=['tests']),
     include_package_data=True,
     install_requires=get_requirements(),
+    extras_require={
+        'brotli': ['brotli'],
+        'redis': ['redis'],
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': [
+            'similarweb=similarweb.cli:main',
+            'similarweb-crawl=similarweb.crawler:main',
+            'similarweb-queue=similarweb.jobqueue:main',
+        ],
+    },
     author='Ryan Liao',
     author_email='pirsquare.ryan@gmail.com',
     classifiers=[
@@ -41,6 +53,11 @@ setup_args = dict(
         'Intended Audience :: Developers',
         'Operating System :: OS Independent',
         'Programming Language :: Python',
+        'Programming Language :: Python :: 2',
+        'Programming Language :: Python :: 2.7',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3.3',
+        'Programming Language :: Python :: 3.4',
     ],
 )
 
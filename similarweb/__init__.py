@@ -7,6 +7,8 @@ from .base import WebsiteTagsAPI
 from .base import WebsiteCategorizationAPI
 from .base import CategoryRankAPI
 from .base import TopSitesAPI
+from .base import TopSitesCategoriesAPI
+from .base import TopSitesCountriesAPI
 from .base import SocialReferralsAPI
 from .base import SearchKeywordsAPI
 from .base import DestinationsAPI
@@ -15,3 +17,4 @@ from .base import KeywordCompetitorsAPI
 from .base import AppDetailsAPI
 from .base import GoogleAppInstallsAPI
 from .base import RelatedSiteAppsAPI
+from .client import Client
@@ -0,0 +1,96 @@
+"""
+Pipelined mobile app enrichment.
+
+Domains stream through RelatedSiteAppsAPI for each app store; the app ids
+found are de-duplicated across the whole run and fed, while related-app
+queries are still in flight, to AppDetailsAPI and (for Google Play)
+GoogleAppInstallsAPI. One merged record per unique app streams out as soon
+as its queries complete, so each app is fetched once per run.
+"""
+from similarweb import base
+from similarweb import batch
+
+GOOGLE_PLAY = 0
+APP_STORE = 1
+
+
+def _app_ids(result):
+    for record in result or []:
+        app_id = record.get("AppId") if isinstance(record, dict) else record
+        if app_id:
+            yield app_id
+
+
+def _related(api_key, domains, app_store_ids, concurrency, seen, errors, options):
+    def factory(item):
+        domain, app_store_id = item
+        return base.RelatedSiteAppsAPI(api_key, domain, app_store_id, **options)
+
+    items = ((domain, app_store_id) for domain in domains for app_store_id in app_store_ids)
+    for (domain, app_store_id), result, error in batch.fetch_many(factory, items, concurrency):
+        if error is not None:
+            errors.append(((domain, app_store_id), error))
+            continue
+        for app_id in _app_ids(result):
+            app = (app_store_id, app_id)
+            if app in seen:
+                continue
+            seen[app] = domain
+            yield ("details", app_store_id, app_id)
+            if app_store_id == GOOGLE_PLAY:
+                yield ("installs", app_store_id, app_id)
+
+
+def enrich_apps(api_key, domains, app_store_ids=(GOOGLE_PLAY, APP_STORE), concurrency=10,
+                errors=None, **options):
+    """
+    Yield one merged record per unique app related to `domains`:
+    {"AppId", "AppStoreId", "Domain" (first domain it was found for),
+    "Details", "Installs"}, with "Errors" listing any failed query.
+
+    Parameters
+    ----------
+    api_key: string
+        SimilarWeb API key
+
+    domains: iterable
+        Domains to find related apps for; consumed lazily
+
+    app_store_ids: tuple
+        0 for Google Play Store, 1 for iOS AppStore
+
+    concurrency: integer
+        Number of queries in flight at once, per stage
+
+    errors: list
+        If given, failed RelatedSiteAppsAPI queries are appended to it as
+        ((domain, app_store_id), error)
+
+    options:
+        Transport options passed to every API object, e.g. session, cache, rate_limiter
+    """
+    seen = {}  # (app_store_id, app_id) -> first domain; written by the related stage only
+    errors = errors if errors is not None else []
+    partial = {}
+
+    def factory(item):
+        kind, app_store_id, app_id = item
+        if kind == "details":
+            return base.AppDetailsAPI(api_key, app_id, app_store_id, **options)
+        return base.GoogleAppInstallsAPI(api_key, app_id, **options)
+
+    items = _related(api_key, domains, app_store_ids, concurrency, seen, errors, options)
+    for (kind, app_store_id, app_id), result, error in batch.fetch_many(factory, items, concurrency):
+        app = (app_store_id, app_id)
+        record = partial.get(app)
+        if record is None:
+            record = partial[app] = {"AppId": app_id, "AppStoreId": app_store_id, "Domain": seen[app],
+                                     "Details": None, "Installs": None}
+        if error is not None:
+            record.setdefault("Errors", {})[kind] = "%s: %s" % (type(error).__name__, error)
+        else:
+            record["Details" if kind == "details" else "Installs"] = result
+        expected = 2 if app_store_id == GOOGLE_PLAY else 1
+        answered = sum(1 for key in ("Details", "Installs") if record[key] is not None)
+        if answered + len(record.get("Errors", ())) == expected:
+            yield partial.pop(app)
@@ -1,21 +1,75 @@
-import requests
 import json
+import time
 from abc import ABCMeta, abstractmethod
-from similarweb.exceptions import InvalidResponseException, InvalidEndpointException
+from similarweb.exceptions import InvalidEndpointException, DeadlineExceededException, NoDataException
+from similarweb.exceptions import classify_error
+from similarweb import months
+from similarweb import rollup
 from similarweb import utils
 
+requests = utils.LazyModule("requests")
+
 
 class SimilarWeb(object):
     __metaclass__ = ABCMeta
 
-    def __init__(self, api_key):
+    # Key whose presence marks a successful response, and whether `query`
+    # returns only the value under that key rather than the whole payload.
+    _response_key = None
+    _unwrap_response = False
+
+    # (connect, read) timeouts in seconds
+    DEFAULT_TIMEOUT = (5, 30)
+    # Bytes read between deadline checks while receiving a response body
+    READ_CHUNK_SIZE = 8192
+
+    def __init__(self, api_key, session=None, cache=None, rate_limiter=None,
+                 timeout=DEFAULT_TIMEOUT, deadline=None, circuit_breaker=None, negative_cache=None):
         """
         Parameters
         ----------
         api_key: string
             SimilarWeb API key
+
+        session: requests.Session
+            Session used to send requests, so connections are pooled across
+            queries. A new connection is opened per query if left blank.
+
+        cache: similarweb.cache.QueryCache
+            Cache consulted before sending a request and filled with validated results.
+
+        rate_limiter: similarweb.ratelimit.RateLimiter
+            Rate limiter acquired before each request is sent and released
+            once it completes, e.g. a `Scheduler.limiter(...)` handle or an
+            `AdaptiveConcurrency`.
+
+        timeout: number or tuple
+            Connect and read timeouts in seconds, as accepted by requests.
+            A single number applies to both.
+
+        deadline: number
+            Overall seconds a `query` call may take, including waiting for the
+            rate limiter. Connect and read timeouts are shortened to fit the
+            time left, and the body is read in chunks with the deadline
+            checked after each, so a slowly trickling body is cut off too.
+            A call can still overrun by the time taken to receive one chunk.
+
+        circuit_breaker: similarweb.circuitbreaker.CircuitBreaker
+            Circuit breaker tracking this endpoint's health. Queries fail fast
+            with `CircuitOpenException` while its circuit is open.
+
+        negative_cache: similarweb.cache.NegativeCache
+            Remembers domains this endpoint had no data for. Queries for them
+            raise `NoDataException` without a request until due for a recheck.
         """
         self.api_key = api_key
+        self.session = session
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.deadline = deadline
+        self.circuit_breaker = circuit_breaker
+        self.negative_cache = negative_cache
 
     @property
     def _base_url(self):
@@ -29,15 +83,237 @@ class SimilarWeb(object):
     def url(self):
         return
 
-    @abstractmethod
+    @property
+    def endpoint_name(self):
+        """
+        Name the circuit breaker tracks this endpoint's health under,
+        e.g. "EngagementAPI/pageviews".
+        """
+        name = type(self).__name__
+        if getattr(self, "endpoint", None):
+            name += "/" + self.endpoint
+        return name
+
+    @property
+    def subject(self):
+        """
+        The domain or app id queried, as remembered by the negative cache.
+        """
+        return getattr(self, "domain", None) or getattr(self, "app_id", None) or self.cache_key
+
+    @property
+    def cache_key(self):
+        params = dict(self.params)
+        params.pop("api_key", None)
+        return json.dumps([type(self).__name__, params], sort_keys=True)
+
+    def _timeout(self, expires):
+        if isinstance(self.timeout, (tuple, list)):
+            connect, read = self.timeout
+        else:
+            connect = read = self.timeout
+        if expires is None:
+            return (connect, read)
+
+        remaining = expires - time.time()
+        if remaining <= 0:
+            raise DeadlineExceededException("Deadline of %ss exceeded" % self.deadline)
+        # None means no timeout in requests; the deadline still bounds it.
+        return tuple(remaining if limit is None else min(limit, remaining) for limit in (connect, read))
+
+    def _send(self, url, expires, headers):
+        timeout = self._timeout(expires)
+        headers = dict(headers or {}, **{"Accept-Encoding": utils.accept_encoding()})
+        get = self.session.get if self.session is not None else requests.get
+        started = time.time()
+        response = None
+        try:
+            if expires is None:
+                response = get(url, headers=headers, timeout=timeout)
+            else:
+                response = self._read(get(url, headers=headers, timeout=timeout, stream=True), expires)
+            return response
+        finally:
+            # Adaptive limiters tune themselves from each request's outcome;
+            # failing before anything was sent (open circuit, spent deadline)
+            # says nothing about the load on the server.
+            observe = getattr(self.rate_limiter, "observe", None)
+            if observe is not None:
+                observe(time.time() - started, getattr(response, "status_code", None), response is None)
+
+    def _read(self, response, expires):
+        """
+        Receive the body of a streamed response, failing once `expires` has
+        passed. Timeouts only bound each socket read, not the whole body.
+        """
+        chunks = []
+        try:
+            for chunk in response.iter_content(self.READ_CHUNK_SIZE):
+                chunks.append(chunk)
+                if time.time() > expires:
+                    raise DeadlineExceededException("Deadline of %ss exceeded reading the response"
+                                                    % self.deadline)
+        except Exception:
+            response.close()
+            raise
+        response._content = b"".join(chunks)
+        response._content_consumed = True
+        return response
+
+    def _get(self, url, expires=None, headers=None):
+        if self.rate_limiter is None:
+            return self._send_guarded(url, expires, headers)
+
+        wait = None if expires is None else max(0, expires - time.time())
+        if not self.rate_limiter.acquire(timeout=wait):
+            raise DeadlineExceededException("Deadline of %ss exceeded waiting for the rate limiter"
+                                            % self.deadline)
+        try:
+            return self._send_guarded(url, expires, headers)
+        finally:
+            self.rate_limiter.release()
+
+    def _send_guarded(self, url, expires, headers):
+        breaker = self.circuit_breaker
+        if breaker is None:
+            return self._send(url, expires, headers)
+
+        # Only the request itself is timed: time spent queued on our own rate
+        # limiter, or a deadline already spent, says nothing about the endpoint.
+        self._timeout(expires)
+        breaker.before_call(self.endpoint_name)
+        started = time.time()
+        try:
+            response = self._send(url, expires, headers)
+        except Exception:
+            breaker.record(self.endpoint_name, True, time.time() - started)
+            raise
+        breaker.record(self.endpoint_name, response.status_code >= 500, time.time() - started)
+        return response
+
+    def _validate(self, results, status_code=None):
+        if not isinstance(results, dict) or self._response_key not in results:
+            raise classify_error(status_code, results)
+
+        if self._unwrap_response:
+            return results[self._response_key]
+        return results
+
     def query(self):
-        return
+        return self._remembering_no_data(self._query)
+
+    def query_raw(self):
+        """
+        Response body as bytes, for relaying it without a decode/encode
+        round trip. Only errors are decoded: a body is accepted after a
+        cheap check that it is JSON containing the response key, and is
+        returned whole (not unwrapped). Bypasses the result cache; wrap
+        it in `memoryview` to slice it without copies.
+        """
+        return self._remembering_no_data(self._query_raw)
+
+    def _remembering_no_data(self, fetch):
+        if self.negative_cache is None:
+            return fetch()
+
+        if (self.endpoint_name, self.subject) in self.negative_cache:
+            raise NoDataException("No data (cached)")
+        try:
+            return fetch()
+        except NoDataException:
+            self.negative_cache.add(self.endpoint_name, self.subject)
+            raise
+
+    def _derive(self):
+        """
+        Result computed locally from other cached results, or None.
+        """
+        return None
+
+    def _query(self):
+        if self.cache is None:
+            return self._fetch()
+
+        cached = self.cache.lookup(self.cache_key)
+        if cached is not None and cached[1]:
+            return cached[0]
+
+        derived = self._derive()
+        if derived is not None:
+            return derived
+
+        # Only one caller (or host, for shared caches) fetches a missing key;
+        # the others wait and pick up what it stored.
+        with self.cache.lock(self.cache_key):
+            cached = self.cache.lookup(self.cache_key)
+            if cached is not None and cached[1]:
+                return cached[0]
+            return self._fetch(cached)
+
+    def _request(self, headers=None):
+        expires = time.time() + self.deadline if self.deadline is not None else None
+        return self._get(self.url, expires, headers)
+
+    def _query_raw(self):
+        response = self._request()
+        body = response.content
+        status_code = getattr(response, "status_code", None)
+        if status_code is not None and status_code >= 500:
+            raise classify_error(status_code, None)
+
+        head = body[:16].lstrip()
+        if ((status_code is None or status_code < 400) and head[:1] in (b"{", b"[") and
+                not head.startswith(b'{"Error"') and self._response_key is not None and
+                ('"%s"' % self._response_key).encode("utf-8") in body):
+            return body
+
+        # Errors and payloads without a response key are decoded and validated in full.
+        try:
+            results = json.loads(body.decode("utf-8"))
+        except ValueError:
+            raise classify_error(status_code, None)
+        self._validate(results, status_code)
+        return body
+
+    def _fetch(self, cached=None):
+        headers = {}
+        if cached is not None:
+            # Stale: ask the server to send the body only if it changed.
+            validators = cached[2] or {}
+            if "ETag" in validators:
+                headers["If-None-Match"] = validators["ETag"]
+            if "Last-Modified" in validators:
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        response = self._request(headers)
+        if headers and response.status_code == 304:
+            self.cache.touch(self.cache_key)
+            return cached[0]
+
+        status_code = getattr(response, "status_code", None)
+        if status_code is not None and status_code >= 500:
+            # Error pages are not worth decoding.
+            raise classify_error(status_code, None)
+        try:
+            results = json.loads(response.text)
+        except ValueError:
+            raise classify_error(status_code, None)
+        results = self._validate(results, status_code)
+
+        if self.cache is not None:
+            validators = dict((name, response.headers[name]) for name in ("ETag", "Last-Modified")
+                              if name in response.headers)
+            self.cache.set(self.cache_key, results, validators)
+        return results
 
 
 class TrafficAPI(SimilarWeb):
 
+    _response_key = 'Values'
+    _unwrap_response = True
+
     def __init__(self, api_key, domain, start_month, end_month,
-                 time_granularity="MONTHLY", main_domain_only=False):
+                 time_granularity="MONTHLY", main_domain_only=False, **kwargs):
         """
         Parameters
         ----------
@@ -61,11 +337,12 @@ class TrafficAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
+        months.MonthRange(start_month, end_month)
         self.start_month = start_month
         self.end_month = end_month
         self.time_granularity = time_granularity
         self.main_domain_only = main_domain_only
-        super(TrafficAPI, self).__init__(api_key)
+        super(TrafficAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -84,19 +361,16 @@ class TrafficAPI(SimilarWeb):
                    "&end={end_month}&md={main_domain_only}&Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Values' not in results:
-            raise InvalidResponseException(results)
-
-        return results['Values']
+    def _derive(self):
+        # Weekly/monthly visits are sums of the cached daily visits.
+        return rollup.derive(self, "sum")
 
 
 class RankAndReachAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'GlobalRank'
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -108,7 +382,7 @@ class RankAndReachAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(RankAndReachAPI, self).__init__(api_key)
+        super(RankAndReachAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -122,20 +396,14 @@ class RankAndReachAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v1/traffic?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'GlobalRank' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class EngagementAPI(SimilarWeb):
 
+    _response_key = 'Values'
+    _unwrap_response = True
+
     def __init__(self, api_key, endpoint, domain, start_month, end_month,
-                 time_granularity="MONTHLY", main_domain_only=False):
+                 time_granularity="MONTHLY", main_domain_only=False, **kwargs):
         """
         Parameters
         ----------
@@ -167,11 +435,12 @@ class EngagementAPI(SimilarWeb):
 
         self.endpoint = endpoint
         self.domain = utils.domain_from_url(domain)
+        months.MonthRange(start_month, end_month)
         self.start_month = start_month
         self.end_month = end_month
         self.time_granularity = time_granularity
         self.main_domain_only = main_domain_only
-        super(EngagementAPI, self).__init__(api_key)
+        super(EngagementAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -191,19 +460,19 @@ class EngagementAPI(SimilarWeb):
                    "&end={end_month}&md={main_domain_only}&Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Values' not in results:
-            raise InvalidResponseException(results)
-
-        return results['Values']
+    def _derive(self):
+        # Per-visit metrics average out, weighted by daily visits if those are cached.
+        visits = TrafficAPI(self.api_key, self.domain, self.start_month, self.end_month,
+                            rollup.DAILY, self.main_domain_only, cache=self.cache)
+        return rollup.derive(self, "mean", visits)
 
 
 class SimilarWebsitesAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'SimilarSites'
+    _unwrap_response = True
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -215,7 +484,7 @@ class SimilarWebsitesAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(SimilarWebsitesAPI, self).__init__(api_key)
+        super(SimilarWebsitesAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -229,19 +498,13 @@ class SimilarWebsitesAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v2/similarsites?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'SimilarSites' not in results:
-            raise InvalidResponseException(results)
-
-        return results['SimilarSites']
-
 
 class AlsoVisitedAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'AlsoVisited'
+    _unwrap_response = True
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -253,7 +516,7 @@ class AlsoVisitedAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(AlsoVisitedAPI, self).__init__(api_key)
+        super(AlsoVisitedAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -267,19 +530,13 @@ class AlsoVisitedAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v2/alsovisited?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'AlsoVisited' not in results:
-            raise InvalidResponseException(results)
-
-        return results['AlsoVisited']
-
 
 class WebsiteTagsAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'Tags'
+    _unwrap_response = True
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -291,7 +548,7 @@ class WebsiteTagsAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(WebsiteTagsAPI, self).__init__(api_key)
+        super(WebsiteTagsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -305,19 +562,13 @@ class WebsiteTagsAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v2/tags?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Tags' not in results:
-            raise InvalidResponseException(results)
-
-        return results['Tags']
-
 
 class WebsiteCategorizationAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'Category'
+    _unwrap_response = True
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -329,7 +580,7 @@ class WebsiteCategorizationAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(WebsiteCategorizationAPI, self).__init__(api_key)
+        super(WebsiteCategorizationAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -343,19 +594,12 @@ class WebsiteCategorizationAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v2/category?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Category' not in results:
-            raise InvalidResponseException(results)
-
-        return results['Category']
-
 
 class CategoryRankAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'Category'
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -367,7 +611,7 @@ class CategoryRankAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(CategoryRankAPI, self).__init__(api_key)
+        super(CategoryRankAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -381,19 +625,12 @@ class CategoryRankAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v2/CategoryRank?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Category' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class TopSitesAPI(SimilarWeb):
 
-    def __init__(self, api_key, category=None, country=None):
+    _response_key = '1'
+
+    def __init__(self, api_key, category=None, country=None, catalog=None, **kwargs):
         """
         Parameters
         ----------
@@ -402,16 +639,23 @@ class TopSitesAPI(SimilarWeb):
 
         category: string
             If left blank, `All Categories` will be requested.
-            Use `http://api.similarweb.com/v1/TopSites/categories` to get a list of available categories.
+            See `TopSitesCategoriesAPI` for a list of available categories.
 
         country: string
             If left blank, `Worldwide` will be requested.
-            Use `http://api.similarweb.com/v1/TopSites/countries` to get a list of available categories.
+            See `TopSitesCountriesAPI` for a list of available countries.
+
+        catalog: similarweb.catalog.TopSitesCatalog
+            If given, `category` and `country` are validated (and their
+            spelling normalized) against it before any request is sent.
         """
 
+        if catalog is not None:
+            category = catalog.category(category) if category else category
+            country = catalog.country(country) if country else country
         self.category = category
         self.country = country
-        super(TopSitesAPI, self).__init__(api_key)
+        super(TopSitesAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -427,19 +671,75 @@ class TopSitesAPI(SimilarWeb):
                    "&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
 
-        if '1' not in results:
-            raise InvalidResponseException(results)
+class TopSitesCategoriesAPI(SimilarWeb):
 
-        return results
+    def __init__(self, api_key, **kwargs):
+        """
+        Parameters
+        ----------
+        api_key: string
+            SimilarWeb API key
+        """
+
+        super(TopSitesCategoriesAPI, self).__init__(api_key, **kwargs)
+
+    @property
+    def params(self):
+        params = {}
+        params["api_key"] = self.api_key
+        return params
+
+    @property
+    def url(self):
+        end_url = ("/v1/TopSites/categories?Format=JSON&UserKey={api_key}".format(**self.params))
+        return self._base_url + end_url
+
+    def _validate(self, results, status_code=None):
+        return _catalog_entries(results, "Categories", status_code)
+
+
+class TopSitesCountriesAPI(SimilarWeb):
+
+    def __init__(self, api_key, **kwargs):
+        """
+        Parameters
+        ----------
+        api_key: string
+            SimilarWeb API key
+        """
+
+        super(TopSitesCountriesAPI, self).__init__(api_key, **kwargs)
+
+    @property
+    def params(self):
+        params = {}
+        params["api_key"] = self.api_key
+        return params
+
+    @property
+    def url(self):
+        end_url = ("/v1/TopSites/countries?Format=JSON&UserKey={api_key}".format(**self.params))
+        return self._base_url + end_url
+
+    def _validate(self, results, status_code=None):
+        return _catalog_entries(results, "Countries", status_code)
+
+
+def _catalog_entries(results, key, status_code):
+    # Catalogs come back either as a bare list or wrapped in an object.
+    if isinstance(results, dict) and isinstance(results.get(key), list):
+        results = results[key]
+    if not isinstance(results, list):
+        raise classify_error(status_code, results)
+    return results
 
 
 class SocialReferralsAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'SocialSources'
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -451,7 +751,7 @@ class SocialReferralsAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(SocialReferralsAPI, self).__init__(api_key)
+        super(SocialReferralsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -465,20 +765,13 @@ class SocialReferralsAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v1/socialreferringsites?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'SocialSources' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class SearchKeywordsAPI(SimilarWeb):
 
+    _response_key = 'Data'
+
     def __init__(self, api_key, endpoint, domain, start_month, end_month,
-                 main_domain_only=False, results_page=None):
+                 main_domain_only=False, results_page=None, **kwargs):
         """
         Parameters
         ----------
@@ -510,11 +803,12 @@ class SearchKeywordsAPI(SimilarWeb):
 
         self.domain = utils.domain_from_url(domain)
         self.endpoint = endpoint
+        months.MonthRange(start_month, end_month)
         self.start_month = start_month
         self.end_month = end_month
         self.main_domain_only = main_domain_only
         self.results_page = results_page
-        super(SearchKeywordsAPI, self).__init__(api_key)
+        super(SearchKeywordsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -534,19 +828,12 @@ class SearchKeywordsAPI(SimilarWeb):
                    "&md={main_domain_only}&page={results_page}&Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Data' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class DestinationsAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain):
+    _response_key = 'Sites'
+
+    def __init__(self, api_key, domain, **kwargs):
         """
         Parameters
         ----------
@@ -558,7 +845,7 @@ class DestinationsAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
-        super(DestinationsAPI, self).__init__(api_key)
+        super(DestinationsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -572,20 +859,13 @@ class DestinationsAPI(SimilarWeb):
         end_url = ("/Site/{domain}/v2/leadingdestinationsites?Format=JSON&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Sites' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class ReferralsAPI(SimilarWeb):
 
+    _response_key = 'Data'
+
     def __init__(self, api_key, domain, start_month, end_month,
-                 main_domain_only=False, results_page=None):
+                 main_domain_only=False, results_page=None, **kwargs):
         """
         Parameters
         ----------
@@ -609,11 +889,12 @@ class ReferralsAPI(SimilarWeb):
         """
 
         self.domain = utils.domain_from_url(domain)
+        months.MonthRange(start_month, end_month)
         self.start_month = start_month
         self.end_month = end_month
         self.main_domain_only = main_domain_only
         self.results_page = results_page
-        super(ReferralsAPI, self).__init__(api_key)
+        super(ReferralsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -633,20 +914,13 @@ class ReferralsAPI(SimilarWeb):
                    "&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Data' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class KeywordCompetitorsAPI(SimilarWeb):
 
+    _response_key = 'Data'
+
     def __init__(self, api_key, endpoint, domain, start_month, end_month,
-                 main_domain_only=False, results_page=None):
+                 main_domain_only=False, results_page=None, **kwargs):
         """
         Parameters
         ----------
@@ -678,11 +952,12 @@ class KeywordCompetitorsAPI(SimilarWeb):
 
         self.domain = utils.domain_from_url(domain)
         self.endpoint = endpoint
+        months.MonthRange(start_month, end_month)
         self.start_month = start_month
         self.end_month = end_month
         self.main_domain_only = main_domain_only
         self.results_page = results_page
-        super(KeywordCompetitorsAPI, self).__init__(api_key)
+        super(KeywordCompetitorsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -703,19 +978,12 @@ class KeywordCompetitorsAPI(SimilarWeb):
                    "&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Data' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class AppDetailsAPI(SimilarWeb):
 
-    def __init__(self, api_key, app_id, app_store_id):
+    _response_key = 'Title'
+
+    def __init__(self, api_key, app_id, app_store_id, **kwargs):
         """
         Parameters
         ----------
@@ -731,7 +999,7 @@ class AppDetailsAPI(SimilarWeb):
 
         self.app_id = app_id
         self.app_store_id = app_store_id
-        super(AppDetailsAPI, self).__init__(api_key)
+        super(AppDetailsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -747,19 +1015,12 @@ class AppDetailsAPI(SimilarWeb):
                    "&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'Title' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class GoogleAppInstallsAPI(SimilarWeb):
 
-    def __init__(self, api_key, app_id):
+    _response_key = 'InstallsMin'
+
+    def __init__(self, api_key, app_id, **kwargs):
         """
         Parameters
         ----------
@@ -771,7 +1032,7 @@ class GoogleAppInstallsAPI(SimilarWeb):
         """
 
         self.app_id = app_id
-        super(GoogleAppInstallsAPI, self).__init__(api_key)
+        super(GoogleAppInstallsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -786,19 +1047,13 @@ class GoogleAppInstallsAPI(SimilarWeb):
                    "&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
 
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'InstallsMin' not in results:
-            raise InvalidResponseException(results)
-
-        return results
-
 
 class RelatedSiteAppsAPI(SimilarWeb):
 
-    def __init__(self, api_key, domain, app_store_id):
+    _response_key = 'RelatedApps'
+    _unwrap_response = True
+
+    def __init__(self, api_key, domain, app_store_id, **kwargs):
         """
         Parameters
         ----------
@@ -814,7 +1069,7 @@ class RelatedSiteAppsAPI(SimilarWeb):
 
         self.domain = utils.domain_from_url(domain)
         self.app_store_id = app_store_id
-        super(RelatedSiteAppsAPI, self).__init__(api_key)
+        super(RelatedSiteAppsAPI, self).__init__(api_key, **kwargs)
 
     @property
     def params(self):
@@ -829,12 +1084,3 @@ class RelatedSiteAppsAPI(SimilarWeb):
         end_url = ("/Mobile/{app_store_id}/{domain}/v1/GetRelatedSiteApps?Format=JSON"
                    "&UserKey={api_key}".format(**self.params))
         return self._base_url + end_url
-
-    def query(self):
-        response = requests.get(self.url)
-        results = json.loads(response.text)
-
-        if 'RelatedApps' not in results:
-            raise InvalidResponseException(results)
-
-        return results['RelatedApps']
@@ -0,0 +1,288 @@
+import collections
+import json
+import threading
+import time
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+from similarweb import utils
+from similarweb.exceptions import DeadlineExceededException
+
+# Base delay in seconds before retrying, doubled on every attempt.
+RETRY_BACKOFF = 0.5
+
+# Items `fetch_many` takes from its input ahead of the caller, per thread.
+WINDOW_FACTOR = 2
+
+# Results a batch remembers for duplicate items arriving after their first
+# query completed.
+COALESCE_MEMO_SIZE = 10000
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesce identical calls: while a call for a key is in flight, further
+    callers for that key wait for it and share its result or error instead
+    of making their own.
+    """
+
+    def __init__(self, memo_size=0):
+        """
+        Parameters
+        ----------
+        memo_size: integer
+            Number of most recent successful results to keep serving after
+            their call completed. 0 coalesces only calls in flight together.
+        """
+        self.memo_size = memo_size
+        self.calls = 0
+        self.executions = 0
+        self._calls = {}
+        self._memo = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self):
+        """
+        {"calls", "executions", "shared"}: calls made, calls actually
+        executed, and calls served by another call's result.
+        """
+        with self._lock:
+            return {"calls": self.calls, "executions": self.executions,
+                    "shared": self.calls - self.executions}
+
+    def do(self, key, fn):
+        """
+        Return fn(), unless a call for `key` is in flight or remembered.
+        """
+        with self._lock:
+            self.calls += 1
+            if key in self._memo:
+                return self._memo[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.memo_size:
+                    self._memo[key] = call.result
+                    if len(self._memo) > self.memo_size:
+                        self._memo.popitem(last=False)
+            call.done.set()
+        return call.result
+
+
+def is_retryable(error):
+    """
+    Whether sending the same request again may succeed: throttling, server
+    errors and connection failures are, missing data or a bad key are not.
+    """
+    if getattr(error, "retryable", False):
+        return True
+    exceptions = utils.requests.exceptions
+    return isinstance(error, (exceptions.ConnectionError, exceptions.Timeout))
+
+
+def _query(client, expires, single_flight):
+    if expires is not None:
+        # Keep each query within what is left of the batch budget.
+        remaining = expires - time.time()
+        if remaining <= 0:
+            raise DeadlineExceededException("Batch budget exhausted")
+        client.deadline = min(client.deadline, remaining) if client.deadline else remaining
+    if single_flight is None:
+        return client.query()
+    return single_flight.do(client.cache_key, client.query)
+
+
+def _run(args):
+    factory, item, client, cached, expires, retries, single_flight = args
+    if cached:
+        return item, cached[0], None
+    attempt = 0
+    while True:
+        try:
+            if client is None:
+                client = factory(item)
+            return item, _query(client, expires, single_flight), None
+        except Exception as e:
+            delay = RETRY_BACKOFF * 2 ** attempt
+            if (attempt >= retries or not is_retryable(e) or
+                    (expires is not None and time.time() + delay >= expires)):
+                return item, None, e
+        time.sleep(delay)
+        attempt += 1
+
+
+def _client(factory, item):
+    try:
+        return factory(item)
+    except Exception:
+        return None  # raised again, and reported, by the worker
+
+
+def _batch_cache(client):
+    cache = getattr(client, "cache", None)
+    return cache if cache is not None and hasattr(cache, "get_many") else None
+
+
+def _prefetch(chunk):
+    """
+    Look up a chunk of (item, client) pairs with one `get_many` call per
+    cache. Returns (item, client, cached) triples, where `cached` is a
+    1-tuple holding the result of items with a fresh cached result.
+    """
+    groups = {}
+    for _, client in chunk:
+        cache = _batch_cache(client)
+        if cache is not None:
+            groups.setdefault(id(cache), (cache, []))[1].append(client.cache_key)
+    found = {}
+    for key, (cache, keys) in groups.items():
+        try:
+            found[key] = cache.get_many(keys)
+        except Exception:
+            found[key] = {}  # each query looks itself up again and surfaces the error
+    prefetched = []
+    for item, client in chunk:
+        hits = found.get(id(_batch_cache(client)), {})
+        key = client.cache_key if client is not None and hits else None
+        prefetched.append((item, client, (hits[key],) if key in hits else None))
+    return prefetched
+
+
+def fetch_many(factory, items, concurrency=10, budget=None, retries=0, coalesce=True, single_flight=None):
+    """
+    Query many API objects concurrently.
+
+    Yields (item, result, error) tuples in the order queries complete, so
+    callers can consume results while the rest are still in flight.
+
+    Parameters
+    ----------
+    factory: callable
+        Called with each item, must return an API object (e.g. a `TrafficAPI`)
+
+    items: iterable
+        Items to query, typically domains or app ids
+
+    concurrency: integer
+        Number of queries in flight at once
+
+    budget: number
+        Seconds the whole batch may take. Once spent, outstanding queries are
+        cancelled and iteration stops, leaving only the results so far.
+
+    retries: integer
+        Times a query failing with a retryable error is retried, with
+        exponential backoff. Permanent errors are returned right away.
+
+    coalesce: boolean
+        Send one query per distinct request (e.g. urls normalizing to the
+        same domain) and share its outcome with every duplicate item.
+
+    single_flight: SingleFlight
+        Coalesce through this instead of a per-batch one, e.g. to share
+        in-flight queries with other batches or read its `stats()`.
+
+    When the API objects' cache has `get_many` (e.g. `RedisCache`), items
+    are looked up `concurrency` at a time in one call and cached results
+    are yielded without a query.
+    """
+    expires = time.time() + budget if budget is not None else None
+    if single_flight is None and coalesce:
+        single_flight = SingleFlight(COALESCE_MEMO_SIZE)
+    # The pool reads its input eagerly; only let it take items as results are consumed.
+    window = threading.Semaphore(concurrency * WINDOW_FACTOR)
+    stopped = threading.Event()
+
+    def prefetched(chunk):
+        return [(factory, item, client, cached, expires, retries, single_flight)
+                for item, client, cached in _prefetch(chunk)]
+
+    def tasks():
+        # Clients whose cache can look up many keys at once are checked a
+        # chunk at a time, sending only the misses to the pool.
+        chunk, size = [], 1
+        for item in items:
+            window.acquire()
+            if stopped.is_set():
+                return
+            client = _client(factory, item)
+            if size == 1 and _batch_cache(client) is not None:
+                size = concurrency
+            chunk.append((item, client))
+            if len(chunk) >= size:
+                for task in prefetched(chunk):
+                    yield task
+                chunk = []
+        for task in prefetched(chunk):
+            yield task
+
+    pool = ThreadPool(concurrency)
+    try:
+        outcomes = pool.imap_unordered(_run, tasks())
+        while True:
+            timeout = None if expires is None else max(0, expires - time.time())
+            try:
+                outcome = outcomes.next(timeout)
+            except (StopIteration, TimeoutError):
+                return
+            window.release()
+            yield outcome
+    finally:
+        stopped.set()
+        window.release()  # wake the pool's task feeder if it is waiting for room
+        pool.terminate()
+
+
+def to_record(item, result, error):
+    """
+    Serialize a `fetch_many` outcome as one JSON line.
+    """
+    record = {"input": item}
+    if error is not None:
+        record["error"] = "%s: %s" % (type(error).__name__, error)
+        record["retryable"] = is_retryable(error)
+    else:
+        record["result"] = result
+    return json.dumps(record, sort_keys=True)
+
+
+def plan(factory, items, cache=None, negative_cache=None):
+    """
+    Split `items` before any I/O into (to_fetch, probably_cached, known_empty)
+    lists, using the cache's membership filter and the negative cache.
+    Items in `to_fetch` are definitely not cached.
+    """
+    to_fetch, probably_cached, known_empty = [], [], []
+    for item in items:
+        client = factory(item)
+        if negative_cache is not None and negative_cache.might_contain(client.endpoint_name, client.subject):
+            known_empty.append(item)
+        elif cache is not None and cache.might_contain(client.cache_key):
+            probably_cached.append(item)
+        else:
+            to_fetch.append(item)
+    return to_fetch, probably_cached, known_empty
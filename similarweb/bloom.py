@@ -0,0 +1,118 @@
+"""
+Compact probabilistic membership index.
+
+A `BloomFilter` answers "definitely not present" or "probably present" for
+string keys using a fixed bit array, so batch planners can split a large
+domain list into what must be fetched and what is probably cached without
+touching the cache itself. Keys can be added at any time, which is why a
+Bloom filter is used rather than a (static) xor filter.
+"""
+import binascii
+import hashlib
+import io
+import math
+import os
+import struct
+import tempfile
+
+_MAGIC = b"SWBF1"
+_HEADER = struct.Struct("<QQQ")  # bits, hashes, count
+
+
+class BloomFilter(object):
+
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        """
+        Parameters
+        ----------
+        capacity: integer
+            Number of keys the filter is sized for
+
+        error_rate: float
+            False positive rate expected once `capacity` keys were added
+        """
+        bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hashes = max(1, int(round(bits / float(capacity) * math.log(2))))
+        self._init(bits, hashes, 0, bytearray((bits + 7) // 8))
+
+    def _init(self, bits, hashes, count, array):
+        self.bits = bits
+        self.hashes = hashes
+        self.count = count
+        self._array = array
+
+    def _positions(self, key):
+        digest = hashlib.md5(key.encode("utf-8")).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, key):
+        added = False
+        for position in self._positions(key):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not self._array[byte] & bit:
+                self._array[byte] |= bit
+                added = True
+        if added:
+            self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def merge(self, other):
+        """
+        Add every key of `other`, a filter of the same size, to this one.
+        """
+        if (other.bits, other.hashes) != (self.bits, self.hashes):
+            raise ValueError("Cannot merge Bloom filters of different sizes")
+        size = len(self._array)
+        merged = int(binascii.hexlify(self._array), 16) | int(binascii.hexlify(other._array), 16)
+        self._array = bytearray(binascii.unhexlify("%0*x" % (2 * size, merged)))
+        # Keys added to both are not told apart; this keeps the count a lower bound.
+        self.count = max(self.count, other.count)
+
+    def __contains__(self, key):
+        array = self._array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self):
+        """
+        Number of keys added (keys that were already probably present are not counted).
+        """
+        return self.count
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with io.open(fd, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_HEADER.pack(self.bits, self.hashes, self.count))
+            f.write(bytes(self._array))
+        os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with io.open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError("Not a Bloom filter file: %s" % path)
+            bits, hashes, count = _HEADER.unpack(f.read(_HEADER.size))
+            array = bytearray(f.read())
+        if len(array) != (bits + 7) // 8:
+            raise ValueError("Truncated Bloom filter file: %s" % path)
+        bloom = cls.__new__(cls)
+        bloom._init(bits, hashes, count, array)
+        return bloom
+
+    @classmethod
+    def open(cls, path, capacity=1000000, error_rate=0.01):
+        """
+        Load the filter at `path`, or create an empty one if there is none (or it is unreadable).
+        """
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (ValueError, struct.error):
+                pass
+        return cls(capacity, error_rate)
@@ -0,0 +1,395 @@
+"""
+Caches for validated `query()` results.
+
+An API object given a cache looks its `cache_key` up before sending a request
+and stores the validated result afterwards. An API object given a negative
+cache skips requests for domains recently found to have no data.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from similarweb.bloom import BloomFilter
+
+try:
+    import fcntl
+except ImportError:  # Windows: membership saves are not serialized between processes
+    fcntl = None
+
+
+class _FileLock(object):
+    """
+    Exclusive advisory lock on a file, held across processes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = io.open(self.path, "ab")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        return False
+
+
+class _KeyLock(object):
+    """
+    Lock for one key of a `QueryCache`, dropped once no thread holds or
+    waits for it.
+    """
+
+    def __init__(self, locks, guard, key):
+        self._locks = locks
+        self._guard = guard
+        self._key = key
+
+    def __enter__(self):
+        with self._guard:
+            entry = self._locks.get(self._key)
+            if entry is None:
+                entry = self._locks[self._key] = [threading.Lock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._guard:
+            entry = self._locks[self._key]
+            entry[0].release()
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[self._key]
+        return False
+
+
+class QueryCache(object):
+
+    # Keys added to the membership filter between automatic saves
+    MEMBERSHIP_SAVE_INTERVAL = 1000
+
+    def __init__(self, ttl=None, directory=None, expected_keys=1000000):
+        """
+        Parameters
+        ----------
+        ttl: number
+            Seconds a result stays fresh. Results never expire if left blank.
+
+        directory: string
+            Directory to persist results in, so they can be shared between
+            processes and runs. Results are kept in memory only if left blank.
+
+        expected_keys: integer
+            Number of keys the on-disk membership filter is sized for
+        """
+        self.ttl = ttl
+        self.directory = directory
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._key_locks_guard = threading.Lock()
+        self.membership = None
+        self._unsaved = 0
+        if directory:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self._open_membership(expected_keys)
+
+    @property
+    def _membership_path(self):
+        return os.path.join(self.directory, "keys.bloom")
+
+    def _open_membership(self, expected_keys):
+        # Every newly stored key is also appended to keys.bloom.log, so keys
+        # a process stored but never saved to keys.bloom (e.g. it crashed)
+        # are still found; keys.bloom.offset records how much of the log
+        # keys.bloom covers. Each save empties the log again.
+        self.membership = BloomFilter.open(self._membership_path, expected_keys)
+        if not (os.path.exists(self._membership_path) and os.path.exists(self._membership_path + ".offset")):
+            # No saved index: index the entries already there once.
+            for root, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if filename.endswith(".json"):
+                        try:
+                            with io.open(os.path.join(root, filename), encoding="utf-8") as f:
+                                self.membership.add(json.load(f)["key"])
+                        except (IOError, OSError, ValueError, KeyError):
+                            continue
+        self.flush()
+
+    def _journal(self, key):
+        # Appends hold the lock too, so flush() never empties the log under a writer.
+        with _FileLock(self._membership_path + ".lock"):
+            with io.open(self._membership_path + ".log", "ab") as f:
+                f.write((key + u"\n").encode("utf-8"))
+
+    def _read_offset(self):
+        try:
+            with io.open(self._membership_path + ".offset", "rb") as f:
+                return int(f.read().strip() or 0)
+        except (IOError, OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with io.open(fd, "wb") as f:
+            f.write(str(offset).encode("ascii"))
+        os.rename(tmp_path, self._membership_path + ".offset")
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + ".json")
+
+    def _fresh(self, stored_at):
+        return self.ttl is None or time.time() - stored_at < self.ttl
+
+    def _load(self, key):
+        try:
+            with io.open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        return entry["stored_at"], entry["value"], entry.get("validators")
+
+    def _dump(self, key, entry):
+        path = self._path(key)
+        if not os.path.isdir(os.path.dirname(path)):
+            try:
+                os.makedirs(os.path.dirname(path))
+            except OSError:
+                pass  # created by a concurrent writer
+
+        # Write to a temporary file first so readers never see partial entries.
+        stored_at, value, validators = entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with io.open(fd, "wb") as f:
+            entry = {"key": key, "stored_at": stored_at, "value": value, "validators": validators}
+            f.write(json.dumps(entry).encode("utf-8"))
+        os.rename(tmp_path, path)
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.directory:
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+        return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+        if self.directory:
+            self._dump(key, entry)
+            # Refreshed keys are already in the filter; every bit it has set
+            # came from keys.bloom or the log, so they need no log line.
+            if key in self.membership:
+                return
+            self._journal(key)
+            with self._lock:
+                self.membership.add(key)
+                self._unsaved += 1
+                save = self._unsaved >= self.MEMBERSHIP_SAVE_INTERVAL
+            if save:
+                self.flush()
+
+    def might_contain(self, key):
+        """
+        False if `key` is definitely not cached, True if it probably is.
+        Answered from memory, without reading any cache entry.
+        """
+        if key in self._entries:
+            return True
+        return self.membership is not None and key in self.membership
+
+    def flush(self):
+        """
+        Persist the membership filter next to the cached entries, merged
+        with what other processes saved and logged meanwhile, and pick
+        their keys up in this instance too.
+        """
+        if self.membership is None:
+            return
+        with self._lock, _FileLock(self._membership_path + ".lock"):
+            offset = 0
+            if os.path.exists(self._membership_path):
+                try:
+                    self.membership.merge(BloomFilter.load(self._membership_path))
+                    offset = self._read_offset()
+                except ValueError:
+                    pass  # unreadable or resized: rebuilt from the whole log below
+            try:
+                with io.open(self._membership_path + ".log", "rb") as f:
+                    f.seek(offset)
+                    logged = f.read()
+            except (IOError, OSError):
+                logged = b""
+            # A line still being appended, or cut short by a crash, is not replayed.
+            logged = logged[:logged.rfind(b"\n") + 1]
+            for line in logged.splitlines():
+                self.membership.add(line.decode("utf-8"))
+            self.membership.save(self._membership_path)
+            if fcntl is None:
+                # Appends are not serialized with this save; keep the log.
+                self._write_offset(offset + len(logged))
+            else:
+                # keys.bloom now covers the whole log. Reset the offset
+                # first: a crash before truncating only replays the log.
+                self._write_offset(0)
+                io.open(self._membership_path + ".log", "wb").close()
+            self._unsaved = 0
+
+    def lookup(self, key):
+        """
+        Return (value, fresh, validators) for `key`, or None if nothing is
+        cached. Stale entries are still returned so they can be revalidated
+        with the ETag/Last-Modified `validators` stored alongside them.
+        """
+        entry = self._entry(key)
+        if entry is None:
+            return None
+        stored_at, value, validators = entry
+        return value, self._fresh(stored_at), validators
+
+    def get(self, key):
+        """
+        Return the cached result for `key`, or None if missing or stale.
+        """
+        entry = self.lookup(key)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    def set(self, key, value, validators=None):
+        """
+        Parameters
+        ----------
+        validators: dict
+            Response validators, e.g. {"ETag": ..., "Last-Modified": ...}
+        """
+        self._store(key, (time.time(), value, validators or None))
+
+    def get_many(self, keys):
+        """
+        {key: result} for the `keys` that have a fresh cached result.
+        """
+        results = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                results[key] = value
+        return results
+
+    def lock(self, key):
+        """
+        Context manager held while fetching a missing `key`, so concurrent
+        callers wait for one fetch and read its result from the cache.
+        """
+        return _KeyLock(self._key_locks, self._key_locks_guard, key)
+
+    def touch(self, key):
+        """
+        Mark a cached result as fresh again, e.g. after a 304 Not Modified.
+        """
+        entry = self._entry(key)
+        if entry is not None:
+            self._store(key, (time.time(),) + tuple(entry[1:]))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class NegativeCache(object):
+
+    def __init__(self, recheck_after=7 * 24 * 3600, path=None):
+        """
+        Remembers (endpoint, domain) pairs that had no data, so they can be
+        skipped without a request until `recheck_after` seconds have passed.
+
+        Parameters
+        ----------
+        recheck_after: number
+            Seconds before a known-empty pair is queried again
+
+        path: string
+            Append-only file to persist entries in. Kept in memory only if left blank.
+        """
+        self.recheck_after = recheck_after
+        self.path = path
+        self._entries = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._read()
+
+    def _read(self):
+        with io.open(self.path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip(u"\n").split(u"\t")
+                if len(parts) != 3:
+                    continue  # partial line from an interrupted write
+                try:
+                    stored_at = float(parts[0])
+                except ValueError:
+                    continue
+                self._entries[(parts[1], parts[2])] = stored_at
+
+    def __contains__(self, key):
+        stored_at = self._entries.get(key)
+        return stored_at is not None and time.time() - stored_at < self.recheck_after
+
+    def __len__(self):
+        return len(self._entries)
+
+    def might_contain(self, endpoint, subject):
+        """
+        Whether (endpoint, subject) is known to have no data. Entries are all
+        held in memory, so unlike `QueryCache.might_contain` this is exact.
+        """
+        return (endpoint, subject) in self
+
+    def add(self, endpoint, subject):
+        stored_at = time.time()
+        with self._lock:
+            self._entries[(endpoint, subject)] = stored_at
+            if self.path:
+                with io.open(self.path, "a", encoding="utf-8") as f:
+                    f.write(u"%f\t%s\t%s\n" % (stored_at, endpoint, subject))
+
+    def discard(self, endpoint, subject):
+        with self._lock:
+            self._entries.pop((endpoint, subject), None)
+
+    def filter(self, endpoint, subjects):
+        """
+        Yield the `subjects` not known to have no data for `endpoint`.
+        """
+        for subject in subjects:
+            if (endpoint, subject) not in self:
+                yield subject
+
+    def compact(self):
+        """
+        Rewrite the file with only the entries still within `recheck_after`.
+        """
+        with self._lock:
+            now = time.time()
+            self._entries = dict((key, stored_at) for key, stored_at in self._entries.items()
+                                 if now - stored_at < self.recheck_after)
+            if not self.path:
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)))
+            with io.open(fd, "w", encoding="utf-8") as f:
+                for (endpoint, subject), stored_at in self._entries.items():
+                    f.write(u"%f\t%s\t%s\n" % (stored_at, endpoint, subject))
+            os.rename(tmp_path, self.path)
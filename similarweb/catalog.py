@@ -0,0 +1,124 @@
+"""
+Cached catalog of TopSitesAPI categories and countries.
+
+The catalogs are fetched once and cached for a long time. Category and
+country names are then validated and resolved locally, tolerating case,
+spacing and small typos, so a misspelled name fails before a request is
+wasted on it.
+"""
+import difflib
+import itertools
+import re
+import threading
+from similarweb import base
+from similarweb.cache import QueryCache
+from similarweb.exceptions import InvalidCategoryException, InvalidCountryException
+
+# Catalogs change rarely: keep them for 30 days.
+CATALOG_TTL = 30 * 24 * 3600
+
+_SEPARATORS = re.compile(r"[\s_\-&/,]+")
+
+
+def normalize(name):
+    """
+    Lower-case `name` and drop spacing and punctuation, keeping the "~"
+    category separator: "Shopping ~ sports" and "Shopping~Sports" match.
+    """
+    return "~".join(_SEPARATORS.sub("", part.lower()) for part in name.split("~"))
+
+
+class TopSitesCatalog(object):
+
+    def __init__(self, api_key, cache=None, fuzzy_cutoff=0.8, **options):
+        """
+        Parameters
+        ----------
+        api_key: string
+            SimilarWeb API key
+
+        cache: similarweb.cache.QueryCache
+            Where the catalogs are cached. Defaults to an in-memory cache
+            with a 30 day TTL; pass one with a directory to share it across runs.
+
+        fuzzy_cutoff: float
+            Minimum similarity (0-1) for a misspelled name to resolve
+
+        options:
+            Other transport options for the catalog requests
+        """
+        self.api_key = api_key
+        self.cache = cache if cache is not None else QueryCache(ttl=CATALOG_TTL)
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.options = options
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def _entries(self, cls):
+        return cls(self.api_key, cache=self.cache, **self.options).query()
+
+    def categories(self):
+        return self._entries(base.TopSitesCategoriesAPI)
+
+    def countries(self):
+        return self._entries(base.TopSitesCountriesAPI)
+
+    def _lookup(self, kind, entries):
+        with self._lock:
+            lookup = self._lookups.get(kind)
+            if lookup is None or lookup[0] is not entries:
+                lookup = self._lookups[kind] = (entries, dict((normalize(entry), entry) for entry in entries))
+            return lookup[1]
+
+    def _resolve(self, name, kind, entries, exception):
+        lookup = self._lookup(kind, entries)
+        key = normalize(name)
+        if key in lookup:
+            return lookup[key]
+        close = difflib.get_close_matches(key, list(lookup), n=3, cutoff=self.fuzzy_cutoff)
+        if len(close) == 1 or (close and difflib.SequenceMatcher(None, key, close[0]).ratio() >= 0.9):
+            return lookup[close[0]]
+        # Suggest from a looser match than the one used to resolve.
+        close = close or difflib.get_close_matches(key, list(lookup), n=3, cutoff=0.6)
+        suggestions = ", ".join(lookup[match] for match in close) or "none"
+        raise exception("Unknown %s %r (did you mean: %s?)" % (kind, name, suggestions))
+
+    def category(self, name):
+        """
+        Catalog spelling of category `name`. Raises `InvalidCategoryException`
+        if it does not resolve to exactly one category.
+        """
+        return self._resolve(name, "category", self.categories(), InvalidCategoryException)
+
+    def country(self, name):
+        """
+        Catalog spelling of country `name`. Raises `InvalidCountryException`
+        if it does not resolve to exactly one country.
+        """
+        return self._resolve(name, "country", self.countries(), InvalidCountryException)
+
+    def search(self, text, kind="category", n=10):
+        """
+        Up to `n` catalog entries whose name contains or resembles `text`.
+        """
+        entries = self.categories() if kind == "category" else self.countries()
+        key = normalize(text)
+        lookup = self._lookup(kind, entries)
+        matches = [entry for normalized, entry in sorted(lookup.items()) if key in normalized]
+        for match in difflib.get_close_matches(key, list(lookup), n=n, cutoff=0.6):
+            if lookup[match] not in matches:
+                matches.append(lookup[match])
+        return matches[:n]
+
+    def combinations(self, categories=None, countries=None, include_all=True):
+        """
+        (category, country) pairs for bulk TopSitesAPI pulls, e.g. for
+        `SnapshotStore.fetch`. Defaults to every catalog entry; with
+        `include_all`, None ("All Categories" / "Worldwide") is included too.
+        """
+        categories = [self.category(c) for c in categories] if categories is not None else self.categories()
+        countries = [self.country(c) for c in countries] if countries is not None else self.countries()
+        if include_all:
+            categories = [None] + list(categories)
+            countries = [None] + list(countries)
+        return list(itertools.product(categories, countries))
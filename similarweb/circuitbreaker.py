@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import deque
+from similarweb.exceptions import CircuitOpenException
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class _Circuit(object):
+
+    def __init__(self, window_size):
+        self.state = CLOSED
+        self.calls = deque(maxlen=window_size)  # (failed, slow) per recent call
+        self.opened_at = None
+        self.trials = 0
+
+
+class CircuitBreaker(object):
+
+    def __init__(self, failure_rate=0.5, slow_call_rate=0.5, slow_call_seconds=10,
+                 window_size=20, min_calls=10, reset_timeout=30, half_open_calls=1):
+        """
+        Per-endpoint circuit breaker. Share one instance between API objects
+        so that a degraded endpoint fails fast with `CircuitOpenException`
+        instead of tying up a thread, while other endpoints carry on.
+
+        Parameters
+        ----------
+        failure_rate: float
+            Share of failed calls in the window that opens the circuit
+
+        slow_call_rate: float
+            Share of calls slower than `slow_call_seconds` that opens the circuit
+
+        slow_call_seconds: number
+            Latency above which a call counts as slow
+
+        window_size: integer
+            Number of most recent calls per endpoint the rates are computed over
+
+        min_calls: integer
+            Calls needed in the window before the circuit can open
+
+        reset_timeout: number
+            Seconds an open circuit waits before letting trial calls through
+
+        half_open_calls: integer
+            Trial calls allowed while half-open; one failure re-opens the circuit
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, endpoint):
+        circuit = self._circuits.get(endpoint)
+        if circuit is None:
+            circuit = self._circuits[endpoint] = _Circuit(self.window_size)
+        return circuit
+
+    def state(self, endpoint):
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == OPEN and time.time() - circuit.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return circuit.state
+
+    def before_call(self, endpoint):
+        """
+        Raise `CircuitOpenException` if calls to `endpoint` should not be sent.
+        """
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == OPEN:
+                waited = time.time() - circuit.opened_at
+                if waited < self.reset_timeout:
+                    raise CircuitOpenException(endpoint, self.reset_timeout - waited)
+                circuit.state = HALF_OPEN
+                circuit.trials = 0
+
+            if circuit.state == HALF_OPEN:
+                if circuit.trials >= self.half_open_calls:
+                    raise CircuitOpenException(endpoint, 0)
+                circuit.trials += 1
+
+    def record(self, endpoint, failed, seconds):
+        """
+        Record the outcome of a call let through by `before_call`.
+        """
+        slow = self.slow_call_seconds is not None and seconds >= self.slow_call_seconds
+        with self._lock:
+            circuit = self._circuit(endpoint)
+            if circuit.state == HALF_OPEN:
+                if failed or slow:
+                    self._open(circuit)
+                else:
+                    circuit.state = CLOSED
+                    circuit.calls.clear()
+                return
+
+            circuit.calls.append((failed, slow))
+            calls = len(circuit.calls)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for f, _ in circuit.calls if f)
+            slow_calls = sum(1 for _, s in circuit.calls if s)
+            if failures >= self.failure_rate * calls or slow_calls >= self.slow_call_rate * calls:
+                self._open(circuit)
+
+    def _open(self, circuit):
+        circuit.state = OPEN
+        circuit.opened_at = time.time()
+        circuit.calls.clear()
@@ -0,0 +1,182 @@
+"""
+Command-line interface: read domains or app ids (one per line), query an
+endpoint concurrently and stream one JSON line per result to stdout as soon
+as it completes.
+
+    cat domains.txt | similarweb traffic --param start_month=1-2015 --param end_month=2-2015
+"""
+import argparse
+import io
+import os
+import sys
+from similarweb import base
+from similarweb import batch
+from similarweb import utils
+from similarweb.cache import NegativeCache, QueryCache
+from similarweb.circuitbreaker import CircuitBreaker
+from similarweb.ratelimit import AdaptiveConcurrency, RateLimiter
+from similarweb.rediscache import RedisCache
+
+
+# Endpoint name -> (API class name, keyword argument each input line is passed as)
+ENDPOINTS = {
+    "traffic": ("TrafficAPI", "domain"),
+    "rank-and-reach": ("RankAndReachAPI", "domain"),
+    "engagement": ("EngagementAPI", "domain"),
+    "similar-websites": ("SimilarWebsitesAPI", "domain"),
+    "also-visited": ("AlsoVisitedAPI", "domain"),
+    "website-tags": ("WebsiteTagsAPI", "domain"),
+    "website-categorization": ("WebsiteCategorizationAPI", "domain"),
+    "category-rank": ("CategoryRankAPI", "domain"),
+    "top-sites": ("TopSitesAPI", "category"),
+    "social-referrals": ("SocialReferralsAPI", "domain"),
+    "search-keywords": ("SearchKeywordsAPI", "domain"),
+    "destinations": ("DestinationsAPI", "domain"),
+    "referrals": ("ReferralsAPI", "domain"),
+    "keyword-competitors": ("KeywordCompetitorsAPI", "domain"),
+    "app-details": ("AppDetailsAPI", "app_id"),
+    "google-app-installs": ("GoogleAppInstallsAPI", "app_id"),
+    "related-site-apps": ("RelatedSiteAppsAPI", "domain"),
+}
+
+
+def api_class(name):
+    """
+    Look up an API class by endpoint name ("traffic") or class name ("TrafficAPI").
+    """
+    if name in ENDPOINTS:
+        name = ENDPOINTS[name][0]
+    cls = getattr(base, name, None)
+    if not isinstance(cls, type) or not issubclass(cls, base.SimilarWeb) or cls is base.SimilarWeb:
+        raise ValueError("Unknown API: %r" % name)
+    return cls
+
+
+def default_argument(name):
+    """
+    Keyword argument input lines are passed as for an endpoint or class name.
+    """
+    for endpoint, (class_name, argument) in ENDPOINTS.items():
+        if name in (endpoint, class_name):
+            return argument
+    return "domain"
+
+
+def parse_param(value):
+    key, sep, val = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected KEY=VALUE, got %r" % value)
+    return key, val
+
+
+def read_lines(stream):
+    for line in stream:
+        item = line.strip()
+        if item:
+            yield item
+
+
+class Factory(object):
+    """
+    Build API objects for one input item each, sharing transport options.
+    """
+
+    def __init__(self, cls, api_key, argument, params, **options):
+        self.cls = cls
+        self.api_key = api_key
+        self.argument = argument
+        self.params = params
+        self.options = options
+
+    def __call__(self, item):
+        kwargs = dict(self.params)
+        kwargs.update(self.options)
+        kwargs[self.argument] = item
+        return self.cls(self.api_key, **kwargs)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="similarweb",
+                                     description="Query a SimilarWeb endpoint for many domains or app ids.")
+    parser.add_argument("endpoint", help="one of: " + ", ".join(sorted(ENDPOINTS)))
+    parser.add_argument("-i", "--input", default="-", help="file with one item per line (default: stdin)")
+    parser.add_argument("--api-key", default=os.environ.get("SIMILARWEB_API_KEY"),
+                        help="defaults to $SIMILARWEB_API_KEY")
+    parser.add_argument("--argument", choices=["domain", "app_id", "category"],
+                        help="argument input lines are passed as (default depends on the endpoint)")
+    parser.add_argument("-p", "--param", action="append", type=parse_param, default=[],
+                        metavar="KEY=VALUE", help="extra API argument, may be repeated")
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--cache-dir", help="persist results here and reuse them across runs")
+    parser.add_argument("--cache-ttl", type=float, help="seconds cached results stay fresh")
+    parser.add_argument("--redis-url", help="share cached results between hosts through this Redis server")
+    parser.add_argument("--negative-cache", metavar="PATH", help="remember domains with no data in this file")
+    parser.add_argument("--recheck-after", type=float, default=7 * 24 * 3600,
+                        help="seconds before a domain with no data is queried again (default: a week)")
+    parser.add_argument("--rate", type=float, help="maximum requests per second")
+    parser.add_argument("--burst", type=int, help="requests allowed back to back under --rate")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt requests in flight to latency and throttling, up to --concurrency")
+    parser.add_argument("--timeout", type=float, help="connect and read timeout per request, in seconds")
+    parser.add_argument("--deadline", type=float,
+                        help="seconds each query may take overall, including rate limiter waits and reading the body")
+    parser.add_argument("--retries", type=int, default=0, help="times to retry throttled or failed requests")
+    parser.add_argument("--circuit-breaker", action="store_true",
+                        help="fail fast while the endpoint keeps failing or timing out")
+    parser.add_argument("--budget", type=float, help="seconds the whole run may take; unfinished items are dropped")
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None):
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or $SIMILARWEB_API_KEY)")
+    try:
+        cls = api_class(args.endpoint)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = {"session": utils.make_session(args.concurrency)}
+    if args.redis_url:
+        options["cache"] = RedisCache.from_url(args.redis_url, ttl=args.cache_ttl)
+    elif args.cache_dir or args.cache_ttl:
+        options["cache"] = QueryCache(ttl=args.cache_ttl, directory=args.cache_dir)
+    if args.negative_cache:
+        options["negative_cache"] = NegativeCache(args.recheck_after, args.negative_cache)
+    if args.rate:
+        options["rate_limiter"] = RateLimiter(args.rate, args.burst)
+    if args.adaptive:
+        options["rate_limiter"] = AdaptiveConcurrency(initial=min(4, args.concurrency), maximum=args.concurrency,
+                                                      limiter=options.get("rate_limiter"))
+    if args.timeout:
+        options["timeout"] = args.timeout
+    if args.deadline:
+        options["deadline"] = args.deadline
+    if args.circuit_breaker:
+        options["circuit_breaker"] = CircuitBreaker()
+
+    argument = args.argument or default_argument(args.endpoint)
+    factory = Factory(cls, args.api_key, argument, dict(args.param), **options)
+
+    source = stdin if args.input == "-" else io.open(args.input, encoding="utf-8")
+    failed = 0
+    try:
+        for item, result, error in batch.fetch_many(factory, read_lines(source), args.concurrency,
+                                                    args.budget, args.retries):
+            stdout.write(batch.to_record(item, result, error) + "\n")
+            stdout.flush()
+            failed += error is not None
+    finally:
+        if source is not stdin:
+            source.close()
+        if isinstance(options.get("cache"), QueryCache):
+            options["cache"].flush()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Long-lived client sharing transport resources across threads.
+
+The API classes bind their query parameters at construction. A `Client`
+instead owns the API key, session, rate limiter, caches, circuit breaker
+and metrics once, and takes query parameters per call:
+
+    client = Client(api_key, cache=QueryCache(ttl=3600), rate_limiter=RateLimiter(10))
+    client.traffic("example.com", "1-2015", "3-2015")
+
+A Client holds no per-query state, so one instance can serve any number
+of threads; identical queries in flight at the same time are coalesced.
+"""
+import threading
+import time
+from similarweb import base
+from similarweb import utils
+
+batch = utils.LazyModule("similarweb.batch")
+
+
+class Metrics(object):
+    """
+    Thread-safe per-endpoint counters of queries, failures and seconds spent.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, failed, seconds):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {"queries": 0, "errors": 0, "seconds": 0.0})
+            counters["queries"] += 1
+            counters["errors"] += 1 if failed else 0
+            counters["seconds"] += seconds
+
+    def stats(self):
+        """
+        {endpoint: {"queries", "errors", "seconds"}} so far.
+        """
+        with self._lock:
+            return dict((endpoint, dict(counters)) for endpoint, counters in self._counters.items())
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+
+
+class Client(object):
+
+    def __init__(self, api_key, session=None, cache=None, rate_limiter=None,
+                 timeout=base.SimilarWeb.DEFAULT_TIMEOUT, deadline=None, circuit_breaker=None,
+                 negative_cache=None, pool_size=10):
+        """
+        Parameters
+        ----------
+        api_key: string
+            SimilarWeb API key
+
+        session: requests.Session
+            Session shared by all queries. Defaults to one pooling
+            `pool_size` connections, created on the first query.
+
+        pool_size: integer
+            Connections kept open by the default session; match the number
+            of threads sharing the client.
+
+        The other parameters are the transport options of `SimilarWeb`.
+        """
+        self.api_key = api_key
+        self.session = session
+        self.pool_size = pool_size
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.deadline = deadline
+        self.circuit_breaker = circuit_breaker
+        self.negative_cache = negative_cache
+        self.metrics = Metrics()
+        self.single_flight = batch.SingleFlight()
+        self._lock = threading.Lock()
+
+    def _session(self):
+        if self.session is None:
+            with self._lock:
+                if self.session is None:
+                    self.session = utils.make_session(self.pool_size)
+        return self.session
+
+    @property
+    def options(self):
+        """
+        Transport options for API objects sharing this client's resources.
+        """
+        return dict(session=self._session(), cache=self.cache, rate_limiter=self.rate_limiter,
+                    timeout=self.timeout, deadline=self.deadline, circuit_breaker=self.circuit_breaker,
+                    negative_cache=self.negative_cache)
+
+    def api(self, cls, *args, **kwargs):
+        """
+        API object of class `cls` bound to this client's resources, e.g. for
+        `batch.fetch_many` factories.
+        """
+        options = self.options
+        options.update(kwargs)
+        return cls(self.api_key, *args, **options)
+
+    def query(self, cls, *args, **kwargs):
+        """
+        Query `cls` with the given arguments and record it in `metrics`.
+        Identical queries made concurrently from several threads share one
+        request; `single_flight.stats()` counts how many were shared.
+        """
+        api = self.api(cls, *args, **kwargs)
+        return self._call(api, api.cache_key, api.query)
+
+    def query_raw(self, cls, *args, **kwargs):
+        """
+        Like `query`, but returns the response body as bytes (see
+        `SimilarWeb.query_raw`).
+        """
+        api = self.api(cls, *args, **kwargs)
+        return self._call(api, ("raw", api.cache_key), api.query_raw)
+
+    def _call(self, api, key, fetch):
+        started = time.time()
+        try:
+            result = self.single_flight.do(key, fetch)
+        except Exception:
+            self.metrics.record(api.endpoint_name, True, time.time() - started)
+            raise
+        self.metrics.record(api.endpoint_name, False, time.time() - started)
+        return result
+
+    def traffic(self, domain, start_month, end_month, time_granularity="MONTHLY", main_domain_only=False):
+        return self.query(base.TrafficAPI, domain, start_month, end_month, time_granularity, main_domain_only)
+
+    def rank_and_reach(self, domain):
+        return self.query(base.RankAndReachAPI, domain)
+
+    def engagement(self, endpoint, domain, start_month, end_month, time_granularity="MONTHLY",
+                   main_domain_only=False):
+        return self.query(base.EngagementAPI, endpoint, domain, start_month, end_month, time_granularity,
+                          main_domain_only)
+
+    def similar_websites(self, domain):
+        return self.query(base.SimilarWebsitesAPI, domain)
+
+    def also_visited(self, domain):
+        return self.query(base.AlsoVisitedAPI, domain)
+
+    def website_tags(self, domain):
+        return self.query(base.WebsiteTagsAPI, domain)
+
+    def website_categorization(self, domain):
+        return self.query(base.WebsiteCategorizationAPI, domain)
+
+    def category_rank(self, domain):
+        return self.query(base.CategoryRankAPI, domain)
+
+    def top_sites(self, category=None, country=None, catalog=None):
+        return self.query(base.TopSitesAPI, category, country, catalog)
+
+    def top_sites_categories(self):
+        return self.query(base.TopSitesCategoriesAPI)
+
+    def top_sites_countries(self):
+        return self.query(base.TopSitesCountriesAPI)
+
+    def social_referrals(self, domain):
+        return self.query(base.SocialReferralsAPI, domain)
+
+    def search_keywords(self, endpoint, domain, start_month, end_month, main_domain_only=False,
+                        results_page=None):
+        return self.query(base.SearchKeywordsAPI, endpoint, domain, start_month, end_month,
+                          main_domain_only, results_page)
+
+    def destinations(self, domain):
+        return self.query(base.DestinationsAPI, domain)
+
+    def referrals(self, domain, start_month, end_month, main_domain_only=False, results_page=None):
+        return self.query(base.ReferralsAPI, domain, start_month, end_month, main_domain_only, results_page)
+
+    def keyword_competitors(self, endpoint, domain, start_month, end_month, main_domain_only=False,
+                            results_page=None):
+        return self.query(base.KeywordCompetitorsAPI, endpoint, domain, start_month, end_month,
+                          main_domain_only, results_page)
+
+    def app_details(self, app_id, app_store_id):
+        return self.query(base.AppDetailsAPI, app_id, app_store_id)
+
+    def google_app_installs(self, app_id):
+        return self.query(base.GoogleAppInstallsAPI, app_id)
+
+    def related_site_apps(self, domain, app_store_id):
+        return self.query(base.RelatedSiteAppsAPI, domain, app_store_id)
@@ -0,0 +1,179 @@
+"""
+Cross-domain comparison of traffic and engagement metrics.
+
+`compare` fetches visits (TrafficAPI) and pageviews, visitduration and
+bouncerate (EngagementAPI) for many domains concurrently, querying each
+(domain, metric) pair once, and aligns everything into a `ComparisonMatrix`:
+one dense domain x metric x date block of doubles plus a missing-value
+mask, laid out contiguously in C order.
+"""
+import math
+from array import array
+from similarweb import base
+from similarweb import batch
+from similarweb import utils
+
+METRICS = ("visits", "pageviews", "visitduration", "bouncerate")
+
+numpy = utils.LazyModule("numpy")
+
+
+class ComparisonMatrix(object):
+
+    def __init__(self, domains, metrics, dates):
+        self.domains = list(domains)
+        self.metrics = list(metrics)
+        self.dates = list(dates)
+        self.shape = (len(self.domains), len(self.metrics), len(self.dates))
+        size = self.shape[0] * self.shape[1] * self.shape[2]
+        self.data = array("d", [0.0]) * size
+        self.mask = bytearray(size)  # 1 where a value is present
+        self.errors = {}  # (domain, metric) -> exception
+        self._domain_index = dict((domain, i) for i, domain in enumerate(self.domains))
+        self._metric_index = dict((metric, i) for i, metric in enumerate(self.metrics))
+        self._date_index = dict((date, i) for i, date in enumerate(self.dates))
+
+    def _offset(self, domain, metric, date=0):
+        d, m = self._domain_index[domain], self._metric_index[metric]
+        t = date if isinstance(date, int) else self._date_index[date]
+        return (d * self.shape[1] + m) * self.shape[2] + t
+
+    def set_series(self, domain, metric, values):
+        start = self._offset(domain, metric)
+        for record in values:
+            t = self._date_index.get(record["Date"])
+            if t is not None and record.get("Value") is not None:
+                self.data[start + t] = record["Value"]
+                self.mask[start + t] = 1
+
+    def value(self, domain, metric, date):
+        """
+        Value for one cell, or None if missing.
+        """
+        offset = self._offset(domain, metric, date)
+        return self.data[offset] if self.mask[offset] else None
+
+    def series(self, domain, metric):
+        """
+        [value or None] over `dates`.
+        """
+        start = self._offset(domain, metric)
+        return [self.data[i] if self.mask[i] else None for i in range(start, start + self.shape[2])]
+
+    def column(self, metric, date):
+        """
+        [value or None] over `domains` for one metric and date.
+        """
+        m, t = self._metric_index[metric], self._date_index[date]
+        stride = self.shape[1] * self.shape[2]
+        offsets = range(m * self.shape[2] + t, len(self.data), stride)
+        return [self.data[i] if self.mask[i] else None for i in offsets]
+
+    def rank(self, metric, date, descending=True):
+        """
+        Domains with a value for (metric, date), best first.
+        """
+        pairs = [(value, domain) for domain, value in zip(self.domains, self.column(metric, date))
+                 if value is not None]
+        pairs.sort(key=lambda pair: pair[0], reverse=descending)
+        return [domain for _, domain in pairs]
+
+    def correlation(self, metric_a, metric_b, date):
+        """
+        Pearson correlation of two metrics across domains on one date, or
+        None with fewer than two domains having both values.
+        """
+        pairs = [(a, b) for a, b in zip(self.column(metric_a, date), self.column(metric_b, date))
+                 if a is not None and b is not None]
+        if len(pairs) < 2:
+            return None
+        n = float(len(pairs))
+        mean_a = sum(a for a, _ in pairs) / n
+        mean_b = sum(b for _, b in pairs) / n
+        cov = sum((a - mean_a) * (b - mean_b) for a, b in pairs)
+        var_a = sum((a - mean_a) ** 2 for a, _ in pairs)
+        var_b = sum((b - mean_b) ** 2 for _, b in pairs)
+        if not var_a or not var_b:
+            return None
+        return cov / math.sqrt(var_a * var_b)
+
+    def to_numpy(self):
+        """
+        (values, mask) as numpy arrays of shape (domains, metrics, dates),
+        sharing memory with this matrix. Requires numpy.
+        """
+        values = numpy.frombuffer(self.data, dtype=numpy.float64).reshape(self.shape)
+        mask = numpy.frombuffer(self.mask, dtype=numpy.bool_).reshape(self.shape)
+        return values, mask
+
+
+def _client(api_key, domain, metric, start_month, end_month, time_granularity, main_domain_only, options):
+    if metric == "visits":
+        return base.TrafficAPI(api_key, domain, start_month, end_month, time_granularity, main_domain_only,
+                               **options)
+    return base.EngagementAPI(api_key, metric, domain, start_month, end_month, time_granularity,
+                              main_domain_only, **options)
+
+
+def compare(api_key, domains, start_month, end_month, metrics=METRICS, time_granularity="MONTHLY",
+            main_domain_only=False, concurrency=10, **options):
+    """
+    Parameters
+    ----------
+    api_key: string
+        SimilarWeb API key
+
+    domains: iterable
+        Domains or URLs to compare. Duplicates (after normalization) are queried once.
+
+    start_month: string
+        Start Month in (M-YYYY) format
+
+    end_month: string
+        End Month in (M-YYYY) format
+
+    metrics: tuple
+        Can contain: visits, pageviews, visitduration, bouncerate
+
+    time_granularity: string
+        Time granularity of report. Can be: Daily, Weekly, Monthly
+
+    main_domain_only: boolean
+        Get metrics on the Main Domain only (i.e. not including subdomains)
+
+    concurrency: integer
+        Number of queries in flight at once
+
+    options:
+        Transport options passed to every API object, e.g. session, cache, rate_limiter
+    """
+    for metric in metrics:
+        if metric not in METRICS:
+            raise ValueError("Unknown metric: %r" % metric)
+
+    unique = []
+    seen = set()
+    for domain in domains:
+        domain = utils.domain_from_url(domain)
+        if domain not in seen:
+            seen.add(domain)
+            unique.append(domain)
+
+    def factory(task):
+        return _client(api_key, task[0], task[1], start_month, end_month, time_granularity, main_domain_only,
+                       options)
+
+    tasks = [(domain, metric) for domain in unique for metric in metrics]
+    results, errors = {}, {}
+    for task, values, error in batch.fetch_many(factory, tasks, concurrency):
+        if error is not None:
+            errors[task] = error
+        else:
+            results[task] = values
+
+    dates = sorted(set(record["Date"] for values in results.values() for record in values))
+    matrix = ComparisonMatrix(unique, metrics, dates)
+    for (domain, metric), values in results.items():
+        matrix.set_series(domain, metric, values)
+    matrix.errors = errors
+    return matrix
@@ -0,0 +1,182 @@
+"""
+Sharded, resumable crawler for very large domain (or app id) lists.
+
+The input file is split across worker processes by line number. Each worker
+owns a pooled session, queries its share concurrently and appends one JSON
+line per item to its own shard file. On restart, items that already have a
+result in their shard file are skipped, so a killed job resumes where it
+stopped.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+from multiprocessing import Pool
+from similarweb import batch
+from similarweb import cli
+from similarweb import utils
+
+
+def shard_path(output_dir, shard, shards):
+    return os.path.join(output_dir, "shard-%05d-of-%05d.jsonl" % (shard, shards))
+
+
+def read_items(input_path, shard=0, shards=1):
+    """
+    Yield the non-blank lines of `input_path` belonging to `shard`.
+    """
+    with io.open(input_path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f):
+            item = line.strip()
+            if item and lineno % shards == shard:
+                yield item
+
+
+def completed_items(path):
+    """
+    Items that already have a result, or failed for good, in a shard file.
+    A trailing partial line left by a killed worker is ignored.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with io.open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "result" in record or record.get("retryable") is False:
+                done.add(record["input"])
+    return done
+
+
+def _ends_with_newline(path):
+    with io.open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def crawl_shard(job):
+    """
+    Crawl one shard. `job` is a dict as built by `crawl`; returns a summary.
+    """
+    shard, shards = job["shard"], job["shards"]
+    path = shard_path(job["output_dir"], shard, shards)
+    done = completed_items(path)
+    pending = (item for item in read_items(job["input_path"], shard, shards) if item not in done)
+
+    session = utils.make_session(job["concurrency"])
+    factory = cli.Factory(cli.api_class(job["api_name"]), job["api_key"], job["argument"], job["params"],
+                          session=session)
+    summary = {"shard": shard, "skipped": len(done), "succeeded": 0, "failed": 0}
+
+    with io.open(path, "a", encoding="utf-8") as out:
+        if not _ends_with_newline(path):
+            out.write(u"\n")
+        for item, result, error in batch.fetch_many(factory, pending, job["concurrency"], retries=job["retries"]):
+            out.write(batch.to_record(item, result, error) + u"\n")
+            out.flush()
+            summary["failed" if error is not None else "succeeded"] += 1
+
+    return summary
+
+
+def crawl(api_name, api_key, input_path, output_dir, params=None, argument=None,
+          workers=4, concurrency=10, retries=0):
+    """
+    Parameters
+    ----------
+    api_name: string
+        Endpoint or API class to query, e.g. "traffic" or "TrafficAPI"
+
+    api_key: string
+        SimilarWeb API key
+
+    input_path: string
+        File with one domain (or app id) per line
+
+    output_dir: string
+        Directory for the per-shard JSONL result files
+
+    params: dict
+        Other keyword arguments for the API class, e.g. start_month
+
+    argument: string
+        Name of the keyword argument each input line is passed as. Can be: domain, app_id, category.
+        Defaults to the one the endpoint takes.
+
+    workers: integer
+        Number of worker processes (and shards)
+
+    concurrency: integer
+        Number of queries in flight per worker
+
+    retries: integer
+        Times a query failing with a retryable error is retried. Items that
+        still fail that way are retried again when the crawl is resumed.
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    jobs = [{
+        "api_name": api_name,
+        "api_key": api_key,
+        "input_path": input_path,
+        "output_dir": output_dir,
+        "params": params or {},
+        "argument": argument or cli.default_argument(api_name),
+        "concurrency": concurrency,
+        "retries": retries,
+        "shard": shard,
+        "shards": workers,
+    } for shard in range(workers)]
+
+    if workers == 1:
+        return [crawl_shard(jobs[0])]
+
+    pool = Pool(workers)
+    try:
+        return pool.map(crawl_shard, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl a SimilarWeb API for a large list of domains.")
+    parser.add_argument("api", help="endpoint or API class to query, e.g. traffic or TrafficAPI")
+    parser.add_argument("input", help="file with one domain or app id per line")
+    parser.add_argument("output_dir", help="directory for per-shard JSONL results")
+    parser.add_argument("--api-key", default=os.environ.get("SIMILARWEB_API_KEY"),
+                        help="defaults to $SIMILARWEB_API_KEY")
+    parser.add_argument("--argument", choices=["domain", "app_id", "category"])
+    parser.add_argument("--param", action="append", type=cli.parse_param, default=[],
+                        metavar="KEY=VALUE", help="extra API argument, may be repeated")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--retries", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if not args.api_key:
+        parser.error("an API key is required (--api-key or $SIMILARWEB_API_KEY)")
+    try:
+        cli.api_class(args.api)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summaries = crawl(args.api, args.api_key, args.input, args.output_dir, dict(args.param),
+                      args.argument, args.workers, args.concurrency, args.retries)
+    for summary in summaries:
+        sys.stderr.write("shard {shard}: {succeeded} succeeded, {failed} failed, "
+                         "{skipped} already done\n".format(**summary))
+    return 0 if all(s["failed"] == 0 for s in summaries) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
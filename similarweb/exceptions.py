@@ -1,4 +1,36 @@
 class InvalidResponseException(Exception):
+    """
+    The API did not return the expected data. Subclasses below tell apart why;
+    `retryable` says whether sending the same request again may succeed.
+    """
+    retryable = False
+
+    def __init__(self, message=None, status_code=None):
+        super(InvalidResponseException, self).__init__(message)
+        self.status_code = status_code
+
+
+class AuthenticationException(InvalidResponseException):
+    pass
+
+
+class QuotaExceededException(InvalidResponseException):
+    pass
+
+
+class NoDataException(InvalidResponseException):
+    pass
+
+
+class ThrottledException(InvalidResponseException):
+    retryable = True
+
+
+class ServerErrorException(InvalidResponseException):
+    retryable = True
+
+
+class MalformedResponseException(InvalidResponseException):
     pass
 
 
@@ -8,3 +40,91 @@ class InvalidEndpointException(Exception):
 
 class InvalidURLException(Exception):
     pass
+
+
+class InvalidMonthRangeException(Exception):
+    pass
+
+
+class InvalidCategoryException(Exception):
+    pass
+
+
+class InvalidCountryException(Exception):
+    pass
+
+
+class DeadlineExceededException(Exception):
+    # Time ran out on our side; the request may well succeed with more of it.
+    retryable = True
+
+
+class CircuitOpenException(Exception):
+    # The endpoint is expected to recover, so the request is worth retrying later.
+    retryable = True
+
+    def __init__(self, endpoint, retry_after):
+        super(CircuitOpenException, self).__init__("Circuit open for %s, retry in %.1fs" % (endpoint, retry_after))
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+# Checked in order against the lower-cased error message.
+_MESSAGE_CLASSES = [
+    (("too many requests", "throttl", "rate limit"), ThrottledException),
+    (("quota", "limit exceeded", "hits"), QuotaExceededException),
+    (("user key", "userkey", "api key", "unauthorized", "not authorized", "forbidden"), AuthenticationException),
+    (("no data", "not found", "data not found", "not enough data"), NoDataException),
+]
+
+_STATUS_CLASSES = {
+    401: AuthenticationException,
+    403: AuthenticationException,
+    404: NoDataException,
+    429: ThrottledException,
+}
+
+MAX_MESSAGE_LENGTH = 200
+
+try:
+    _TEXT_TYPES = (str, unicode)
+except NameError:  # Python 3
+    _TEXT_TYPES = (str,)
+
+
+def error_message(payload):
+    """
+    Short error message from an error payload, never the whole payload.
+    """
+    if isinstance(payload, dict):
+        for key in ("Error", "error", "Message", "message", "Meta"):
+            if key in payload:
+                payload = payload[key]
+                break
+    message = payload if isinstance(payload, _TEXT_TYPES) else repr(payload)
+    if len(message) > MAX_MESSAGE_LENGTH:
+        message = message[:MAX_MESSAGE_LENGTH] + "..."
+    return message
+
+
+def classify_error(status_code, payload):
+    """
+    Build the `InvalidResponseException` subclass matching an unsuccessful
+    response, from its HTTP status code and (decoded) payload. Pass
+    `payload=None` when the body was not valid JSON.
+    """
+    if status_code is not None and status_code >= 500:
+        return ServerErrorException("HTTP %d" % status_code, status_code)
+    if payload is None:
+        return MalformedResponseException("Response body is not valid JSON", status_code)
+
+    message = error_message(payload)
+    lowered = message.lower()
+    for needles, cls in _MESSAGE_CLASSES:
+        if any(needle in lowered for needle in needles):
+            return cls(message, status_code)
+    if status_code in _STATUS_CLASSES:
+        return _STATUS_CLASSES[status_code](message, status_code)
+    if not isinstance(payload, dict):
+        return MalformedResponseException(message, status_code)
+    return InvalidResponseException(message, status_code)
@@ -0,0 +1,280 @@
+"""
+Local site-relationship graph built from SimilarWebsitesAPI, AlsoVisitedAPI,
+ReferralsAPI and DestinationsAPI results.
+
+`crawl_graph` expands seed domains breadth-first, querying each domain at
+most once per relation, and returns a `GraphIndex`. The index interns domains
+to integer ids (see `similarweb.interning`) and stores each relation as
+compressed sparse rows (an offsets array plus target and weight arrays), so
+neighbor, k-hop and top-similar queries run locally. `GraphIndex.save` writes the raw arrays to a directory
+and `GraphIndex.load` memory-maps them back.
+"""
+import io
+import mmap
+import os
+from array import array
+from similarweb import base
+from similarweb import batch
+from similarweb import utils
+from similarweb.exceptions import InvalidURLException
+from similarweb.interning import Interner
+
+# relation -> (API class, extra API arguments it requires)
+RELATIONS = {
+    "similar": (base.SimilarWebsitesAPI, ()),
+    "also_visited": (base.AlsoVisitedAPI, ()),
+    "referrals": (base.ReferralsAPI, ("start_month", "end_month")),
+    "destinations": (base.DestinationsAPI, ()),
+}
+
+_TARGET_KEYS = ("Url", "Site", "Domain")
+_WEIGHT_KEYS = ("Score", "Share", "Visits", "Value")
+
+
+def edges_from_result(result):
+    """
+    Yield (domain, weight) pairs from a relation query result. Handles lists
+    of {"Url": ..., "Score": ...} records, {"Data": [...]} / {"Sites": [...]}
+    envelopes and plain lists of domains (weight 1.0).
+    """
+    if isinstance(result, dict):
+        for key in ("Data", "Sites", "SimilarSites", "AlsoVisited"):
+            if key in result:
+                result = result[key]
+                break
+        else:
+            return
+
+    for record in result or ():
+        if not isinstance(record, dict):
+            yield record, 1.0
+            continue
+        target = next((record[k] for k in _TARGET_KEYS if record.get(k)), None)
+        if target is None:
+            continue
+        weight = next((record[k] for k in _WEIGHT_KEYS if isinstance(record.get(k), (int, float))), 1.0)
+        yield target, float(weight)
+
+
+class Relation(object):
+    """
+    Edges of one relation in compressed sparse row form: the neighbors of
+    node `i` are targets[offsets[i]:offsets[i + 1]], sorted by weight.
+    """
+
+    def __init__(self, offsets, targets, weights):
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def from_adjacency(cls, adjacency, size):
+        offsets, targets, weights = array("i", [0]), array("i"), array("f")
+        for node in range(size):
+            edges = sorted(adjacency.get(node, {}).items(), key=lambda edge: -edge[1])
+            targets.extend(target for target, _ in edges)
+            weights.extend(weight for _, weight in edges)
+            offsets.append(len(targets))
+        return cls(offsets, targets, weights)
+
+    def neighbors(self, node):
+        if node + 1 >= len(self.offsets):
+            return []
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return list(zip(self.targets[start:end], self.weights[start:end]))
+
+
+def _array_bytes(values):
+    # array.tobytes is array.tostring on Python 2.
+    return values.tobytes() if hasattr(values, "tobytes") else values.tostring()
+
+
+def _map_array(path, typecode):
+    with io.open(path, "rb") as f:
+        if os.path.getsize(path) == 0:
+            return array(typecode)
+        if not hasattr(memoryview, "cast"):
+            # Python 2 cannot view a mapping as typed values; read it instead.
+            return array(typecode, f.read())
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(typecode)
+
+
+class GraphIndex(object):
+
+    def __init__(self, domains=None):
+        self.domains = domains if domains is not None else Interner()
+        self.relations = {}
+        self._adjacency = {}  # relation -> {source id: {target id: weight}}, until frozen
+
+    def intern(self, domain):
+        return self.domains.intern(domain)
+
+    def add_edges(self, relation, source, edges):
+        adjacency = self._adjacency.setdefault(relation, {})
+        targets = adjacency.setdefault(self.intern(source), {})
+        for target, weight in edges:
+            targets[self.intern(target)] = weight
+
+    def freeze(self):
+        """
+        Compact edges added so far into arrays. Called implicitly by queries.
+        """
+        for relation, adjacency in self._adjacency.items():
+            if relation in self.relations:
+                # merge with what was frozen before
+                frozen = self.relations[relation]
+                for node in range(len(frozen.offsets) - 1):
+                    existing = adjacency.setdefault(node, {})
+                    for target, weight in frozen.neighbors(node):
+                        existing.setdefault(target, weight)
+            self.relations[relation] = Relation.from_adjacency(adjacency, len(self.domains))
+        self._adjacency = {}
+
+    def _relation(self, relation):
+        if self._adjacency:
+            self.freeze()
+        return self.relations.get(relation)
+
+    def neighbors(self, domain, relation="similar"):
+        """
+        [(domain, weight)] linked from `domain`, strongest first.
+        """
+        rel = self._relation(relation)
+        if rel is None or domain not in self.domains:
+            return []
+        edges = rel.neighbors(self.domains.get(domain))
+        return [(self.domains.value(target), weight) for target, weight in edges]
+
+    def top_similar(self, domain, n=10, relation="similar"):
+        return self.neighbors(domain, relation)[:n]
+
+    def k_hop(self, domain, k, relation="similar"):
+        """
+        Domains reachable from `domain` in at most `k` hops, excluding itself.
+        """
+        rel = self._relation(relation)
+        if rel is None or domain not in self.domains:
+            return set()
+        start = self.domains.get(domain)
+        seen, frontier = set([start]), [start]
+        for _ in range(k):
+            frontier = [target for node in frontier for target, _ in rel.neighbors(node) if target not in seen]
+            seen.update(frontier)
+        seen.discard(start)
+        return set(self.domains.values(seen))
+
+    def save(self, directory):
+        """
+        Write the index to `directory`: domains.txt plus, per relation, raw
+        native-endian .offsets/.targets (int32) and .weights (float32) files.
+        """
+        self.freeze()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.domains.save(os.path.join(directory, "domains.txt"))
+        for name, rel in self.relations.items():
+            for part in ("offsets", "targets", "weights"):
+                with io.open(os.path.join(directory, "%s.%s" % (name, part)), "wb") as f:
+                    f.write(_array_bytes(getattr(rel, part)))
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Load an index written by `save`, memory-mapping the edge arrays.
+        """
+        index = cls(Interner.load(os.path.join(directory, "domains.txt")))
+        for filename in os.listdir(directory):
+            name, ext = os.path.splitext(filename)
+            if ext == ".offsets":
+                path = os.path.join(directory, name)
+                index.relations[name] = Relation(_map_array(path + ".offsets", "i"),
+                                                 _map_array(path + ".targets", "i"),
+                                                 _map_array(path + ".weights", "f"))
+        return index
+
+
+def _domain_edges(edges):
+    """
+    `edges` with targets reduced to their lower-cased root domain, so every
+    form of a site is one node. Targets that are not domains are dropped.
+    """
+    merged = {}
+    for target, weight in edges:
+        try:
+            target = utils.domain_from_url(target).lower()
+        except InvalidURLException:
+            continue
+        merged.setdefault(target, weight)
+    return merged.items()
+
+
+def crawl_graph(api_key, seeds, relations=("similar",), depth=1, concurrency=10, params=None,
+                index=None, **options):
+    """
+    Expand `seeds` breadth-first over `relations` and return a `GraphIndex`.
+
+    Parameters
+    ----------
+    api_key: string
+        SimilarWeb API key
+
+    seeds: iterable
+        Domains or URLs to start from
+
+    relations: tuple
+        Relations to follow. Can be: similar, also_visited, referrals, destinations
+
+    depth: integer
+        Number of hops to expand from the seeds
+
+    concurrency: integer
+        Number of queries in flight at once
+
+    params: dict
+        Extra API arguments, e.g. {"start_month": "1-2015", "end_month": "2-2015"} for referrals
+
+    index: GraphIndex
+        Existing index to extend. Domains it already has edges for are not re-fetched.
+
+    options:
+        Transport options passed to every API object, e.g. session, cache, rate_limiter
+    """
+    index = index or GraphIndex()
+    params = params or {}
+    for relation in relations:
+        if relation not in RELATIONS:
+            raise ValueError("Unknown relation: %r" % relation)
+
+    fetched = dict((relation, set(domain for domain in index.domains if index.neighbors(domain, relation)))
+                   for relation in relations)
+    frontier = set(utils.domain_from_url(seed).lower() for seed in seeds)
+
+    for _ in range(depth):
+        next_frontier = set()
+        for relation in relations:
+            cls, required = RELATIONS[relation]
+            kwargs = dict((name, params[name]) for name in required)
+            kwargs.update(options)
+
+            pending = []
+            for domain in frontier:
+                if domain in fetched[relation]:
+                    # already known: expand through the local edges instead
+                    next_frontier.update(target for target, _ in index.neighbors(domain, relation))
+                else:
+                    pending.append(domain)
+            fetched[relation].update(pending)
+
+            def factory(domain, cls=cls, kwargs=kwargs):
+                return cls(api_key, domain, **kwargs)
+
+            for domain, result, error in batch.fetch_many(factory, pending, concurrency):
+                if error is not None:
+                    continue
+                edges = list(_domain_edges(edges_from_result(result)))
+                index.add_edges(relation, domain, edges)
+                next_frontier.update(target for target, _ in edges)
+        frontier = next_frontier
+    index.freeze()
+    return index
@@ -0,0 +1,98 @@
+"""
+Interning of domains and app ids to compact integer ids.
+
+Bulk pulls repeat the same few domains millions of times across
+SimilarSites, AlsoVisited, referral and destination records. An `Interner`
+keeps one copy of each string and hands out dense integer ids, so results
+can be stored as integer arrays and joined on ids instead of strings.
+Use separate interners for domains and app ids.
+"""
+import io
+import threading
+from array import array
+
+
+class Interner(object):
+
+    def __init__(self, values=()):
+        self._values = []
+        self._ids = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self.intern(value)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, value):
+        return value in self._ids
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def intern(self, value):
+        """
+        Integer id for `value`, assigning the next free id if it is new.
+        """
+        id_ = self._ids.get(value)
+        if id_ is None:
+            with self._lock:
+                id_ = self._ids.get(value)
+                if id_ is None:
+                    id_ = self._ids[value] = len(self._values)
+                    self._values.append(value)
+        return id_
+
+    def get(self, value, default=None):
+        """
+        Integer id for `value` without interning it.
+        """
+        return self._ids.get(value, default)
+
+    def value(self, id_):
+        return self._values[id_]
+
+    def intern_many(self, values):
+        """
+        Intern `values` and return their ids as an int32 array.
+        """
+        return array("i", (self.intern(value) for value in values))
+
+    def values(self, ids):
+        return [self._values[id_] for id_ in ids]
+
+    def save(self, path):
+        """
+        Write one value per line; line number is the id.
+        """
+        with io.open(path, "w", encoding="utf-8") as f:
+            for value in self._values:
+                f.write(value + u"\n")
+
+    @classmethod
+    def load(cls, path):
+        with io.open(path, encoding="utf-8") as f:
+            return cls(line.rstrip(u"\n") for line in f)
+
+
+def encode_records(interner, records, key, value=None):
+    """
+    Turn a list of result records into parallel arrays.
+
+    Returns an int32 array of interned `key` fields and, if `value` is given,
+    a float64 array of the `value` fields (0.0 where missing). Records without
+    `key` are skipped.
+
+        ids, scores = encode_records(domains, SimilarWebsitesAPI(key, d).query(), "Url", "Score")
+    """
+    ids = array("i")
+    values = array("d")
+    for record in records:
+        if record.get(key) is None:
+            continue
+        ids.append(interner.intern(record[key]))
+        if value is not None:
+            values.append(float(record.get(value) or 0.0))
+    if value is None:
+        return ids
+    return ids, values
@@ -0,0 +1,426 @@
+"""
+Durable SQLite-backed job queue for long batch runs.
+
+Work items are (endpoint, params) pairs stored with their status, attempt
+count and result. Workers claim items atomically, so a run killed by a
+deploy or an OOM resumes where it stopped, several processes can drain
+the same queue, and progress can be inspected at any time. Enqueueing is
+idempotent: an item already in the queue is not added (or paid for) twice.
+
+    similarweb-queue jobs.db add traffic domains.txt -p start_month=1-2015 -p end_month=2-2015
+    similarweb-queue jobs.db run --workers 4
+    similarweb-queue jobs.db status
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import sqlite3
+import sys
+import time
+from multiprocessing import Pool
+from similarweb import batch
+from similarweb import cli
+from similarweb import months
+from similarweb import utils
+from similarweb.exceptions import InvalidMonthRangeException, InvalidURLException
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Seconds a retryable failure waits before its first retry; doubles per attempt
+RETRY_DELAY = 2.0
+MAX_RETRY_DELAY = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    endpoint TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    claimed_at REAL,
+    available_at REAL NOT NULL DEFAULT 0,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+def normalize_params(params):
+    """
+    `params` with the domain reduced to its lower-cased root and months
+    written as M-YYYY, so equivalent items share one queue key. Invalid
+    domains or month ranges raise as they would when querying.
+    """
+    params = dict(params)
+    if params.get("domain"):
+        params["domain"] = utils.domain_from_url(params["domain"]).lower()
+    for name in ("start_month", "end_month"):
+        if params.get(name):
+            params[name] = months.format_month(months.parse_month(params[name]))
+    if params.get("start_month") and params.get("end_month"):
+        months.MonthRange(params["start_month"], params["end_month"])
+    return params
+
+
+class Job(object):
+
+    def __init__(self, id, endpoint, params, attempts, worker=None):
+        self.id = id
+        self.endpoint = endpoint
+        self.params = params
+        self.attempts = attempts
+        self.worker = worker
+
+    def __repr__(self):
+        return "Job(%r, %r, %r)" % (self.id, self.endpoint, self.params)
+
+
+class JobQueue(object):
+
+    def __init__(self, path, lease=600, retry_delay=RETRY_DELAY):
+        """
+        Parameters
+        ----------
+        path: string
+            SQLite database file, created if missing
+
+        lease: number
+            Seconds a claimed item stays reserved for its worker. Items of
+            workers that died are handed out again once their lease expires.
+
+        retry_delay: number
+            Seconds an item failing with a retryable error waits before it
+            can be claimed again, doubling with each attempt up to
+            MAX_RETRY_DELAY.
+        """
+        self.path = path
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(jobs)")]
+        if "available_at" not in columns:
+            # queues created before retries were delayed
+            self._db.execute("ALTER TABLE jobs ADD COLUMN available_at REAL NOT NULL DEFAULT 0")
+
+    def close(self):
+        self._db.close()
+
+    def add(self, endpoint, params):
+        """
+        Enqueue one item, unless the same (endpoint, params) is already
+        queued. Returns True if it was added; invalid params raise.
+        """
+        return self.add_many(endpoint, [normalize_params(params)]) == 1
+
+    def add_many(self, endpoint, params_list, rejected=None):
+        """
+        Enqueue many items of one endpoint in a single transaction. Returns
+        the number that were not already queued. Items with an invalid
+        domain or month range are skipped; if `rejected` is a list, they
+        are appended to it as (params, error).
+        """
+        endpoint = cli.api_class(endpoint).__name__
+        rows = []
+        for params in params_list:
+            try:
+                normalized = normalize_params(params)
+            except (InvalidURLException, InvalidMonthRangeException) as e:
+                if rejected is not None:
+                    rejected.append((params, e))
+                continue
+            params = normalized
+            encoded = json.dumps(params, sort_keys=True)
+            rows.append((json.dumps([endpoint, params], sort_keys=True), endpoint, encoded))
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany("INSERT OR IGNORE INTO jobs (key, endpoint, params) VALUES (?, ?, ?)", rows)
+            return self._db.total_changes - before
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def claim(self, worker, limit=100):
+        """
+        Atomically reserve up to `limit` pending items due for an attempt
+        (or items whose lease expired) for `worker` and return them as `Job`s.
+        """
+        now = time.time()
+        with self._transaction():
+            rows = self._db.execute(
+                "SELECT id, endpoint, params, attempts FROM jobs WHERE (status = ? AND available_at <= ?) OR "
+                "(status = ? AND claimed_at < ?) ORDER BY id LIMIT ?",
+                (PENDING, now, RUNNING, now - self.lease, limit)).fetchall()
+            self._db.executemany(
+                "UPDATE jobs SET status = ?, worker = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                [(RUNNING, worker, now, row[0]) for row in rows])
+        return [Job(id_, endpoint, json.loads(params), attempts + 1, worker)
+                for id_, endpoint, params, attempts in rows]
+
+    def renew(self, jobs):
+        """
+        Extend the lease of `jobs` still held by their worker. Returns the
+        number renewed.
+        """
+        now = time.time()
+        with self._transaction():
+            before = self._db.total_changes
+            self._db.executemany("UPDATE jobs SET claimed_at = ? WHERE id = ? AND worker = ? AND status = ?",
+                                 [(now, job.id, job.worker, RUNNING) for job in jobs])
+            return self._db.total_changes - before
+
+    def complete(self, job, result):
+        """
+        Store the result of a claimed item. Returns False, storing nothing,
+        if the worker's lease expired and the item was claimed by another.
+        """
+        return self._db.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (DONE, time.time(), json.dumps(result), job.id, job.worker, RUNNING)).rowcount == 1
+
+    def fail(self, job, error, retry=False):
+        """
+        Record a failed attempt. With `retry`, the item goes back to pending,
+        to be claimed again after a delay growing exponentially with its
+        attempts. Returns False if the worker no longer holds the item.
+        """
+        now = time.time()
+        delay = min(MAX_RETRY_DELAY, self.retry_delay * 2 ** max(0, job.attempts - 1)) if retry else 0
+        return self._db.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, available_at = ?, error = ? "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (PENDING if retry else FAILED, now, now + delay, error, job.id, job.worker, RUNNING)).rowcount == 1
+
+    def next_available(self):
+        """
+        Time the earliest pending item can be claimed, or None if none is pending.
+        """
+        return self._db.execute("SELECT MIN(available_at) FROM jobs WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def requeue_failed(self):
+        """
+        Put failed items back to pending, e.g. after fixing an API key.
+        Returns the number requeued.
+        """
+        return self._db.execute("UPDATE jobs SET status = ?, attempts = 0, available_at = 0 WHERE status = ?",
+                                (PENDING, FAILED)).rowcount
+
+    def progress(self, window=60):
+        """
+        {"pending", "running", "done", "failed", "total"} counts plus
+        "throughput": items finished per second over the last `window` seconds.
+        """
+        counts = dict((status, 0) for status in (PENDING, RUNNING, DONE, FAILED))
+        for status, count in self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        counts["total"] = sum(counts.values())
+        finished = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?) AND finished_at >= ?",
+                                    (DONE, FAILED, time.time() - window)).fetchone()[0]
+        counts["throughput"] = finished / float(window)
+        return counts
+
+    def results(self, endpoint=None):
+        """
+        Yield (endpoint, params, result) for every finished item.
+        """
+        query, args = "SELECT endpoint, params, result FROM jobs WHERE status = ?", [DONE]
+        if endpoint is not None:
+            query += " AND endpoint = ?"
+            args.append(cli.api_class(endpoint).__name__)
+        for endpoint, params, result in self._db.execute(query + " ORDER BY id", args):
+            yield endpoint, json.loads(params), json.loads(result)
+
+
+class _Transaction(object):
+    """
+    BEGIN IMMEDIATE ... COMMIT, so concurrent workers serialize their claims.
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self._db.execute("ROLLBACK" if exc_type is not None else "COMMIT")
+        return False
+
+
+def worker_name():
+    return "%s:%d" % (socket.gethostname(), os.getpid())
+
+
+def run(path, api_key, concurrency=10, claim_size=100, max_attempts=3, lease=600, retry_delay=RETRY_DELAY,
+        **options):
+    """
+    Drain the queue at `path` in this process. Returns {"done", "failed"}
+    counts for the items this worker finished.
+
+    Parameters
+    ----------
+    path: string
+        Queue database file
+
+    api_key: string
+        SimilarWeb API key
+
+    concurrency: integer
+        Number of queries in flight at once
+
+    claim_size: integer
+        Most items claimed per round trip to the database. Fewer are claimed
+        while the worker could not finish them within half a `lease`.
+
+    max_attempts: integer
+        Attempts before an item failing with a retryable error is marked failed
+
+    lease: number
+        Seconds claimed items stay reserved; renewed while they are processed
+
+    retry_delay: number
+        Seconds before the first retry of an item, doubling per attempt
+
+    options:
+        Transport options passed to every API object, e.g. cache, rate_limiter.
+        A pooled session is created if none is given.
+    """
+    queue = JobQueue(path, lease, retry_delay)
+    worker = worker_name()
+    options.setdefault("session", utils.make_session(concurrency))
+    summary = {"done": 0, "failed": 0}
+    limit = min(claim_size, concurrency)
+
+    def factory(job):
+        return cli.api_class(job.endpoint)(api_key, **dict(job.params, **options))
+
+    try:
+        while True:
+            jobs = queue.claim(worker, limit)
+            if not jobs:
+                # Items backing off after a retryable failure are still ours to finish.
+                available_at = queue.next_available()
+                if available_at is None:
+                    return summary
+                time.sleep(min(max(0, available_at - time.time()), MAX_RETRY_DELAY))
+                continue
+            started = renewed = time.time()
+            pending = dict((job.id, job) for job in jobs)
+            for job, result, error in batch.fetch_many(factory, jobs, concurrency):
+                del pending[job.id]
+                if error is None:
+                    summary["done"] += queue.complete(job, result)
+                else:
+                    retry = batch.is_retryable(error) and job.attempts < max_attempts
+                    failed = queue.fail(job, "%s: %s" % (type(error).__name__, error), retry)
+                    summary["failed"] += failed and not retry
+                if time.time() - renewed > lease / 3.0:
+                    queue.renew(pending.values())
+                    renewed = time.time()
+            # Claim what this worker can finish within half a lease at its current pace.
+            rate = len(jobs) / max(time.time() - started, 1e-3)
+            limit = int(min(claim_size, max(concurrency, rate * lease / 2.0)))
+    finally:
+        queue.close()
+
+
+def _run_worker(job):
+    path, api_key, concurrency, claim_size, max_attempts = job
+    return run(path, api_key, concurrency, claim_size, max_attempts)
+
+
+def run_workers(path, api_key, workers=4, concurrency=10, claim_size=100, max_attempts=3):
+    """
+    Drain the queue with `workers` processes. Returns their summaries.
+    """
+    JobQueue(path).close()  # create the schema before workers race to
+    jobs = [(path, api_key, concurrency, claim_size, max_attempts)] * workers
+    if workers == 1:
+        return [_run_worker(jobs[0])]
+
+    pool = Pool(workers)
+    try:
+        return pool.map(_run_worker, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="similarweb-queue",
+                                     description="Durable, resumable SimilarWeb batch jobs.")
+    parser.add_argument("database", help="SQLite queue file")
+    commands = parser.add_subparsers(dest="command")
+
+    add = commands.add_parser("add", help="enqueue one item per input line")
+    add.add_argument("api", help="endpoint or API class to query, e.g. traffic or TrafficAPI")
+    add.add_argument("input", help="file with one domain or app id per line, - for stdin")
+    add.add_argument("--argument", choices=["domain", "app_id", "category"])
+    add.add_argument("-p", "--param", action="append", type=cli.parse_param, default=[],
+                     metavar="KEY=VALUE", help="extra API argument, may be repeated")
+
+    work = commands.add_parser("run", help="process queued items until none are left")
+    work.add_argument("--api-key", default=os.environ.get("SIMILARWEB_API_KEY"),
+                      help="defaults to $SIMILARWEB_API_KEY")
+    work.add_argument("--workers", type=int, default=1)
+    work.add_argument("--concurrency", type=int, default=10)
+    work.add_argument("--max-attempts", type=int, default=3)
+
+    commands.add_parser("status", help="show progress")
+    commands.add_parser("retry", help="requeue failed items")
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        try:
+            cli.api_class(args.api)
+        except ValueError as e:
+            parser.error(str(e))
+        argument = args.argument or cli.default_argument(args.api)
+        source = sys.stdin if args.input == "-" else io.open(args.input, encoding="utf-8")
+        try:
+            params = [dict(args.param, **{argument: item}) for item in cli.read_lines(source)]
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        queue = JobQueue(args.database)
+        rejected = []
+        added = queue.add_many(args.api, params, rejected)
+        queue.close()
+        for item, error in rejected:
+            sys.stderr.write("rejected %s: %s\n" % (item[argument], type(error).__name__))
+        sys.stderr.write("%d added, %d already queued, %d rejected\n"
+                         % (added, len(params) - added - len(rejected), len(rejected)))
+    elif args.command == "run":
+        if not args.api_key:
+            parser.error("an API key is required (--api-key or $SIMILARWEB_API_KEY)")
+        summaries = run_workers(args.database, args.api_key, args.workers, args.concurrency,
+                                max_attempts=args.max_attempts)
+        failed = sum(summary["failed"] for summary in summaries)
+        sys.stderr.write("%d done, %d failed\n" % (sum(summary["done"] for summary in summaries), failed))
+        return 1 if failed else 0
+    elif args.command == "retry":
+        queue = JobQueue(args.database)
+        sys.stderr.write("%d requeued\n" % queue.requeue_failed())
+        queue.close()
+    else:
+        queue = JobQueue(args.database)
+        sys.stderr.write("{done}/{total} done, {failed} failed, {running} running, {pending} pending, "
+                         "{throughput:.1f}/s\n".format(**queue.progress()))
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+"""
+Inverted index over SearchKeywordsAPI and KeywordCompetitorsAPI results.
+
+Postings map each search term to the (domain, share, page) records that
+rank for it, stored as compact arrays per endpoint (orgsearch, paidsearch)
+so "who ranks for X" and keyword overlap between domains are answered
+locally. KeywordCompetitorsAPI results are kept as competitor edges in the
+same form as `graph.Relation`. Indexes can be saved and memory-mapped back.
+"""
+import io
+import os
+from array import array
+from similarweb import base
+from similarweb import batch
+from similarweb import utils
+from similarweb.exceptions import InvalidURLException
+from similarweb.graph import Relation, _array_bytes, _map_array
+from similarweb.interning import Interner
+
+SEARCH_ENDPOINTS = ("orgsearch", "paidsearch")
+COMPETITOR_ENDPOINTS = ("orgkwcompetitor", "paidkwcompetitor")
+
+
+def normalize_keyword(keyword):
+    return u" ".join(keyword.lower().split())
+
+
+def normalize_domain(domain):
+    return utils.domain_from_url(domain).lower()
+
+
+def _records(result):
+    if isinstance(result, dict):
+        result = result.get("Data") or []
+    return [record for record in result if isinstance(record, dict)]
+
+
+class Postings(object):
+    """
+    Postings in compressed sparse row form: the records of keyword `i` are
+    at offsets[i]:offsets[i + 1] in `domains`, `shares` and `pages`, highest
+    share first.
+    """
+
+    def __init__(self, offsets, domains, shares, pages):
+        self.offsets = offsets
+        self.domains = domains
+        self.shares = shares
+        self.pages = pages
+
+    @classmethod
+    def from_postings(cls, postings, size):
+        offsets, domains, shares, pages = array("i", [0]), array("i"), array("f"), array("H")
+        for keyword in range(size):
+            records = sorted(postings.get(keyword, {}).items(), key=lambda record: -record[1][0])
+            domains.extend(domain for domain, _ in records)
+            shares.extend(share for _, (share, _) in records)
+            pages.extend(page for _, (_, page) in records)
+            offsets.append(len(domains))
+        return cls(offsets, domains, shares, pages)
+
+    def postings(self, keyword):
+        if keyword + 1 >= len(self.offsets):
+            return []
+        start, end = self.offsets[keyword], self.offsets[keyword + 1]
+        return list(zip(self.domains[start:end], self.shares[start:end], self.pages[start:end]))
+
+    def to_dict(self):
+        return dict((keyword, dict((domain, (share, page)) for domain, share, page in self.postings(keyword)))
+                    for keyword in range(len(self.offsets) - 1))
+
+    def forward(self):
+        """
+        {domain id: {keyword id: share}}, the inverse of the postings.
+        """
+        forward = {}
+        for keyword in range(len(self.offsets) - 1):
+            for position in range(self.offsets[keyword], self.offsets[keyword + 1]):
+                forward.setdefault(self.domains[position], {})[keyword] = self.shares[position]
+        return forward
+
+
+class KeywordIndex(object):
+
+    def __init__(self, domains=None, keywords=None):
+        self.domains = domains if domains is not None else Interner()
+        self.keywords = keywords if keywords is not None else Interner()
+        self.postings = {}
+        self.competitors = {}
+        self._pending = {}  # endpoint -> {keyword id: {domain id: (share, page)}}, until frozen
+        self._pending_competitors = {}  # endpoint -> {domain id: {competitor id: score}}
+        self._forward = {}
+
+    def add_search_keywords(self, domain, result, endpoint="orgsearch", page=1):
+        """
+        Add one SearchKeywordsAPI result page for `domain`.
+        """
+        pending = self._pending.setdefault(endpoint, {})
+        domain_id = self.domains.intern(normalize_domain(domain))
+        for record in _records(result):
+            if not record.get("SearchTerm"):
+                continue
+            keyword_id = self.keywords.intern(normalize_keyword(record["SearchTerm"]))
+            records = pending.setdefault(keyword_id, {})
+            if domain_id not in records or records[domain_id][1] > page:
+                records[domain_id] = (float(record.get("Visits") or 0), page)
+
+    def add_competitors(self, domain, result, endpoint="orgkwcompetitor"):
+        """
+        Add one KeywordCompetitorsAPI result page for `domain`.
+        """
+        pending = self._pending_competitors.setdefault(endpoint, {})
+        competitors = pending.setdefault(self.domains.intern(normalize_domain(domain)), {})
+        for record in _records(result):
+            if not record.get("Domain"):
+                continue
+            try:
+                competitor = normalize_domain(record["Domain"])
+            except InvalidURLException:
+                continue
+            competitors.setdefault(self.domains.intern(competitor), float(record.get("Score") or 0))
+
+    def freeze(self):
+        """
+        Compact records added so far into arrays. Called implicitly by queries.
+        """
+        for endpoint, pending in self._pending.items():
+            if endpoint in self.postings:
+                # merge with what was frozen before, keeping the earliest page
+                for keyword, records in self.postings[endpoint].to_dict().items():
+                    merged = pending.setdefault(keyword, {})
+                    for domain, record in records.items():
+                        if domain not in merged or merged[domain][1] > record[1]:
+                            merged[domain] = record
+            self.postings[endpoint] = Postings.from_postings(pending, len(self.keywords))
+            self._forward.pop(endpoint, None)
+        for endpoint, pending in self._pending_competitors.items():
+            if endpoint in self.competitors:
+                frozen = self.competitors[endpoint]
+                for node in range(len(frozen.offsets) - 1):
+                    existing = pending.setdefault(node, {})
+                    for target, weight in frozen.neighbors(node):
+                        existing.setdefault(target, weight)
+            self.competitors[endpoint] = Relation.from_adjacency(pending, len(self.domains))
+        self._pending = {}
+        self._pending_competitors = {}
+
+    def _postings(self, endpoint):
+        if self._pending or self._pending_competitors:
+            self.freeze()
+        return self.postings.get(endpoint)
+
+    def _keywords_of(self, domain, endpoint):
+        postings = self._postings(endpoint)
+        if postings is None or domain not in self.domains:
+            return {}
+        if endpoint not in self._forward:
+            self._forward[endpoint] = postings.forward()
+        return self._forward[endpoint].get(self.domains.get(domain), {})
+
+    def has(self, domain, endpoint="orgsearch"):
+        """
+        Whether any records of `endpoint` are indexed for `domain`.
+        """
+        if endpoint in COMPETITOR_ENDPOINTS:
+            return bool(self.competitors_of(domain, endpoint))
+        return bool(self._keywords_of(domain, endpoint))
+
+    def domains_for(self, keyword, endpoint="orgsearch", n=None):
+        """
+        [(domain, share, page)] ranking for `keyword`, highest share first.
+        """
+        postings = self._postings(endpoint)
+        keyword_id = self.keywords.get(normalize_keyword(keyword))
+        if postings is None or keyword_id is None:
+            return []
+        records = postings.postings(keyword_id)[:n]
+        return [(self.domains.value(domain), share, page) for domain, share, page in records]
+
+    def keywords_for(self, domain, endpoint="orgsearch", n=None):
+        """
+        [(keyword, share)] that `domain` ranks for, highest share first.
+        """
+        keywords = sorted(self._keywords_of(domain, endpoint).items(), key=lambda item: -item[1])[:n]
+        return [(self.keywords.value(keyword), share) for keyword, share in keywords]
+
+    def overlap(self, domain, other, endpoint="orgsearch"):
+        """
+        Sorted keywords that both `domain` and `other` rank for.
+        """
+        shared = set(self._keywords_of(domain, endpoint)) & set(self._keywords_of(other, endpoint))
+        return sorted(self.keywords.values(shared))
+
+    def keyword_neighbors(self, domain, endpoint="orgsearch", n=10):
+        """
+        [(domain, shared keyword count)] for domains ranking on the same
+        keywords as `domain`, most shared first.
+        """
+        postings = self._postings(endpoint)
+        keywords = self._keywords_of(domain, endpoint)
+        domain_id = self.domains.get(domain)
+        counts = {}
+        for keyword in keywords:
+            for other, _, _ in postings.postings(keyword):
+                if other != domain_id:
+                    counts[other] = counts.get(other, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+        return [(self.domains.value(other), count) for other, count in ranked]
+
+    def competitors_of(self, domain, endpoint="orgkwcompetitor"):
+        """
+        [(domain, score)] from KeywordCompetitorsAPI, strongest first.
+        """
+        self._postings(endpoint)
+        relation = self.competitors.get(endpoint)
+        if relation is None or domain not in self.domains:
+            return []
+        edges = relation.neighbors(self.domains.get(domain))
+        return [(self.domains.value(target), weight) for target, weight in edges]
+
+    def save(self, directory):
+        """
+        Write the index to `directory`: domains.txt, keywords.txt and raw
+        native-endian arrays per endpoint (.offsets/.domains/.shares/.pages
+        for keywords, .offsets/.targets/.weights for competitors).
+        """
+        self.freeze()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.domains.save(os.path.join(directory, "domains.txt"))
+        self.keywords.save(os.path.join(directory, "keywords.txt"))
+        parts = [(self.postings, ("offsets", "domains", "shares", "pages")),
+                 (self.competitors, ("offsets", "targets", "weights"))]
+        for arrays, names in parts:
+            for endpoint, value in arrays.items():
+                for part in names:
+                    with io.open(os.path.join(directory, "%s.%s" % (endpoint, part)), "wb") as f:
+                        f.write(_array_bytes(getattr(value, part)))
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Load an index written by `save`, memory-mapping the arrays.
+        """
+        index = cls(Interner.load(os.path.join(directory, "domains.txt")),
+                    Interner.load(os.path.join(directory, "keywords.txt")))
+        for filename in os.listdir(directory):
+            endpoint, ext = os.path.splitext(filename)
+            path = os.path.join(directory, endpoint)
+            if ext == ".pages":
+                index.postings[endpoint] = Postings(_map_array(path + ".offsets", "i"),
+                                                    _map_array(path + ".domains", "i"),
+                                                    _map_array(path + ".shares", "f"),
+                                                    _map_array(path + ".pages", "H"))
+            elif ext == ".targets":
+                index.competitors[endpoint] = Relation(_map_array(path + ".offsets", "i"),
+                                                       _map_array(path + ".targets", "i"),
+                                                       _map_array(path + ".weights", "f"))
+        return index
+
+
+def build_keyword_index(api_key, domains, start_month, end_month, endpoints=("orgsearch",), pages=1,
+                        main_domain_only=False, concurrency=10, index=None, **options):
+    """
+    Fetch keyword results for `domains` concurrently and return a `KeywordIndex`.
+
+    Parameters
+    ----------
+    api_key: string
+        SimilarWeb API key
+
+    domains: iterable
+        Domains or URLs to index; each site is fetched once
+
+    start_month: string
+        Start Month in (M-YYYY) format
+
+    end_month: string
+        End Month in (M-YYYY) format
+
+    endpoints: tuple
+        Can be: orgsearch, paidsearch, orgkwcompetitor, paidkwcompetitor
+
+    pages: integer
+        Number of result pages to fetch per domain and endpoint
+
+    concurrency: integer
+        Number of queries in flight at once
+
+    index: KeywordIndex
+        Existing index to extend. Domains it already has records for are not re-fetched.
+
+    options:
+        Transport options passed to every API object, e.g. session, cache, rate_limiter
+    """
+    index = index or KeywordIndex()
+    for endpoint in endpoints:
+        if endpoint not in SEARCH_ENDPOINTS + COMPETITOR_ENDPOINTS:
+            raise ValueError("Unknown endpoint: %r" % endpoint)
+
+    unique = []
+    for domain in domains:
+        domain = normalize_domain(domain)
+        if domain not in unique:
+            unique.append(domain)
+    items = [(endpoint, domain, page) for endpoint in endpoints for domain in unique
+             if not index.has(domain, endpoint) for page in range(1, pages + 1)]
+
+    def factory(item):
+        endpoint, domain, page = item
+        cls = base.SearchKeywordsAPI if endpoint in SEARCH_ENDPOINTS else base.KeywordCompetitorsAPI
+        return cls(api_key, endpoint, domain, start_month, end_month, main_domain_only=main_domain_only,
+                   results_page=page if page > 1 else None, **options)
+
+    for (endpoint, domain, page), result, error in batch.fetch_many(factory, items, concurrency):
+        if error is not None:
+            continue
+        if endpoint in SEARCH_ENDPOINTS:
+            index.add_search_keywords(domain, result, endpoint, page)
+        else:
+            index.add_competitors(domain, result, endpoint)
+    index.freeze()
+    return index
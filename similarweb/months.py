@@ -0,0 +1,151 @@
+"""
+Month ranges for the "M-YYYY" start_month/end_month parameters.
+
+`MonthRange` parses and validates a range locally, so a malformed range
+fails before any request is sent, and can split long ranges into windows.
+`fetch_series` fetches those windows in parallel and stitches their
+`Values` back into one ordered series.
+"""
+import re
+from similarweb import utils
+from similarweb.exceptions import InvalidMonthRangeException
+
+batch = utils.LazyModule("similarweb.batch")
+
+_MONTH = re.compile(r"^\s*(\d{1,2})-(\d{4})\s*$")
+
+# Months per request used by `fetch_series` unless told otherwise
+DEFAULT_WINDOW = 12
+
+
+def parse_month(value):
+    """
+    Parse "M-YYYY" into a (year, month) tuple.
+    """
+    match = _MONTH.match(value or "")
+    if not match:
+        raise InvalidMonthRangeException("Month must be in M-YYYY format, got %r" % (value,))
+    month, year = int(match.group(1)), int(match.group(2))
+    if not 1 <= month <= 12:
+        raise InvalidMonthRangeException("Month must be between 1 and 12, got %r" % (value,))
+    return year, month
+
+
+def format_month(year_month):
+    return "%d-%d" % (year_month[1], year_month[0])
+
+
+def _index(year_month):
+    return year_month[0] * 12 + year_month[1] - 1
+
+
+def _from_index(index):
+    return index // 12, index % 12 + 1
+
+
+class MonthRange(object):
+
+    def __init__(self, start_month, end_month):
+        """
+        Parameters
+        ----------
+        start_month: string
+            Start Month in (M-YYYY) format
+
+        end_month: string
+            End Month in (M-YYYY) format, inclusive
+        """
+        self.start = parse_month(start_month)
+        self.end = parse_month(end_month)
+        if self.start > self.end:
+            raise InvalidMonthRangeException("start_month %s is after end_month %s"
+                                             % (start_month, end_month))
+
+    @classmethod
+    def from_months(cls, start, end):
+        return cls(format_month(start), format_month(end))
+
+    @property
+    def start_month(self):
+        return format_month(self.start)
+
+    @property
+    def end_month(self):
+        return format_month(self.end)
+
+    def __len__(self):
+        return _index(self.end) - _index(self.start) + 1
+
+    def __iter__(self):
+        for index in range(_index(self.start), _index(self.end) + 1):
+            yield _from_index(index)
+
+    def __eq__(self, other):
+        return isinstance(other, MonthRange) and (self.start, self.end) == (other.start, other.end)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "MonthRange(%r, %r)" % (self.start_month, self.end_month)
+
+    def split(self, max_months=DEFAULT_WINDOW):
+        """
+        Split into the fewest consecutive windows of at most `max_months`,
+        sized as evenly as possible so parallel requests finish together.
+        """
+        total = len(self)
+        windows = -(-total // max_months)
+        size, extra = divmod(total, windows)
+        ranges = []
+        start = _index(self.start)
+        for i in range(windows):
+            end = start + size + (1 if i < extra else 0) - 1
+            ranges.append(MonthRange.from_months(_from_index(start), _from_index(end)))
+            start = end + 1
+        return ranges
+
+
+def stitch(series):
+    """
+    Merge lists of {"Date": ..., "Value": ...} records into one list ordered
+    by date, keeping the first record seen for each date.
+    """
+    merged = {}
+    for values in series:
+        for record in values:
+            merged.setdefault(record["Date"], record)
+    return [merged[date] for date in sorted(merged)]
+
+
+def fetch_series(cls, api_key, domain, start_month, end_month, max_months=DEFAULT_WINDOW, concurrency=4,
+                 **kwargs):
+    """
+    Fetch a `Values` series for a long month range as parallel windowed
+    requests and return it as one ordered list. Raises if any window fails.
+
+    Parameters
+    ----------
+    cls: class
+        TrafficAPI or EngagementAPI
+
+    max_months: integer
+        Months per request
+
+    concurrency: integer
+        Number of windows fetched at once
+
+    kwargs:
+        Other arguments for `cls`, e.g. endpoint, time_granularity, cache
+    """
+    month_range = MonthRange(start_month, end_month)
+
+    def factory(window):
+        return cls(api_key, domain=domain, start_month=window.start_month, end_month=window.end_month, **kwargs)
+
+    results = {}
+    for window, values, error in batch.fetch_many(factory, month_range.split(max_months), concurrency):
+        if error is not None:
+            raise error
+        results[window.start] = values
+    return stitch(results[start] for start in sorted(results))
@@ -0,0 +1,167 @@
+import threading
+import time
+
+
+class RateLimiter(object):
+
+    def __init__(self, rate, burst=None):
+        """
+        Token bucket shared by every API object (and thread) it is given to.
+
+        Parameters
+        ----------
+        rate: number
+            Requests allowed per second
+
+        burst: integer
+            Requests allowed back to back before throttling kicks in.
+            Defaults to one second's worth of requests.
+        """
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """
+        Take a token if one is available. Returns 0 if it was taken, or else
+        the seconds until one will be.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Block until a request may be sent.
+
+        Returns False without taking a token if that would take longer than
+        `timeout` seconds, True otherwise.
+        """
+        expires = time.time() + timeout if timeout is not None else None
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return True
+            if expires is not None and time.time() + wait > expires:
+                return False
+            time.sleep(wait)
+
+    def release(self):
+        """
+        Called once the request is done. Tokens are not returned, so this is a no-op.
+        """
+
+
+class AdaptiveConcurrency(object):
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5, latency_tolerance=3.0, limiter=None):
+        """
+        Concurrency limit tuned like TCP congestion control (AIMD), usable as
+        an API object's `rate_limiter` and shared by every thread of a fan-out.
+
+        Each healthy response grows the limit by 1 / limit, i.e. by one per
+        round of requests. Throttling (429), server errors, connection
+        failures and round trips slower than `latency_tolerance` times the
+        fastest seen multiply it by `backoff`, at most once per round trip.
+
+        Parameters
+        ----------
+        initial: integer
+            Requests allowed in flight at first
+
+        minimum: integer
+            Lower bound of the limit
+
+        maximum: integer
+            Upper bound of the limit; size thread pools to this
+
+        backoff: number
+            Factor the limit is multiplied by on an overload signal
+
+        latency_tolerance: number
+            Slowdown over the baseline round trip taken as an overload signal
+
+        limiter: RateLimiter
+            Optional rate limiter acquired on top of the concurrency limit
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.limiter = limiter
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._baseline = None
+        self._last_decrease = 0
+        self._cond = threading.Condition(threading.Lock())
+
+    def acquire(self, timeout=None):
+        """
+        Block until a request may be sent.
+
+        Returns False if that would take longer than `timeout` seconds, True otherwise.
+        """
+        expires = time.time() + timeout if timeout is not None else None
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = None if expires is None else expires - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+        # Take the rate limiter's token only once holding a slot, so no token
+        # is spent (and then sent in a burst) while waiting for one.
+        remaining = None if expires is None else max(0, expires - time.time())
+        if self.limiter is not None and not self.limiter.acquire(remaining):
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+            return False
+        return True
+
+    def release(self):
+        if self.limiter is not None:
+            self.limiter.release()
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def observe(self, seconds, status_code=None, failed=False):
+        """
+        Feed back one request's round trip time and outcome. `failed` marks
+        requests that got no response at all.
+        """
+        now = time.time()
+        overloaded = failed or status_code == 429 or (status_code or 0) >= 500
+        with self._cond:
+            if not overloaded:
+                if self._baseline is None or seconds < self._baseline:
+                    self._baseline = seconds
+                else:
+                    # Drift up slowly so a lasting change in latency becomes the norm.
+                    self._baseline += (seconds - self._baseline) * 0.01
+                overloaded = seconds > self.latency_tolerance * self._baseline and seconds > 0.05
+            if overloaded:
+                # Requests sent before the last decrease reflect the old limit.
+                if now - seconds >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                previous = int(self.limit)
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                if int(self.limit) > previous:
+                    self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {"limit": int(self.limit), "in_flight": self.in_flight, "baseline": self._baseline}
@@ -0,0 +1,229 @@
+"""
+Query cache shared between hosts through a Redis-compatible server.
+
+`RedisCache` has the same interface as `QueryCache`, so it can be passed as
+any API object's `cache`. Values are JSON, zlib-compressed above a size
+threshold. `get_many` fetches many keys in one round trip; `batch.fetch_many`
+looks items up through it a chunk at a time. `lock` implements
+single-flight: only the host holding a key's lock fetches it while the
+others wait for the result to appear.
+
+The client is anything speaking redis-py's interface (`get`, `mget`, `set`
+with `nx`/`px`, `delete`). `RedisCache.from_url` builds one with the optional
+`redis` package; `InProcessRedis` is a stand-in for tests and single-host use.
+"""
+import json
+import threading
+import time
+import uuid
+import zlib
+from similarweb import utils
+
+_RAW = b"j"
+_COMPRESSED = b"z"
+
+
+class InProcessRedis(object):
+    """
+    Minimal thread-safe in-memory stand-in for the Redis commands RedisCache uses.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, name):
+        expires = self._expires.get(name)
+        if expires is not None and expires <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return name in self._data
+
+    def get(self, name):
+        with self._lock:
+            return self._data.get(name) if self._alive(name) else None
+
+    def mget(self, names):
+        with self._lock:
+            return [self._data.get(name) if self._alive(name) else None for name in names]
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._alive(name):
+                return None
+            self._data[name] = value if isinstance(value, bytes) else str(value).encode("utf-8")
+            ttl = px / 1000.0 if px is not None else ex
+            if ttl is not None:
+                self._expires[name] = time.time() + ttl
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    def delete(self, *names):
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._alive(name):
+                    deleted += 1
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+            return deleted
+
+
+class _Lock(object):
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.name = cache.prefix + "lock:" + key
+        self.key = key
+        self.token = uuid.uuid4().hex.encode("ascii")
+        self.acquired = False
+
+    def __enter__(self):
+        client = self.cache.client
+        expires = time.time() + self.cache.lock_timeout
+        while time.time() < expires:
+            if client.set(self.name, self.token, px=int(self.cache.lock_timeout * 1000), nx=True):
+                self.acquired = True
+                break
+            # Another host is fetching: stop waiting as soon as its result lands.
+            if self.cache.get(self.key) is not None:
+                break
+            time.sleep(self.cache.lock_poll_interval)
+        return self
+
+    def __exit__(self, *exc_info):
+        # Not atomic, but the lock expires on its own if we lose the race.
+        if self.acquired and self.cache.client.get(self.name) == self.token:
+            self.cache.client.delete(self.name)
+        return False
+
+
+class RedisCache(object):
+
+    def __init__(self, client, ttl=None, stale_ttl=None, prefix="similarweb:", compress_min_size=1024,
+                 lock_timeout=30, lock_poll_interval=0.05, membership=None):
+        """
+        Parameters
+        ----------
+        client: redis.Redis
+            Client for a Redis-compatible server, or an `InProcessRedis`
+
+        ttl: number
+            Seconds a result stays fresh. Results never expire if left blank.
+
+        stale_ttl: number
+            Seconds a stale result is kept after `ttl` so it can be revalidated
+            with its ETag/Last-Modified. Defaults to `ttl`.
+
+        prefix: string
+            Prepended to every key
+
+        compress_min_size: integer
+            Values larger than this many bytes are zlib-compressed
+
+        lock_timeout: number
+            Seconds a single-flight lock is held at most, and waited for at most
+
+        lock_poll_interval: number
+            Seconds between checks while waiting for another host's fetch
+
+        membership: similarweb.bloom.BloomFilter
+            Local filter of keys this host stored, for `might_contain`
+        """
+        self.client = client
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else ttl
+        self.prefix = prefix
+        self.compress_min_size = compress_min_size
+        self.lock_timeout = lock_timeout
+        self.lock_poll_interval = lock_poll_interval
+        self.membership = membership
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """
+        Connect with the `redis` package, e.g. from_url("redis://cache:6379/0").
+        """
+        redis = utils.LazyModule("redis")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _encode(self, entry):
+        data = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+        if len(data) > self.compress_min_size:
+            return _COMPRESSED + zlib.compress(data)
+        return _RAW + data
+
+    def _decode(self, data):
+        if data is None:
+            return None
+        if data[:1] == _COMPRESSED:
+            data = zlib.decompress(data[1:])
+        else:
+            data = data[1:]
+        try:
+            return json.loads(data.decode("utf-8"))
+        except ValueError:
+            return None
+
+    def _entry(self, entry):
+        if entry is None:
+            return None
+        fresh = self.ttl is None or time.time() - entry["stored_at"] < self.ttl
+        return entry["value"], fresh, entry.get("validators")
+
+    def lookup(self, key):
+        """
+        Return (value, fresh, validators) for `key`, or None if nothing is cached.
+        """
+        return self._entry(self._decode(self.client.get(self.prefix + key)))
+
+    def get(self, key):
+        entry = self.lookup(key)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    def get_many(self, keys):
+        """
+        {key: result} for the `keys` that have a fresh cached result, in one round trip.
+        """
+        keys = list(keys)
+        results = {}
+        for key, data in zip(keys, self.client.mget([self.prefix + key for key in keys])):
+            entry = self._entry(self._decode(data))
+            if entry is not None and entry[1]:
+                results[key] = entry[0]
+        return results
+
+    def _store(self, key, entry):
+        ex = None
+        if self.ttl is not None:
+            ex = int(self.ttl + (self.stale_ttl or 0)) or 1
+        self.client.set(self.prefix + key, self._encode(entry), ex=ex)
+
+    def set(self, key, value, validators=None):
+        self._store(key, {"stored_at": time.time(), "value": value, "validators": validators or None})
+        if self.membership is not None:
+            self.membership.add(key)
+
+    def might_contain(self, key):
+        """
+        False only if `key` is definitely not cached. Without a `membership`
+        filter nothing can be ruled out locally, so this is always True.
+        """
+        return self.membership is None or key in self.membership
+
+    def touch(self, key):
+        data = self._decode(self.client.get(self.prefix + key))
+        if data is not None:
+            data["stored_at"] = time.time()
+            self._store(key, data)
+
+    def lock(self, key):
+        """
+        Context manager letting one host at a time fetch `key`. Waiters return
+        early once the holder has stored a result.
+        """
+        return _Lock(self, key)
@@ -0,0 +1,141 @@
+"""
+Local rollup of daily `Values` series into weekly and monthly ones.
+
+Daily, weekly and monthly TrafficAPI/EngagementAPI series for the same
+domain and months nest, so once the daily series is cached the coarser
+ones can be computed without another request. Visits are summed; page
+views per visit, visit duration and bounce rate are averaged, weighted by
+daily visits when those are cached too. Derived records carry
+"Derived": True. Only periods fully covered by the daily series are
+derived: a week cut by the start or end of the month range would be
+undercounted, so such queries are sent to the API instead.
+"""
+import calendar
+import copy
+import datetime
+from array import array
+
+DAILY = "DAILY"
+WEEKLY = "WEEKLY"
+MONTHLY = "MONTHLY"
+
+# Weekday weeks start on (datetime.weekday(): Monday is 0, Sunday is 6)
+WEEK_START = 6
+
+
+def period_start(date, granularity):
+    """
+    First day ("YYYY-MM-DD") of the week or month containing `date`.
+    """
+    day = datetime.datetime.strptime(date[:10], "%Y-%m-%d").date()
+    if granularity == MONTHLY:
+        day = day.replace(day=1)
+    elif granularity == WEEKLY:
+        day -= datetime.timedelta(days=(day.weekday() - WEEK_START) % 7)
+    return day.isoformat()
+
+
+def period_days(start, granularity):
+    """
+    Number of days in the week or month starting on `start` ("YYYY-MM-DD").
+    """
+    if granularity == WEEKLY:
+        return 7
+    year, month = int(start[:4]), int(start[5:7])
+    return calendar.monthrange(year, month)[1]
+
+
+def rollup(values, granularity, how="sum", weights=None):
+    """
+    Aggregate daily {"Date": ..., "Value": ...} records to `granularity`.
+
+    Parameters
+    ----------
+    values: list
+        Daily records, as returned by a DAILY TrafficAPI/EngagementAPI query
+
+    granularity: string
+        Can be: Weekly, Monthly
+
+    how: string
+        "sum" or "mean"
+
+    weights: list
+        Daily records whose values weight the mean, e.g. daily visits.
+        Days without a weight count with weight 1. Periods whose days all
+        weigh 0 get the unweighted mean.
+
+    Periods with fewer daily records than days, e.g. weeks cut by the
+    start or end of the series, are marked "Partial": True.
+    """
+    granularity = granularity.upper()
+    if granularity not in (WEEKLY, MONTHLY):
+        raise ValueError("Can only roll up to Weekly or Monthly, got %r" % granularity)
+    if how not in ("sum", "mean"):
+        raise ValueError("how must be 'sum' or 'mean', got %r" % how)
+
+    weight_by_date = dict((record["Date"], record["Value"]) for record in weights or ())
+    periods = []
+    slots = {}
+    days = {}  # period -> dates seen, with or without a value
+    totals, weight_totals, plain_totals, counts = array("d"), array("d"), array("d"), array("d")
+    for record in values:
+        period = period_start(record["Date"], granularity)
+        days.setdefault(period, set()).add(record["Date"][:10])
+        if record.get("Value") is None:
+            continue
+        slot = slots.get(period)
+        if slot is None:
+            slot = slots[period] = len(periods)
+            periods.append(period)
+            for column in (totals, weight_totals, plain_totals, counts):
+                column.append(0.0)
+        weight = weight_by_date.get(record["Date"]) if how == "mean" else None
+        weight = 1.0 if weight is None else float(weight)
+        totals[slot] += record["Value"] * weight
+        weight_totals[slot] += weight
+        plain_totals[slot] += record["Value"]
+        counts[slot] += 1
+
+    results = []
+    for slot, period in enumerate(periods):
+        if how == "sum":
+            value = totals[slot]
+        elif weight_totals[slot]:
+            value = totals[slot] / weight_totals[slot]
+        else:
+            value = plain_totals[slot] / counts[slot]
+        result = {"Date": period, "Value": value, "Derived": True}
+        if len(days[period]) < period_days(period, granularity):
+            result["Partial"] = True
+        results.append(result)
+    results.sort(key=lambda record: record["Date"])
+    return results
+
+
+def _cached_daily(client):
+    daily = copy.copy(client)
+    for spelling in (DAILY, "Daily", "daily"):
+        daily.time_granularity = spelling
+        values = client.cache.get(daily.cache_key)
+        if values is not None:
+            return values
+    return None
+
+
+def derive(client, how, weights_client=None):
+    """
+    Weekly or monthly result for `client` rolled up from its cached daily
+    series, or None if the granularity is daily, nothing is cached, or the
+    daily series does not fully cover every period.
+    """
+    if client.cache is None or client.time_granularity.upper() not in (WEEKLY, MONTHLY):
+        return None
+    values = _cached_daily(client)
+    if values is None:
+        return None
+    weights = _cached_daily(weights_client) if weights_client is not None else None
+    results = rollup(values, client.time_granularity, how, weights)
+    if any(result.get("Partial") for result in results):
+        return None
+    return results
@@ -0,0 +1,142 @@
+"""
+Priority scheduler for sharing one API key between latency-sensitive and
+bulk traffic.
+
+Requests are admitted one at a time within an overall rate limit. Waiting
+classes with the lowest `priority` value are served first; classes with the
+same priority share admissions in proportion to their `weight` (weighted
+fair queuing). A class can also be capped at a number of requests in flight.
+
+    scheduler = Scheduler(rate=10)
+    web = similarweb.RankAndReachAPI(key, domain, rate_limiter=scheduler.limiter("interactive"))
+    bulk = similarweb.ReferralsAPI(key, domain, ..., rate_limiter=scheduler.limiter("batch"))
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from similarweb.ratelimit import RateLimiter
+
+DEFAULT_CLASSES = {
+    "interactive": {"priority": 0, "weight": 1, "max_concurrency": None},
+    "batch": {"priority": 1, "weight": 1, "max_concurrency": 8},
+}
+
+
+class _Class(object):
+
+    def __init__(self, name, priority=0, weight=1, max_concurrency=None):
+        self.name = name
+        self.priority = priority
+        self.weight = float(weight)
+        self.max_concurrency = max_concurrency
+        self.queue = deque()
+        self.active = 0
+        self.finish = 0.0  # virtual finish time of the last admitted request
+
+    @property
+    def ready(self):
+        return self.queue and (self.max_concurrency is None or self.active < self.max_concurrency)
+
+
+class ClassLimiter(object):
+    """
+    Handle binding a scheduler to one class, usable as an API object's `rate_limiter`.
+    """
+
+    def __init__(self, scheduler, name):
+        self.scheduler = scheduler
+        self.name = name
+
+    def acquire(self, timeout=None):
+        return self.scheduler.acquire(self.name, timeout)
+
+    def release(self):
+        self.scheduler.release(self.name)
+
+
+class Scheduler(object):
+
+    def __init__(self, rate=None, burst=None, classes=None):
+        """
+        Parameters
+        ----------
+        rate: number
+            Requests per second shared by all classes. Unlimited if left blank.
+
+        burst: integer
+            Requests allowed back to back under `rate`
+
+        classes: dict
+            {name: {"priority": int, "weight": number, "max_concurrency": int}}.
+            Defaults to an "interactive" class served ahead of a "batch" class
+            capped at 8 requests in flight.
+        """
+        self._bucket = RateLimiter(rate, burst) if rate else None
+        self._classes = {}
+        for name, options in (classes or DEFAULT_CLASSES).items():
+            self._classes[name] = _Class(name, **options)
+        self._clock = 0.0  # virtual time, the finish time of the last admission
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def limiter(self, name):
+        if name not in self._classes:
+            raise ValueError("Unknown class: %r" % name)
+        return ClassLimiter(self, name)
+
+    def _next(self):
+        ready = [cls for cls in self._classes.values() if cls.ready]
+        if not ready:
+            return None
+        return min(ready, key=lambda cls: (cls.priority, cls.finish + 1 / cls.weight))
+
+    def acquire(self, name, timeout=None):
+        """
+        Block until a request of class `name` may be sent. Returns False if
+        that did not happen within `timeout` seconds, True otherwise.
+        """
+        cls = self._classes[name]
+        expires = time.time() + timeout if timeout is not None else None
+        ticket = next(self._tickets)
+
+        with self._cond:
+            if not cls.queue:
+                # A class coming back from idle does not get credit for the time it was away.
+                cls.finish = max(cls.finish, self._clock)
+            cls.queue.append(ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._next() is cls and cls.queue[0] == ticket:
+                        wait = self._bucket.try_acquire() if self._bucket else 0
+                        if not wait:
+                            cls.queue.popleft()
+                            cls.active += 1
+                            cls.finish += 1 / cls.weight
+                            self._clock = cls.finish
+                            return True
+
+                    if expires is not None:
+                        remaining = expires - time.time()
+                        if remaining <= 0:
+                            return False
+                        wait = min(wait, remaining) if wait else remaining
+                    self._cond.wait(wait)
+            finally:
+                if ticket in cls.queue:
+                    cls.queue.remove(ticket)
+                self._cond.notify_all()
+
+    def release(self, name):
+        with self._cond:
+            self._classes[name].active -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Requests waiting and in flight per class.
+        """
+        with self._cond:
+            return dict((name, {"waiting": len(cls.queue), "active": cls.active})
+                        for name, cls in self._classes.items())
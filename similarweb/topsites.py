@@ -0,0 +1,170 @@
+"""
+Snapshot store for TopSitesAPI rankings.
+
+`SnapshotStore.fetch` queries every category/country combination
+concurrently and saves the rankings as one compact snapshot: per
+combination, an int32 array of interned domain ids in rank order. `diff`
+compares two snapshots through rank-position arrays indexed by domain id,
+so a full cross-country change report needs no JSON parsing.
+"""
+import io
+import json
+import os
+import time
+from array import array
+from similarweb import base
+from similarweb import batch
+from similarweb.graph import _array_bytes
+from similarweb.interning import Interner
+
+
+def combination_key(category, country):
+    return "%s|%s" % (category or "", country or "")
+
+
+def split_combination(key):
+    category, country = key.split("|", 1)
+    return category or None, country or None
+
+
+def ranking_from_result(result):
+    """
+    Domains in rank order from a TopSitesAPI result keyed by rank ("1", "2", ...).
+    """
+    ranked = []
+    for rank, site in result.items():
+        if not rank.isdigit():
+            continue
+        if isinstance(site, dict):
+            site = site.get("Domain") or site.get("Site") or site.get("Url")
+        if site:
+            ranked.append((int(rank), site))
+    ranked.sort()
+    return [site for _, site in ranked]
+
+
+class Snapshot(object):
+
+    def __init__(self, name, domains, rankings=None):
+        self.name = name
+        self.domains = domains
+        self.rankings = rankings if rankings is not None else {}  # combination key -> array("i") of ids
+
+    def add(self, category, country, sites):
+        self.rankings[combination_key(category, country)] = self.domains.intern_many(sites)
+
+    def ranking(self, category=None, country=None):
+        """
+        Domains in rank order for one combination.
+        """
+        return self.domains.values(self.rankings.get(combination_key(category, country), ()))
+
+    def positions(self, key):
+        """
+        array("i") indexed by domain id holding its 1-based rank for one
+        combination, 0 where the domain is not ranked.
+        """
+        positions = array("i", [0]) * len(self.domains)
+        for rank, id_ in enumerate(self.rankings.get(key, ()), 1):
+            positions[id_] = rank
+        return positions
+
+
+class SnapshotStore(object):
+
+    def __init__(self, directory):
+        """
+        Parameters
+        ----------
+        directory: string
+            Directory holding the shared domain table and one sub-directory per snapshot
+        """
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        domains_path = os.path.join(directory, "domains.txt")
+        self.domains = Interner.load(domains_path) if os.path.exists(domains_path) else Interner()
+
+    def names(self):
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.exists(os.path.join(self.directory, name, "index.json")))
+
+    def fetch(self, api_key, combinations, name=None, concurrency=10, **options):
+        """
+        Query TopSitesAPI for every (category, country) in `combinations`
+        concurrently and save the result as snapshot `name` (defaults to
+        the current UTC time). Failed combinations are left out and listed
+        in the returned snapshot's `errors`.
+        """
+        name = name or time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        snapshot = Snapshot(name, self.domains)
+        snapshot.errors = {}
+
+        def factory(combination):
+            return base.TopSitesAPI(api_key, combination[0], combination[1], **options)
+
+        for (category, country), result, error in batch.fetch_many(factory, combinations, concurrency):
+            if error is not None:
+                snapshot.errors[(category, country)] = error
+            else:
+                snapshot.add(category, country, ranking_from_result(result))
+
+        self.save(snapshot)
+        return snapshot
+
+    def save(self, snapshot):
+        path = os.path.join(self.directory, snapshot.name)
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.domains.save(os.path.join(self.directory, "domains.txt"))
+
+        index = {}
+        with io.open(os.path.join(path, "ranks.bin"), "wb") as f:
+            offset = 0
+            for key in sorted(snapshot.rankings):
+                ids = snapshot.rankings[key]
+                f.write(_array_bytes(ids))
+                index[key] = [offset, len(ids)]
+                offset += len(ids)
+        # index.json last: a snapshot only counts once it is complete
+        with io.open(os.path.join(path, "index.json"), "wb") as f:
+            f.write(json.dumps(index, sort_keys=True).encode("utf-8"))
+
+    def load(self, name):
+        path = os.path.join(self.directory, name)
+        with io.open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.loads(f.read())
+        with io.open(os.path.join(path, "ranks.bin"), "rb") as f:
+            ids = array("i", f.read())
+        rankings = dict((key, ids[offset:offset + length]) for key, (offset, length) in index.items())
+        return Snapshot(name, self.domains, rankings)
+
+    def diff(self, old, new, min_change=1):
+        """
+        Rank movements between two snapshots (names or `Snapshot`s).
+
+        Returns {(category, country): {"entered": [(domain, rank)],
+        "exited": [(domain, old_rank)], "moved": [(domain, old_rank, new_rank)]}}
+        for combinations present in both, with moves of at least `min_change`
+        ranks, biggest first.
+        """
+        old = self.load(old) if not isinstance(old, Snapshot) else old
+        new = self.load(new) if not isinstance(new, Snapshot) else new
+
+        report = {}
+        for key in sorted(set(old.rankings) & set(new.rankings)):
+            before, after = old.positions(key), new.positions(key)
+            entered, exited, moved = [], [], []
+            for id_ in set(old.rankings[key]) | set(new.rankings[key]):
+                was, now = before[id_], after[id_]
+                if not was:
+                    entered.append((self.domains.value(id_), now))
+                elif not now:
+                    exited.append((self.domains.value(id_), was))
+                elif abs(was - now) >= min_change:
+                    moved.append((self.domains.value(id_), was, now))
+            entered.sort(key=lambda change: change[1])
+            exited.sort(key=lambda change: change[1])
+            moved.sort(key=lambda change: (-abs(change[1] - change[2]), change[2]))
+            report[split_combination(key)] = {"entered": entered, "exited": exited, "moved": moved}
+        return report
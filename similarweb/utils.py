@@ -1,15 +1,83 @@
-import tldextract
+import importlib
 from similarweb.exceptions import InvalidURLException
 
 
+class LazyModule(object):
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    so `import similarweb` does not pay for heavy dependencies up front.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+requests = LazyModule("requests")
+tldextract = LazyModule("tldextract")
+
+_accept_encoding = None
+
+
+def accept_encoding():
+    """
+    Value for the Accept-Encoding header. Brotli is only offered when a
+    decoder urllib3 can use is installed.
+    """
+    global _accept_encoding
+    if _accept_encoding is None:
+        encodings = ["gzip", "deflate"]
+        for name in ("brotli", "brotlicffi"):
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue
+            encodings.append("br")
+            break
+        _accept_encoding = ", ".join(encodings)
+    return _accept_encoding
+
+
+_domains = {}
+
+# Distinct urls remembered by `domain_from_url` before its memo is reset.
+DOMAIN_MEMO_SIZE = 65536
+
+
 def domain_from_url(url):
     """
     Get root domain from url.
     Will prune away query strings, url paths, protocol prefix and sub-domains
     Exceptions will be raised on invalid urls
     """
+    domain = _domains.get(url)
+    if domain is not None:
+        return domain
+    # The public suffix list is loaded by tldextract on its first extraction.
     ext = tldextract.extract(url)
     if not ext.suffix:
         raise InvalidURLException()
     new_url = ext.domain + "." + ext.suffix
+    if len(_domains) >= DOMAIN_MEMO_SIZE:
+        _domains.clear()
+    _domains[url] = new_url
     return new_url
+
+
+def make_session(pool_size=10):
+    """
+    Create a requests session whose connection pool can hold `pool_size`
+    connections, so that many threads can share it without re-connecting.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
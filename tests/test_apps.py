@@ -0,0 +1,47 @@
+import unittest
+import json
+import mock
+from similarweb import apps
+
+RELATED = {
+    ("0", "a.com"): [{"AppId": "com.a", "Title": "A"}, {"AppId": "com.shared", "Title": "S"}],
+    ("0", "b.com"): [{"AppId": "com.shared", "Title": "S"}],
+    ("1", "a.com"): [{"AppId": "123", "Title": "A"}],
+    ("1", "b.com"): [],
+}
+
+
+def fake_get(url, **kwargs):
+    parts = url.split("/")
+    store, subject, call = parts[4], parts[5], parts[7].split("?")[0]
+    if call == "GetRelatedSiteApps":
+        payload = {"RelatedApps": RELATED[(store, subject)]}
+    elif call == "GetAppDetails":
+        if subject == "123":
+            payload = {"Error": "Data not found"}
+        else:
+            payload = {"Title": subject.upper(), "Author": "x"}
+    else:
+        payload = {"InstallsMin": 1000, "InstallsMax": 5000}
+    return type('response', (object,), {'text': json.dumps(payload)})
+
+
+class TestEnrichApps(unittest.TestCase):
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_enrich_apps(self, mock_requests_get):
+        mock_requests_get.side_effect = fake_get
+        records = sorted(apps.enrich_apps("a", iter(["a.com", "b.com"]), concurrency=2),
+                         key=lambda record: record["AppId"])
+
+        self.assertEqual([(r["AppStoreId"], r["AppId"]) for r in records],
+                         [(1, "123"), (0, "com.a"), (0, "com.shared")])
+        self.assertEqual(records[1]["Details"], {"Title": "COM.A", "Author": "x"})
+        self.assertEqual(records[1]["Installs"], {"InstallsMin": 1000, "InstallsMax": 5000})
+        self.assertEqual(records[0]["Installs"], None)
+        self.assertIn("details", records[0]["Errors"])
+
+        # 4 related lookups, then details for 3 apps and installs for the 2 Google Play apps
+        urls = [call[0][0] for call in mock_requests_get.call_args_list]
+        self.assertEqual(len(urls), 4 + 3 + 2)
+        self.assertEqual(len([url for url in urls if "com.shared/v1/GetAppDetails" in url]), 1)
@@ -1,7 +1,11 @@
 import unittest
 import mock
 import json
-from similarweb.exceptions import InvalidResponseException
+import time
+import requests
+from similarweb.exceptions import InvalidResponseException, DeadlineExceededException
+from similarweb.exceptions import MalformedResponseException, NoDataException, ServerErrorException
+from similarweb.exceptions import ThrottledException
 import similarweb
 
 
@@ -826,3 +830,90 @@ class TestRelatedSiteAppsAPI(unittest.TestCase):
         mock_requests_get.return_value = response
         results = self.client.query()
         self.assertEquals(results, expected)
+
+
+class TestTimeouts(unittest.TestCase):
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_timeout(self, mock_requests_get):
+        response = type('response', (object,), {'text': json.dumps({"GlobalRank": 2})})
+        mock_requests_get.return_value = response
+
+        similarweb.RankAndReachAPI("a", "similarweb.com").query()
+        self.assertEqual(mock_requests_get.call_args[1]["timeout"], (5, 30))
+
+        similarweb.RankAndReachAPI("a", "similarweb.com", timeout=2).query()
+        self.assertEqual(mock_requests_get.call_args[1]["timeout"], (2, 2))
+
+    def streamed(self, chunks, delay=0):
+        class Raw(object):
+            def read(self, amount=None, **kwargs):
+                time.sleep(delay)
+                return chunks.pop(0) if chunks else b""
+
+            def close(self):
+                pass
+
+        response = requests.models.Response()
+        response.status_code, response.encoding, response.raw = 200, "utf-8", Raw()
+        return response
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_deadline(self, mock_requests_get):
+        mock_requests_get.return_value = self.streamed([b'{"GlobalRank":', b' 2}'])
+
+        self.assertEqual(similarweb.RankAndReachAPI("a", "similarweb.com", deadline=10).query(), {"GlobalRank": 2})
+        connect, read = mock_requests_get.call_args[1]["timeout"]
+        self.assertEqual(connect, 5)
+        self.assertTrue(9 < read <= 10)
+        self.assertTrue(mock_requests_get.call_args[1]["stream"])
+
+        # no timeout of its own: the deadline bounds connect and read alike
+        for timeout in (None, (None, 10)):
+            mock_requests_get.return_value = self.streamed([b'{"GlobalRank": 2}'])
+            similarweb.RankAndReachAPI("a", "similarweb.com", timeout=timeout, deadline=5).query()
+            connect, read = mock_requests_get.call_args[1]["timeout"]
+            self.assertTrue(4 < connect <= 5 and 4 < read <= 5)
+
+        # each read is quick, but the body as a whole takes too long
+        mock_requests_get.return_value = self.streamed([b" "] * 20 + [b'{"GlobalRank": 2}'], delay=0.02)
+        client = similarweb.RankAndReachAPI("a", "similarweb.com", deadline=0.1)
+        self.assertRaises(DeadlineExceededException, client.query)
+
+        rate_limiter = mock.Mock()
+        rate_limiter.acquire.return_value = False
+        client = similarweb.RankAndReachAPI("a", "similarweb.com", rate_limiter=rate_limiter, deadline=1)
+        self.assertRaises(DeadlineExceededException, client.query)
+
+
+class TestQueryRaw(unittest.TestCase):
+
+    def response(self, body, status_code=200):
+        return type('response', (object,), {'content': body, 'status_code': status_code})
+
+    @mock.patch("similarweb.base.json.loads")
+    @mock.patch("similarweb.base.requests.get")
+    def test_valid_body_is_not_decoded(self, mock_requests_get, mock_loads):
+        body = b'{"Values": [{"Date": "2015-01-01", "Value": 1}], "Meta": {}}'
+        mock_requests_get.return_value = self.response(body)
+
+        client = similarweb.TrafficAPI("a", "similarweb.com", "1-2015", "1-2015")
+        self.assertIs(client.query_raw(), body)
+        self.assertFalse(mock_loads.called)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_errors_are_classified(self, mock_requests_get):
+        client = similarweb.RankAndReachAPI("a", "similarweb.com")
+
+        mock_requests_get.return_value = self.response(b'{"Error": "Data not found"}')
+        self.assertRaises(NoDataException, client.query_raw)
+        mock_requests_get.return_value = self.response(b'{"Message": "Too many requests"}', 429)
+        self.assertRaises(ThrottledException, client.query_raw)
+        mock_requests_get.return_value = self.response(b'<html>', 502)
+        self.assertRaises(ServerErrorException, client.query_raw)
+        mock_requests_get.return_value = self.response(b'<html>')
+        self.assertRaises(MalformedResponseException, client.query_raw)
+
+        # payloads without a response key are validated in full
+        mock_requests_get.return_value = self.response(b'["Arts", "Shopping"]')
+        self.assertEqual(similarweb.TopSitesCategoriesAPI("a").query_raw(), b'["Arts", "Shopping"]')
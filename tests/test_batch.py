@@ -0,0 +1,185 @@
+import unittest
+import json
+import threading
+import time
+import mock
+import similarweb
+from similarweb import batch
+from similarweb.cache import NegativeCache, QueryCache
+from similarweb.rediscache import InProcessRedis, RedisCache
+from similarweb.exceptions import InvalidResponseException, NoDataException, ThrottledException
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_fetch_many(self):
+        def factory(domain):
+            client = mock.Mock(cache=None)
+            if domain == "bad.com":
+                client.query.side_effect = InvalidResponseException({"Error": "Message"})
+            else:
+                client.query.return_value = {"domain": domain}
+            return client
+
+        outcomes = sorted(batch.fetch_many(factory, ["a.com", "b.com", "bad.com"], concurrency=2),
+                          key=lambda outcome: outcome[0])
+
+        self.assertEqual(outcomes[0], ("a.com", {"domain": "a.com"}, None))
+        self.assertEqual(outcomes[1], ("b.com", {"domain": "b.com"}, None))
+        self.assertEqual(outcomes[2][0], "bad.com")
+        self.assertIsInstance(outcomes[2][2], InvalidResponseException)
+
+    def test_fetch_many_reads_input_lazily(self):
+        taken = []
+
+        def items():
+            for i in range(100000):
+                taken.append(i)
+                yield i
+
+        def factory(item):
+            client = mock.Mock(deadline=None, cache=None)
+            client.query.return_value = item
+            return client
+
+        outcomes = batch.fetch_many(factory, items(), concurrency=4)
+        next(outcomes)
+        time.sleep(0.1)
+        # the window, one more for the result consumed, one waiting for room
+        self.assertLessEqual(len(taken), 4 * batch.WINDOW_FACTOR + 2)
+        outcomes.close()
+        self.assertEqual(len(list(batch.fetch_many(factory, range(1000), concurrency=4))), 1000)
+
+    def test_to_record(self):
+        self.assertEqual(json.loads(batch.to_record("a.com", [1], None)), {"input": "a.com", "result": [1]})
+        record = json.loads(batch.to_record("a.com", None, ValueError("boom")))
+        self.assertEqual(record, {"input": "a.com", "error": "ValueError: boom", "retryable": False})
+
+    @mock.patch("similarweb.batch.time.sleep")
+    def test_fetch_many_retries(self, mock_sleep):
+        calls = []
+
+        def factory(domain):
+            client = mock.Mock(deadline=None, cache=None)
+            errors = {"throttled.com": ThrottledException("Too many requests", 429),
+                      "empty.com": NoDataException("Data not found", 404)}
+
+            def query():
+                calls.append(domain)
+                if len(calls) < 10 and domain in errors:
+                    raise errors[domain]
+                return domain
+            client.query.side_effect = query
+            return client
+
+        outcomes = dict((item, error) for item, _, error in
+                        batch.fetch_many(factory, ["throttled.com", "empty.com"], concurrency=1, retries=2))
+
+        self.assertIsInstance(outcomes["throttled.com"], ThrottledException)
+        self.assertIsInstance(outcomes["empty.com"], NoDataException)
+        self.assertEqual(calls.count("throttled.com"), 3)
+        self.assertEqual(calls.count("empty.com"), 1)
+        self.assertEqual([c[0][0] for c in mock_sleep.call_args_list], [0.5, 1.0])
+
+    def test_fetch_many_budget(self):
+        def factory(seconds):
+            client = mock.Mock(deadline=None, cache=None)
+            client.query.side_effect = lambda: time.sleep(seconds) or seconds
+            return client
+
+        started = time.time()
+        outcomes = list(batch.fetch_many(factory, [0, 0, 5], concurrency=3, budget=0.3))
+
+        # the slow query is abandoned, the fast ones are kept
+        self.assertLess(time.time() - started, 5)
+        self.assertEqual(sorted(outcome[1] for outcome in outcomes), [0, 0])
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_fetch_many_coalesces_duplicates(self, mock_requests_get):
+        def get(url, **kwargs):
+            time.sleep(0.05)
+            return type('response', (object,), {'text': json.dumps({"GlobalRank": 1})})
+        mock_requests_get.side_effect = get
+
+        def factory(url):
+            return similarweb.RankAndReachAPI("a", url)
+
+        urls = ["a.com", "http://www.a.com/x", "https://sub.a.com/?q=1", "b.com", "a.com"]
+        single_flight = batch.SingleFlight(memo_size=10)
+        outcomes = list(batch.fetch_many(factory, urls, concurrency=5, single_flight=single_flight))
+
+        # every item gets an outcome, but only one request per normalized domain
+        self.assertEqual(sorted(outcome[0] for outcome in outcomes), sorted(urls))
+        self.assertTrue(all(outcome[1] == {"GlobalRank": 1} for outcome in outcomes))
+        self.assertEqual(mock_requests_get.call_count, 2)
+        self.assertEqual(single_flight.stats(), {"calls": 5, "executions": 2, "shared": 3})
+
+        list(batch.fetch_many(factory, urls, concurrency=5, coalesce=False))
+        self.assertEqual(mock_requests_get.call_count, 7)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_fetch_many_prefetches_from_batch_caches(self, mock_requests_get):
+        mock_requests_get.return_value = type('response', (object,), {'text': json.dumps({"GlobalRank": 1}),
+                                                                      'status_code': 200, 'headers': {}})
+        redis = InProcessRedis()
+        cache = RedisCache(redis)
+        for domain in ["a.com", "b.com", "c.com"]:
+            cache.set(similarweb.RankAndReachAPI("a", domain).cache_key, {"GlobalRank": 2})
+
+        def factory(domain):
+            return similarweb.RankAndReachAPI("a", domain, cache=cache)
+
+        domains = ["a.com", "b.com", "c.com", "d.com", "e.com"]
+        with mock.patch.object(redis, "mget", wraps=redis.mget) as mget:
+            outcomes = dict((item, result) for item, result, _ in batch.fetch_many(factory, domains, concurrency=5))
+        self.assertEqual(mget.call_count, 1)
+        self.assertEqual(outcomes, {"a.com": {"GlobalRank": 2}, "b.com": {"GlobalRank": 2},
+                                    "c.com": {"GlobalRank": 2}, "d.com": {"GlobalRank": 1},
+                                    "e.com": {"GlobalRank": 1}})
+        # only the misses were queried
+        self.assertEqual(mock_requests_get.call_count, 2)
+
+    def test_single_flight_shares_errors(self):
+        single_flight = batch.SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            release.wait()
+            raise ThrottledException("slow down")
+
+        def call():
+            try:
+                single_flight.do("key", fail)
+            except ThrottledException as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=call) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        while single_flight.stats()["calls"] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(single_flight.stats(), {"calls": 4, "executions": 1, "shared": 3})
+        # failures are not remembered
+        self.assertEqual(single_flight.do("key", lambda: 1), 1)
+
+    def test_plan(self):
+        cache = QueryCache()
+        negative_cache = NegativeCache()
+        cache.set(similarweb.RankAndReachAPI("a", "cached.com").cache_key, {"GlobalRank": 1})
+        negative_cache.add("RankAndReachAPI", "empty.com")
+
+        def factory(domain):
+            return similarweb.RankAndReachAPI("a", domain)
+
+        plan = batch.plan(factory, ["new.com", "cached.com", "empty.com"], cache, negative_cache)
+        self.assertEqual(plan, (["new.com"], ["cached.com"], ["empty.com"]))
@@ -0,0 +1,49 @@
+import unittest
+import os
+import shutil
+import tempfile
+from similarweb.bloom import BloomFilter
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "keys.bloom")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_membership(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        bloom.update("domain%d.com" % i for i in range(1000))
+
+        self.assertTrue(all("domain%d.com" % i in bloom for i in range(1000)))
+        false_positives = sum("other%d.com" % i in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertTrue(950 < len(bloom) <= 1000)
+
+    def test_merge(self):
+        first, second = BloomFilter(capacity=100), BloomFilter(capacity=100)
+        first.add("a.com")
+        second.add("b.com")
+        first.merge(second)
+        self.assertIn("a.com", first)
+        self.assertIn("b.com", first)
+        self.assertNotIn("a.com", second)
+        self.assertRaises(ValueError, first.merge, BloomFilter(capacity=1000))
+
+    def test_save_and_open(self):
+        bloom = BloomFilter.open(self.path, capacity=100)
+        self.assertNotIn("a.com", bloom)
+        bloom.add("a.com")
+        bloom.save(self.path)
+
+        loaded = BloomFilter.open(self.path)
+        self.assertIn("a.com", loaded)
+        self.assertEqual((loaded.bits, loaded.hashes, len(loaded)), (bloom.bits, bloom.hashes, 1))
+
+        with open(self.path, "wb") as f:
+            f.write(b"garbage")
+        self.assertRaises(ValueError, BloomFilter.load, self.path)
+        self.assertNotIn("a.com", BloomFilter.open(self.path))
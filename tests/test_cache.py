@@ -0,0 +1,194 @@
+import unittest
+import json
+import shutil
+import tempfile
+import mock
+import os
+import time
+from multiprocessing.pool import ThreadPool
+import similarweb
+from similarweb.cache import NegativeCache, QueryCache
+from similarweb.exceptions import NoDataException
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_get_set(self):
+        cache = QueryCache()
+        self.assertEqual(cache.get("key"), None)
+        cache.set("key", [1, 2])
+        self.assertEqual(cache.get("key"), [1, 2])
+
+    @mock.patch("similarweb.cache.time.time")
+    def test_ttl(self, mock_time):
+        cache = QueryCache(ttl=10)
+        mock_time.return_value = 100
+        cache.set("key", [1])
+        mock_time.return_value = 109
+        self.assertEqual(cache.get("key"), [1])
+        mock_time.return_value = 111
+        self.assertEqual(cache.get("key"), None)
+
+    def test_directory(self):
+        QueryCache(directory=self.tmpdir).set("key", {"a": 1})
+        self.assertEqual(QueryCache(directory=self.tmpdir).get("key"), {"a": 1})
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_query_uses_cache(self, mock_requests_get):
+        json_payload = {"GlobalRank": 2}
+        response = type('response', (object,), {'text': json.dumps(json_payload), 'status_code': 200,
+                                                 'headers': {}})
+        mock_requests_get.return_value = response
+
+        cache = QueryCache()
+        self.assertEqual(similarweb.RankAndReachAPI("a", "similarweb.com", cache=cache).query(), json_payload)
+        self.assertEqual(similarweb.RankAndReachAPI("b", "similarweb.com", cache=cache).query(), json_payload)
+        self.assertEqual(mock_requests_get.call_count, 1)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_concurrent_misses_fetch_once(self, mock_requests_get):
+        def get(url, **kwargs):
+            time.sleep(0.05)
+            return type('response', (object,), {'text': json.dumps({"GlobalRank": 2}), 'status_code': 200,
+                                                'headers': {}})
+        mock_requests_get.side_effect = get
+
+        cache = QueryCache()
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(lambda _: similarweb.RankAndReachAPI("a", "a.com", cache=cache).query(), range(8))
+        finally:
+            pool.terminate()
+        self.assertEqual(results, [{"GlobalRank": 2}] * 8)
+        self.assertEqual(mock_requests_get.call_count, 1)
+
+    @mock.patch("similarweb.cache.time.time")
+    @mock.patch("similarweb.base.requests.get")
+    def test_conditional_query(self, mock_requests_get, mock_time):
+        json_payload = {"GlobalRank": 2}
+        mock_requests_get.return_value = type('response', (object,), {
+            'text': json.dumps(json_payload), 'status_code': 200,
+            'headers': {"ETag": '"v1"', "Last-Modified": "Wed, 01 Jul 2015 00:00:00 GMT"}})
+
+        cache = QueryCache(ttl=10)
+        client = similarweb.RankAndReachAPI("a", "similarweb.com", cache=cache)
+        mock_time.return_value = 100
+        self.assertEqual(client.query(), json_payload)
+        self.assertNotIn("If-None-Match", mock_requests_get.call_args[1]["headers"])
+
+        # once stale, the cached result is revalidated and a 304 costs no body
+        mock_requests_get.return_value = type('response', (object,), {'status_code': 304, 'headers': {}})
+        mock_time.return_value = 120
+        self.assertEqual(client.query(), json_payload)
+        headers = mock_requests_get.call_args[1]["headers"]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["If-Modified-Since"], "Wed, 01 Jul 2015 00:00:00 GMT")
+        self.assertIn("gzip", headers["Accept-Encoding"])
+
+        # and is fresh again afterwards
+        self.assertEqual(client.query(), json_payload)
+        self.assertEqual(mock_requests_get.call_count, 2)
+
+    def test_might_contain(self):
+        cache = QueryCache(directory=self.tmpdir, expected_keys=100)
+        cache.set("key", [1])
+        self.assertTrue(cache.might_contain("key"))
+        self.assertFalse(cache.might_contain("other"))
+        cache.flush()
+
+        # the filter is persisted, and built once for directories that predate it
+        self.assertTrue(QueryCache(directory=self.tmpdir).might_contain("key"))
+        os.remove(os.path.join(self.tmpdir, "keys.bloom"))
+        self.assertTrue(QueryCache(directory=self.tmpdir).might_contain("key"))
+
+    def test_membership_is_shared_between_processes(self):
+        first = QueryCache(directory=self.tmpdir, expected_keys=100)
+        second = QueryCache(directory=self.tmpdir, expected_keys=100)
+        first.set("k1", [1])
+        second.set("k2", [2])
+        first.flush()
+        second.flush()
+
+        # the last save does not drop the other cache's keys
+        self.assertTrue(QueryCache(directory=self.tmpdir).might_contain("k1"))
+        self.assertTrue(QueryCache(directory=self.tmpdir).might_contain("k2"))
+        self.assertTrue(first.might_contain("k2"))
+
+        # keys stored but never saved, e.g. by a crashed process, are not lost
+        second.set("k3", [3])
+        self.assertTrue(QueryCache(directory=self.tmpdir).might_contain("k3"))
+
+    def test_membership_log_stays_bounded(self):
+        cache = QueryCache(directory=self.tmpdir, expected_keys=1000)
+        log = os.path.join(self.tmpdir, "keys.bloom.log")
+        for key in range(200):
+            cache.set("key%d" % key, [key])
+        self.assertGreater(os.path.getsize(log), 0)
+
+        # refreshing keys the filter already has logs nothing
+        size = os.path.getsize(log)
+        for _ in range(3):
+            for key in range(200):
+                cache.set("key%d" % key, [key])
+                cache.touch("key%d" % key)
+        self.assertEqual(os.path.getsize(log), size)
+
+        # a save covers the log, which is emptied
+        cache.flush()
+        self.assertEqual(os.path.getsize(log), 0)
+        reopened = QueryCache(directory=self.tmpdir)
+        self.assertTrue(all(reopened.might_contain("key%d" % key) for key in range(200)))
+
+    def test_directory_keeps_validators(self):
+        QueryCache(directory=self.tmpdir).set("key", [1], {"ETag": "x"})
+        self.assertEqual(QueryCache(directory=self.tmpdir).lookup("key"), ([1], True, {"ETag": "x"}))
+
+
+class TestNegativeCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "empty.tsv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @mock.patch("similarweb.cache.time.time")
+    def test_recheck_after(self, mock_time):
+        cache = NegativeCache(recheck_after=10, path=self.path)
+        mock_time.return_value = 100
+        cache.add("TrafficAPI", "empty.com")
+        self.assertIn(("TrafficAPI", "empty.com"), cache)
+        self.assertNotIn(("CategoryRankAPI", "empty.com"), cache)
+        self.assertEqual(list(cache.filter("TrafficAPI", ["empty.com", "full.com"])), ["full.com"])
+
+        # persisted, and due for a recheck once the interval has passed
+        reloaded = NegativeCache(recheck_after=10, path=self.path)
+        self.assertIn(("TrafficAPI", "empty.com"), reloaded)
+        mock_time.return_value = 111
+        self.assertNotIn(("TrafficAPI", "empty.com"), reloaded)
+
+        reloaded.compact()
+        self.assertEqual(len(NegativeCache(recheck_after=10, path=self.path)), 0)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_query_skips_known_empty(self, mock_requests_get):
+        mock_requests_get.return_value = type('response', (object,), {
+            'text': json.dumps({"Error": "Data not found"}), 'status_code': 200})
+
+        cache = NegativeCache()
+        client = similarweb.CategoryRankAPI("a", "empty.com", negative_cache=cache)
+        self.assertRaises(NoDataException, client.query)
+        self.assertRaises(NoDataException, client.query)
+        self.assertEqual(mock_requests_get.call_count, 1)
+
+        # other endpoints are still queried
+        client = similarweb.WebsiteTagsAPI("a", "empty.com", negative_cache=cache)
+        self.assertRaises(NoDataException, client.query)
+        self.assertEqual(mock_requests_get.call_count, 2)
@@ -0,0 +1,53 @@
+import unittest
+import json
+import mock
+from similarweb import TopSitesAPI
+from similarweb.catalog import TopSitesCatalog
+from similarweb.exceptions import InvalidCategoryException, InvalidCountryException
+
+CATEGORIES = ["Arts and Entertainment", "Shopping~Sports", "Shopping~Clothing"]
+COUNTRIES = {"Countries": ["United States", "United Kingdom", "Germany"]}
+
+
+def fake_get(url, **kwargs):
+    payload = CATEGORIES if "categories" in url else COUNTRIES
+    return type('response', (object,), {'text': json.dumps(payload), 'status_code': 200, 'headers': {}})
+
+
+class TestTopSitesCatalog(unittest.TestCase):
+
+    @mock.patch("similarweb.base.requests.get", side_effect=fake_get)
+    def test_catalogs_are_fetched_once(self, mock_requests_get):
+        catalog = TopSitesCatalog("a")
+        self.assertEqual(catalog.categories(), CATEGORIES)
+        self.assertEqual(catalog.countries(), COUNTRIES["Countries"])
+        catalog.category("Shopping~Sports")
+        catalog.country("Germany")
+        self.assertEqual(mock_requests_get.call_count, 2)
+
+    @mock.patch("similarweb.base.requests.get", side_effect=fake_get)
+    def test_fuzzy_resolution(self, mock_requests_get):
+        catalog = TopSitesCatalog("a")
+        self.assertEqual(catalog.category("shopping ~ sports"), "Shopping~Sports")
+        self.assertEqual(catalog.category("arts_and_entertainment"), "Arts and Entertainment")
+        self.assertEqual(catalog.category("Shopping~Sprots"), "Shopping~Sports")
+        self.assertEqual(catalog.country("Germny"), "Germany")
+        with self.assertRaises(InvalidCategoryException) as context:
+            catalog.category("Shopping~Toys")
+        self.assertIn("Shopping~Sports", str(context.exception))
+        with self.assertRaises(InvalidCountryException):
+            catalog.country("Atlantis")
+        self.assertEqual(catalog.search("shopping"), ["Shopping~Clothing", "Shopping~Sports"])
+
+    @mock.patch("similarweb.base.requests.get", side_effect=fake_get)
+    def test_topsites_validation_and_combinations(self, mock_requests_get):
+        catalog = TopSitesCatalog("a")
+        api = TopSitesAPI("a", category="shopping~sports", country="united states", catalog=catalog)
+        self.assertEqual((api.category, api.country), ("Shopping~Sports", "United States"))
+        with self.assertRaises(InvalidCountryException):
+            TopSitesAPI("a", country="Narnia", catalog=catalog)
+
+        combinations = catalog.combinations(categories=["shopping~sports"])
+        self.assertEqual(len(combinations), 2 * 4)
+        self.assertIn((None, None), combinations)
+        self.assertIn(("Shopping~Sports", "Germany"), combinations)
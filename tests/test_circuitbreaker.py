@@ -0,0 +1,86 @@
+import unittest
+import mock
+import similarweb
+from similarweb.circuitbreaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from similarweb.ratelimit import AdaptiveConcurrency, RateLimiter
+from similarweb.exceptions import CircuitOpenException, DeadlineExceededException, ServerErrorException
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_rate=0.5, slow_call_seconds=5, window_size=4,
+                                      min_calls=4, reset_timeout=30)
+
+    def fail(self, endpoint, times):
+        for _ in range(times):
+            self.breaker.before_call(endpoint)
+            self.breaker.record(endpoint, True, 0.1)
+
+    @mock.patch("similarweb.circuitbreaker.time.time")
+    def test_opens_and_recovers(self, mock_time):
+        mock_time.return_value = 100
+        self.fail("GoogleAppInstallsAPI", 3)
+        self.assertEqual(self.breaker.state("GoogleAppInstallsAPI"), CLOSED)
+        self.fail("GoogleAppInstallsAPI", 1)
+        self.assertEqual(self.breaker.state("GoogleAppInstallsAPI"), OPEN)
+
+        # the degraded endpoint fails fast, others are unaffected
+        self.assertRaises(CircuitOpenException, self.breaker.before_call, "GoogleAppInstallsAPI")
+        self.breaker.before_call("TrafficAPI")
+
+        # after the reset timeout a single trial call is let through
+        mock_time.return_value = 131
+        self.assertEqual(self.breaker.state("GoogleAppInstallsAPI"), HALF_OPEN)
+        self.breaker.before_call("GoogleAppInstallsAPI")
+        self.assertRaises(CircuitOpenException, self.breaker.before_call, "GoogleAppInstallsAPI")
+        self.breaker.record("GoogleAppInstallsAPI", False, 0.1)
+        self.assertEqual(self.breaker.state("GoogleAppInstallsAPI"), CLOSED)
+
+    def test_slow_calls_open(self):
+        for _ in range(4):
+            self.breaker.before_call("TrafficAPI")
+            self.breaker.record("TrafficAPI", False, 6)
+        self.assertEqual(self.breaker.state("TrafficAPI"), OPEN)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_query(self, mock_requests_get):
+        mock_requests_get.return_value = type('response', (object,), {'text': "<html>", 'status_code': 503})
+        client = similarweb.GoogleAppInstallsAPI("a", "com.example", circuit_breaker=self.breaker)
+
+        for _ in range(4):
+            self.assertRaises(ServerErrorException, client.query)
+        self.assertRaises(CircuitOpenException, client.query)
+        self.assertEqual(mock_requests_get.call_count, 4)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_rate_limiter_wait_is_not_counted(self, mock_requests_get):
+        mock_requests_get.return_value = type('response', (object,), {'text': '{"GlobalRank": 1}',
+                                                                      'status_code': 200, 'headers': {}})
+        breaker = CircuitBreaker(failure_rate=0.5, slow_call_seconds=0.3, window_size=2, min_calls=2)
+        limiter = RateLimiter(2, 1)
+
+        # each call waits ~0.5s for a token, which is not the endpoint's latency
+        for _ in range(3):
+            similarweb.RankAndReachAPI("a", "a.com", circuit_breaker=breaker, rate_limiter=limiter).query()
+        self.assertEqual(breaker.state("RankAndReachAPI"), CLOSED)
+
+        # running out of time while queued is not an endpoint failure either
+        for _ in range(3):
+            client = similarweb.RankAndReachAPI("a", "a.com", circuit_breaker=breaker, rate_limiter=limiter,
+                                                deadline=0.01)
+            self.assertRaises(DeadlineExceededException, client.query)
+        self.assertEqual(breaker.state("RankAndReachAPI"), CLOSED)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_open_circuit_does_not_shrink_adaptive_concurrency(self, mock_requests_get):
+        breaker = CircuitBreaker(min_calls=1, window_size=1)
+        breaker.before_call("RankAndReachAPI")
+        breaker.record("RankAndReachAPI", True, 0.1)
+        controller = AdaptiveConcurrency(initial=16)
+
+        for _ in range(5):
+            client = similarweb.RankAndReachAPI("a", "a.com", circuit_breaker=breaker, rate_limiter=controller)
+            self.assertRaises(CircuitOpenException, client.query)
+        self.assertFalse(mock_requests_get.called)
+        self.assertEqual(controller.stats(), {"limit": 16, "in_flight": 0, "baseline": None})
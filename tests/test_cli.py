@@ -0,0 +1,39 @@
+import unittest
+import io
+import json
+import mock
+from similarweb import cli
+
+
+class TestCLI(unittest.TestCase):
+
+    def test_api_class(self):
+        self.assertEqual(cli.api_class("traffic").__name__, "TrafficAPI")
+        self.assertEqual(cli.api_class("TrafficAPI").__name__, "TrafficAPI")
+        self.assertRaises(ValueError, cli.api_class, "SimilarWeb")
+        self.assertRaises(ValueError, cli.api_class, "requests")
+        self.assertEqual(len(cli.ENDPOINTS), 17)
+
+    def test_default_argument(self):
+        self.assertEqual(cli.default_argument("app-details"), "app_id")
+        self.assertEqual(cli.default_argument("GoogleAppInstallsAPI"), "app_id")
+        self.assertEqual(cli.default_argument("traffic"), "domain")
+
+    @mock.patch("similarweb.cli.utils.make_session")
+    def test_main(self, mock_make_session):
+        def get(url, **kwargs):
+            payload = {"Error": "Message"} if "bad.com" in url else {"Values": [{"Value": 1}]}
+            return type('response', (object,), {'text': json.dumps(payload)})
+        mock_make_session.return_value.get.side_effect = get
+
+        stdin = io.StringIO(u"similarweb.com\n\nbad.com\n")
+        stdout = io.StringIO()
+        status = cli.main(["traffic", "--api-key", "a", "-p", "start_month=5-2014", "-p", "end_month=6-2014"],
+                          stdin=stdin, stdout=stdout)
+
+        records = sorted((json.loads(line) for line in stdout.getvalue().splitlines()),
+                         key=lambda record: record["input"])
+        self.assertEqual(status, 1)
+        self.assertEqual(records[0]["input"], "bad.com")
+        self.assertTrue(records[0]["error"].startswith("InvalidResponseException"))
+        self.assertEqual(records[1], {"input": "similarweb.com", "result": [{"Value": 1}]})
@@ -0,0 +1,60 @@
+import unittest
+import json
+import mock
+from multiprocessing.pool import ThreadPool
+from similarweb import Client
+from similarweb import utils
+from similarweb.cache import QueryCache
+from similarweb.exceptions import InvalidResponseException
+
+
+def fake_get(url, **kwargs):
+    payload = {"Error": "Message"} if "bad.com" in url else {"Values": [{"Date": "2015-01-01", "Value": 1}]}
+    return type('response', (object,), {'text': json.dumps(payload), 'status_code': 200, 'headers': {}})
+
+
+class TestClient(unittest.TestCase):
+
+    def setUp(self):
+        self.session = mock.Mock()
+        self.session.get.side_effect = fake_get
+        self.client = Client("a", session=self.session, cache=QueryCache())
+
+    def test_query_methods(self):
+        self.assertEqual(self.client.traffic("http://www.a.com/page", "1-2015", "1-2015"),
+                         [{"Date": "2015-01-01", "Value": 1}])
+        url = self.session.get.call_args[0][0]
+        self.assertTrue(url.startswith("http://api.similarweb.com/Site/a.com/v1/visits?"))
+        self.assertRaises(InvalidResponseException, self.client.traffic, "bad.com", "1-2015", "1-2015")
+
+        # served from the shared cache
+        self.client.traffic("a.com", "1-2015", "1-2015")
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(self.client.metrics.stats()["TrafficAPI"]["queries"], 3)
+        self.assertEqual(self.client.metrics.stats()["TrafficAPI"]["errors"], 1)
+
+    def test_shared_across_threads(self):
+        domains = ["d%d.com" % i for i in range(50)] * 2
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(lambda domain: self.client.traffic(domain, "1-2015", "1-2015"), domains)
+        finally:
+            pool.terminate()
+        self.assertEqual(len(results), 100)
+        self.assertEqual(self.client.metrics.stats()["TrafficAPI"], {"queries": 100, "errors": 0,
+                                                                     "seconds": mock.ANY})
+        # duplicates are served from the cache or the in-flight request
+        self.assertEqual(self.session.get.call_count, 50)
+
+    @mock.patch("similarweb.client.utils.make_session")
+    def test_default_session_is_created_once(self, mock_make_session):
+        client = Client("a", pool_size=4)
+        self.assertIs(client.options["session"], client.options["session"])
+        mock_make_session.assert_called_once_with(4)
+
+    def test_domain_from_url_is_memoized(self):
+        with mock.patch("similarweb.utils.tldextract") as mock_tldextract:
+            mock_tldextract.extract.return_value = mock.Mock(domain="memo", suffix="com")
+            self.assertEqual(utils.domain_from_url("http://sub.memo.com/x"), "memo.com")
+            self.assertEqual(utils.domain_from_url("http://sub.memo.com/x"), "memo.com")
+        self.assertEqual(mock_tldextract.extract.call_count, 1)
@@ -0,0 +1,45 @@
+import unittest
+import json
+import mock
+from similarweb import compare
+
+
+VALUES = {
+    ("a.com", "visits"): [{"Date": "2014-05-01", "Value": 100.0}, {"Date": "2014-06-01", "Value": 200.0}],
+    ("a.com", "bouncerate"): [{"Date": "2014-05-01", "Value": 0.5}, {"Date": "2014-06-01", "Value": 0.4}],
+    ("b.com", "visits"): [{"Date": "2014-06-01", "Value": 300.0}],
+    ("b.com", "bouncerate"): [{"Date": "2014-06-01", "Value": 0.6}],
+    ("c.com", "visits"): [{"Date": "2014-06-01", "Value": 50.0}],
+}
+
+
+def fake_get(url, **kwargs):
+    parts = url.split("?")[0].split("/")
+    domain, metric = parts[4], parts[6]
+    payload = {"Values": VALUES[(domain, metric)]} if (domain, metric) in VALUES else {"Error": "Data not found"}
+    return type('response', (object,), {'text': json.dumps(payload)})
+
+
+class TestCompare(unittest.TestCase):
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_compare(self, mock_requests_get):
+        mock_requests_get.side_effect = fake_get
+
+        matrix = compare.compare("a", ["a.com", "http://www.a.com/page", "b.com", "c.com"], "5-2014", "6-2014",
+                                 metrics=("visits", "bouncerate"))
+
+        self.assertEqual(mock_requests_get.call_count, 6)
+        self.assertEqual(matrix.shape, (3, 2, 2))
+        self.assertEqual(matrix.dates, ["2014-05-01", "2014-06-01"])
+        self.assertEqual(matrix.series("a.com", "visits"), [100.0, 200.0])
+        self.assertEqual(matrix.series("b.com", "visits"), [None, 300.0])
+        self.assertEqual(matrix.value("c.com", "bouncerate", "2014-06-01"), None)
+        self.assertEqual(list(matrix.errors), [("c.com", "bouncerate")])
+
+        self.assertEqual(matrix.rank("visits", "2014-06-01"), ["b.com", "a.com", "c.com"])
+        self.assertAlmostEqual(matrix.correlation("visits", "bouncerate", "2014-06-01"), 1.0)
+        self.assertEqual(matrix.correlation("visits", "bouncerate", "2014-05-01"), None)
+
+    def test_unknown_metric(self):
+        self.assertRaises(ValueError, compare.compare, "a", ["a.com"], "5-2014", "6-2014", metrics=("hits",))
@@ -0,0 +1,54 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+import mock
+from similarweb import batch
+from similarweb import crawler
+from similarweb.exceptions import CircuitOpenException, DeadlineExceededException, NoDataException
+
+
+class TestCrawler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.tmpdir, "domains.txt")
+        self.output_dir = os.path.join(self.tmpdir, "out")
+        with io.open(self.input_path, "w", encoding="utf-8") as f:
+            f.write(u"a.com\nb.com\n\nc.com\nd.com\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read_items(self):
+        self.assertEqual(list(crawler.read_items(self.input_path)), ["a.com", "b.com", "c.com", "d.com"])
+        self.assertEqual(list(crawler.read_items(self.input_path, 0, 2)), ["a.com", "d.com"])
+        self.assertEqual(list(crawler.read_items(self.input_path, 1, 2)), ["b.com", "c.com"])
+
+    @mock.patch("similarweb.crawler.utils.make_session")
+    def test_crawl_resumes(self, mock_make_session):
+        response = type('response', (object,), {'text': json.dumps({"GlobalRank": 1})})
+        mock_make_session.return_value.get.return_value = response
+
+        # a killed run left one result and a partial line behind
+        os.makedirs(self.output_dir)
+        with io.open(crawler.shard_path(self.output_dir, 0, 1), "w", encoding="utf-8") as f:
+            f.write(u'{"input": "a.com", "result": {"GlobalRank": 1}}\n{"input": "b.c')
+
+        summaries = crawler.crawl("RankAndReachAPI", "a", self.input_path, self.output_dir, workers=1)
+
+        self.assertEqual(summaries, [{"shard": 0, "skipped": 1, "succeeded": 3, "failed": 0}])
+        self.assertEqual(mock_make_session.return_value.get.call_count, 3)
+        done = crawler.completed_items(crawler.shard_path(self.output_dir, 0, 1))
+        self.assertEqual(done, set(["a.com", "b.com", "c.com", "d.com"]))
+
+    def test_circuit_open_items_are_retried(self):
+        os.makedirs(self.output_dir)
+        path = crawler.shard_path(self.output_dir, 0, 1)
+        with io.open(path, "w", encoding="utf-8") as f:
+            f.write(batch.to_record("a.com", None, CircuitOpenException("RankAndReachAPI", 5)) + u"\n")
+            f.write(batch.to_record("b.com", None, DeadlineExceededException("Batch budget exhausted")) + u"\n")
+            f.write(batch.to_record("c.com", None, NoDataException("Data not found")) + u"\n")
+        self.assertEqual(crawler.completed_items(path), set(["c.com"]))
@@ -0,0 +1,38 @@
+import unittest
+from similarweb import exceptions
+from similarweb.exceptions import classify_error
+
+
+class TestClassifyError(unittest.TestCase):
+
+    def assertClassified(self, status_code, payload, cls, retryable=False):
+        error = classify_error(status_code, payload)
+        self.assertIs(type(error), cls)
+        self.assertIsInstance(error, exceptions.InvalidResponseException)
+        self.assertEqual(error.retryable, retryable)
+        self.assertEqual(error.status_code, status_code)
+
+    def test_classify_error(self):
+        self.assertClassified(401, {"Error": "Invalid user key"}, exceptions.AuthenticationException)
+        self.assertClassified(403, {"Error": "Monthly hits quota exceeded"}, exceptions.QuotaExceededException)
+        self.assertClassified(200, {"Error": "Data not found"}, exceptions.NoDataException)
+        self.assertClassified(404, {"Message": "Something"}, exceptions.NoDataException)
+        self.assertClassified(429, {"Message": "Slow down"}, exceptions.ThrottledException, retryable=True)
+        self.assertClassified(503, None, exceptions.ServerErrorException, retryable=True)
+        self.assertClassified(200, None, exceptions.MalformedResponseException)
+        self.assertClassified(200, ["unexpected"], exceptions.MalformedResponseException)
+        self.assertClassified(200, {"Error": "Message"}, exceptions.InvalidResponseException)
+
+    def test_local_failures_are_retryable(self):
+        # an open circuit or a spent deadline says nothing about the item itself
+        self.assertTrue(exceptions.CircuitOpenException("TrafficAPI", 5).retryable)
+        self.assertTrue(exceptions.DeadlineExceededException("Deadline of 1s exceeded").retryable)
+
+    def test_message_is_truncated(self):
+        error = classify_error(200, {"Error": "x" * 10000})
+        self.assertEqual(len(str(error)), exceptions.MAX_MESSAGE_LENGTH + 3)
+
+    def test_message_is_text(self):
+        # json.loads returns unicode strings on Python 2
+        self.assertEqual(exceptions.error_message({"Error": u"Data not found"}), u"Data not found")
+        self.assertEqual(exceptions.error_message({"Error": ["x"]}), "['x']")
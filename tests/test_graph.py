@@ -0,0 +1,80 @@
+import unittest
+import json
+import shutil
+import tempfile
+import mock
+from similarweb import graph
+
+
+SIMILAR = {
+    "a.com": {"SimilarSites": [{"Url": "b.com", "Score": 0.9}, {"Url": "c.com", "Score": 0.5}]},
+    "b.com": {"SimilarSites": [{"Url": "a.com", "Score": 0.9}, {"Url": "d.com", "Score": 0.7}]},
+    "c.com": {"SimilarSites": [{"Url": "d.com", "Score": 0.2}]},
+    "d.com": {"SimilarSites": [{"Url": "e.com", "Score": 0.1}]},
+}
+
+
+def fake_get(url, **kwargs):
+    domain = url.split("/")[4]
+    return type('response', (object,), {'text': json.dumps(SIMILAR.get(domain, {"Error": "No data"}))})
+
+
+class TestGraphIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_edges_from_result(self):
+        self.assertEqual(list(graph.edges_from_result([{"Url": "b.com", "Score": 0.5}])), [("b.com", 0.5)])
+        self.assertEqual(list(graph.edges_from_result({"Data": [{"Site": "b.com", "Share": 0.25}]})),
+                         [("b.com", 0.25)])
+        self.assertEqual(list(graph.edges_from_result({"Sites": ["b.com", "c.com"]})),
+                         [("b.com", 1.0), ("c.com", 1.0)])
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_crawl_graph(self, mock_requests_get):
+        mock_requests_get.side_effect = fake_get
+
+        index = graph.crawl_graph("a", ["a.com"], depth=2)
+
+        # a.com at depth 0, b.com and c.com at depth 1; a.com is not fetched twice
+        self.assertEqual(mock_requests_get.call_count, 3)
+        self.assertEqual(index.neighbors("a.com"), [("b.com", 0.8999999761581421), ("c.com", 0.5)])
+        self.assertEqual(index.top_similar("b.com", 1), [("a.com", 0.8999999761581421)])
+        self.assertEqual(index.k_hop("a.com", 1), set(["b.com", "c.com"]))
+        self.assertEqual(index.k_hop("a.com", 2), set(["b.com", "c.com", "d.com"]))
+        self.assertEqual(index.neighbors("d.com"), [])
+
+        # expanding further only fetches the new frontier
+        graph.crawl_graph("a", ["a.com"], depth=3, index=index)
+        self.assertEqual(mock_requests_get.call_count, 4)
+        self.assertEqual(index.neighbors("d.com"), [("e.com", 0.10000000149011612)])
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_crawl_graph_normalizes_domains(self, mock_requests_get):
+        mock_requests_get.side_effect = fake_get
+        SIMILAR["e.com"] = {"SimilarSites": [{"Url": "https://www.D.com/x", "Score": 0.3}]}
+        try:
+            index = graph.crawl_graph("a", ["https://www.e.com/x", "e.com"], depth=2)
+        finally:
+            del SIMILAR["e.com"]
+
+        # one node per site: e.com is fetched once and d.com's edge points back to it
+        self.assertEqual(mock_requests_get.call_count, 2)
+        self.assertEqual(index.neighbors("e.com"), [("d.com", 0.30000001192092896)])
+        self.assertEqual(index.neighbors("d.com"), [("e.com", 0.10000000149011612)])
+        self.assertEqual(len(index.domains), 2)
+
+    def test_save_and_load(self):
+        index = graph.GraphIndex()
+        index.add_edges("similar", "a.com", [("b.com", 0.5), ("c.com", 0.75)])
+        index.add_edges("also_visited", "b.com", [("a.com", 1.0)])
+        index.save(self.tmpdir)
+
+        loaded = graph.GraphIndex.load(self.tmpdir)
+        self.assertEqual(loaded.neighbors("a.com"), [("c.com", 0.75), ("b.com", 0.5)])
+        self.assertEqual(loaded.neighbors("b.com", "also_visited"), [("a.com", 1.0)])
+        self.assertEqual(loaded.k_hop("b.com", 2, "also_visited"), set(["a.com"]))
@@ -0,0 +1,47 @@
+import unittest
+import subprocess
+import sys
+
+
+def import_times(module):
+    """
+    Run `python -X importtime -c "import <module>"` in a fresh interpreter and
+    return {module name: cumulative microseconds} for everything it imported.
+    """
+    process = subprocess.Popen([sys.executable, "-X", "importtime", "-c", "import " + module],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    times = {}
+    for line in stderr.decode("utf-8").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime requires Python 3.7+")
+class TestImportTime(unittest.TestCase):
+
+    def test_heavy_dependencies_are_lazy(self):
+        times = import_times("similarweb")
+
+        self.assertIn("similarweb", times)
+        self.assertNotIn("requests", times)
+        self.assertNotIn("tldextract", times)
+        self.assertNotIn("multiprocessing.pool", times)
+
+    def test_import_time_budget(self):
+        # Generous bound; importing requests and tldextract alone takes longer.
+        times = import_times("similarweb")
+        self.assertLess(times["similarweb"], 100000)
+
+
+class TestLazyModule(unittest.TestCase):
+
+    def test_loads_on_first_use(self):
+        from similarweb import utils
+        module = utils.LazyModule("json")
+        self.assertEqual(module._module, None)
+        self.assertEqual(module.dumps([1]), "[1]")
+        self.assertEqual(module._module, sys.modules["json"])
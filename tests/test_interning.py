@@ -0,0 +1,42 @@
+import unittest
+import os
+import shutil
+import tempfile
+from similarweb.interning import Interner, encode_records
+
+
+class TestInterner(unittest.TestCase):
+
+    def test_intern(self):
+        domains = Interner()
+        self.assertEqual(domains.intern("google.com"), 0)
+        self.assertEqual(domains.intern("bing.com"), 1)
+        self.assertEqual(domains.intern("google.com"), 0)
+        self.assertEqual(len(domains), 2)
+        self.assertEqual(domains.value(1), "bing.com")
+        self.assertEqual(domains.get("yahoo.com"), None)
+        self.assertNotIn("yahoo.com", domains)
+
+        ids = domains.intern_many(["bing.com", "yahoo.com", "google.com"])
+        self.assertEqual(list(ids), [1, 2, 0])
+        self.assertEqual(domains.values(ids), ["bing.com", "yahoo.com", "google.com"])
+
+    def test_save_and_load(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "domains.txt")
+            Interner(["google.com", "bing.com"]).save(path)
+            loaded = Interner.load(path)
+            self.assertEqual(loaded.get("bing.com"), 1)
+            self.assertEqual(list(loaded), ["google.com", "bing.com"])
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_encode_records(self):
+        domains = Interner(["google.com"])
+        records = [{"Url": "bing.com", "Score": 0.5}, {"Url": "google.com", "Score": None}, {"Score": 1}]
+
+        ids, scores = encode_records(domains, records, "Url", "Score")
+        self.assertEqual(list(ids), [1, 0])
+        self.assertEqual(list(scores), [0.5, 0.0])
+        self.assertEqual(list(encode_records(domains, records, "Url")), [1, 0])
@@ -0,0 +1,140 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import mock
+from similarweb import jobqueue
+from similarweb.exceptions import InvalidMonthRangeException, InvalidURLException
+from similarweb.jobqueue import JobQueue
+
+
+def fake_get(url, **kwargs):
+    if "bad.com" in url:
+        payload = {"Error": "Data not found"}
+    elif "busy.com" in url:
+        return type('response', (object,), {'text': "", 'status_code': 503})
+    else:
+        payload = {"GlobalRank": 1}
+    return type('response', (object,), {'text': json.dumps(payload), 'status_code': 200})
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "jobs.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_add_is_idempotent(self):
+        queue = JobQueue(self.path)
+        self.assertEqual(queue.add_many("rank-and-reach", [{"domain": "a.com"}, {"domain": "b.com"}]), 2)
+        self.assertEqual(queue.add_many("RankAndReachAPI", [{"domain": "b.com"}, {"domain": "c.com"}]), 1)
+        self.assertFalse(queue.add("rank-and-reach", {"domain": "a.com"}))
+        self.assertEqual(queue.progress()["pending"], 3)
+
+    def test_add_normalizes_params(self):
+        queue = JobQueue(self.path)
+        items = [{"domain": "a.com", "start_month": "1-2015", "end_month": "3-2015"},
+                 {"domain": "http://www.a.com/x", "start_month": "01-2015", "end_month": "3-2015"},
+                 {"domain": "A.com", "start_month": "1-2015", "end_month": "03-2015"}]
+        self.assertEqual(queue.add_many("traffic", items), 1)
+        params = queue.claim("w1")[0].params
+        self.assertEqual(params, {"domain": "a.com", "start_month": "1-2015", "end_month": "3-2015"})
+        with self.assertRaises(InvalidMonthRangeException):
+            queue.add("traffic", {"domain": "a.com", "start_month": "3-2015", "end_month": "1-2015"})
+
+    def test_invalid_items_are_rejected_one_by_one(self):
+        queue = JobQueue(self.path)
+        rejected = []
+        items = [{"domain": "google.com"}, {"domain": "not a domain"}, {"domain": "yahoo.com"}]
+        self.assertEqual(queue.add_many("rank-and-reach", items, rejected), 2)
+        self.assertEqual([params for params, _ in rejected], [{"domain": "not a domain"}])
+        self.assertIsInstance(rejected[0][1], InvalidURLException)
+
+    @mock.patch("similarweb.jobqueue.utils.make_session")
+    def test_retries_back_off(self, mock_make_session):
+        mock_make_session.return_value.get.return_value = type(
+            'response', (object,), {'text': json.dumps({"Error": "Too many"}), 'status_code': 429, 'headers': {}})
+        queue = JobQueue(self.path)
+        queue.add("rank-and-reach", {"domain": "a.com"})
+
+        started = time.time()
+        summary = jobqueue.run(self.path, "key", max_attempts=3, retry_delay=0.1)
+        self.assertEqual(summary, {"done": 0, "failed": 1})
+        self.assertEqual(mock_make_session.return_value.get.call_count, 3)
+        # waited 0.1s before the second attempt and 0.2s before the third
+        self.assertGreaterEqual(time.time() - started, 0.3)
+
+        # a retryable failure is not claimable until its delay has passed
+        queue.requeue_failed()
+        job = queue.claim("w1")[0]
+        queue.fail(job, "ThrottledException", retry=True)
+        self.assertEqual(queue.claim("w1"), [])
+        self.assertTrue(queue.next_available() > time.time())
+
+    @mock.patch("similarweb.jobqueue.time.time")
+    def test_claims_are_exclusive_until_the_lease_expires(self, mock_time):
+        mock_time.return_value = 1000.0
+        JobQueue(self.path).add_many("rank-and-reach", [{"domain": "%d.com" % i} for i in range(5)])
+
+        first, second = JobQueue(self.path, lease=60), JobQueue(self.path, lease=60)
+        claimed = first.claim("w1", 3)
+        self.assertEqual([job.params["domain"] for job in claimed], ["0.com", "1.com", "2.com"])
+        self.assertEqual([job.params["domain"] for job in second.claim("w2", 10)], ["3.com", "4.com"])
+        self.assertEqual(second.claim("w2", 10), [])
+
+        # w1 dies; its items are handed out again once the lease expires
+        first.complete(claimed[0], {"GlobalRank": 1})
+        mock_time.return_value = 1061.0
+        reclaimed = second.claim("w2", 10)
+        self.assertEqual(sorted(job.params["domain"] for job in reclaimed), ["1.com", "2.com", "3.com", "4.com"])
+        self.assertEqual(reclaimed[0].attempts, 2)
+
+        # w1 comes back after its lease expired: its late writes are dropped
+        self.assertFalse(first.complete(claimed[1], {"GlobalRank": 99}))
+        self.assertFalse(first.fail(claimed[2], "late"))
+        self.assertEqual(first.renew(claimed[1:]), 0)
+        self.assertTrue(second.complete(reclaimed[0], {"GlobalRank": 2}))
+        self.assertEqual(second.renew(reclaimed[1:]), 3)
+        self.assertEqual(second.progress()["running"], 3)
+
+    @mock.patch("similarweb.jobqueue.utils.make_session")
+    def test_run_resumes(self, mock_make_session):
+        mock_make_session.return_value.get.side_effect = fake_get
+        queue = JobQueue(self.path)
+        queue.add_many("rank-and-reach", [{"domain": d} for d in ["a.com", "bad.com", "busy.com", "c.com"]])
+
+        # an earlier run finished a.com before being killed
+        job = queue.claim("old", 1)[0]
+        queue.complete(job, {"GlobalRank": 7})
+
+        summary = jobqueue.run(self.path, "key", concurrency=2, max_attempts=2, retry_delay=0.01)
+        self.assertEqual(summary, {"done": 1, "failed": 2})
+        urls = [call[0][0] for call in mock_make_session.return_value.get.call_args_list]
+        self.assertFalse(any("/a.com/" in url for url in urls))
+        # the server error was retried once before giving up
+        self.assertEqual(len([url for url in urls if "busy.com" in url]), 2)
+
+        progress = queue.progress()
+        self.assertEqual((progress["done"], progress["failed"], progress["pending"]), (2, 2, 0))
+        results = dict((params["domain"], result) for _, params, result in queue.results())
+        self.assertEqual(results, {"a.com": {"GlobalRank": 7}, "c.com": {"GlobalRank": 1}})
+
+        self.assertEqual(queue.requeue_failed(), 2)
+        self.assertEqual(queue.progress()["pending"], 2)
+
+    def test_main_add_and_status(self):
+        input_path = os.path.join(self.tmpdir, "domains.txt")
+        with io.open(input_path, "w", encoding="utf-8") as f:
+            f.write(u"a.com\nb.com\n\na.com\nnot a domain\n")
+        with mock.patch("sys.stderr", new_callable=io.StringIO if str is not bytes else io.BytesIO) as stderr:
+            self.assertEqual(jobqueue.main([self.path, "add", "traffic", input_path,
+                                            "-p", "start_month=1-2015", "-p", "end_month=2-2015"]), 0)
+            self.assertIn("2 added, 1 already queued, 1 rejected", stderr.getvalue())
+            self.assertEqual(jobqueue.main([self.path, "status"]), 0)
+        self.assertEqual(JobQueue(self.path).progress()["pending"], 2)
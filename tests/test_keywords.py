@@ -0,0 +1,74 @@
+import unittest
+import json
+import shutil
+import tempfile
+import mock
+from similarweb import keywords
+from similarweb.keywords import KeywordIndex
+
+
+KEYWORDS = {
+    "a.com": [{"SearchTerm": "Running Shoes", "Visits": 0.5}, {"SearchTerm": "trail", "Visits": 0.25}],
+    "b.com": [{"SearchTerm": "running shoes", "Visits": 0.75}, {"SearchTerm": "socks", "Visits": 0.125}],
+    "c.com": [{"SearchTerm": "trail", "Visits": 0.5}],
+}
+
+
+def fake_get(url, **kwargs):
+    domain = url.split("/")[4]
+    if "kwcompetitor" in url:
+        payload = {"Data": [{"Domain": "b.com", "Score": 0.5}]}
+    else:
+        payload = {"Data": KEYWORDS[domain], "ResultsCount": 10}
+    return type('response', (object,), {'text': json.dumps(payload)})
+
+
+class TestKeywordIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_build_and_query(self, mock_requests_get):
+        mock_requests_get.side_effect = fake_get
+        index = keywords.build_keyword_index("a", ["a.com", "b.com", "c.com"], "1-2015", "2-2015",
+                                             endpoints=("orgsearch", "orgkwcompetitor"))
+        self.assertEqual(mock_requests_get.call_count, 6)
+
+        self.assertEqual(index.domains_for("running  shoes"), [("b.com", 0.75, 1), ("a.com", 0.5, 1)])
+        self.assertEqual(index.domains_for("unknown"), [])
+        self.assertEqual(index.keywords_for("a.com"), [("running shoes", 0.5), ("trail", 0.25)])
+        self.assertEqual(index.overlap("a.com", "b.com"), ["running shoes"])
+        self.assertEqual(index.keyword_neighbors("a.com"), [("b.com", 1), ("c.com", 1)])
+        self.assertEqual(index.competitors_of("a.com"), [("b.com", 0.5)])
+
+        # indexed domains are not re-fetched
+        keywords.build_keyword_index("a", ["a.com", "d.com"], "1-2015", "2-2015", index=index)
+        self.assertEqual(mock_requests_get.call_count, 7)
+
+        # other forms of an indexed site are the same domain
+        keywords.build_keyword_index("a", ["https://www.a.com/x", "B.com"], "1-2015", "2-2015", index=index)
+        self.assertEqual(mock_requests_get.call_count, 7)
+        index.add_competitors("http://www.c.com/", {"Data": [{"Domain": "www.a.com", "Score": 0.25}]})
+        self.assertEqual(index.competitors_of("c.com"), [("b.com", 0.5), ("a.com", 0.25)])
+
+    def test_save_and_load(self):
+        index = KeywordIndex()
+        index.add_search_keywords("a.com", {"Data": KEYWORDS["a.com"]})
+        index.add_search_keywords("b.com", {"Data": KEYWORDS["b.com"]}, page=2)
+        index.add_search_keywords("c.com", {"Data": KEYWORDS["c.com"]}, endpoint="paidsearch")
+        index.add_competitors("a.com", {"Data": [{"Domain": "c.com", "Score": 0.25}]})
+        index.save(self.tmpdir)
+
+        loaded = KeywordIndex.load(self.tmpdir)
+        self.assertEqual(loaded.domains_for("running shoes"), [("b.com", 0.75, 2), ("a.com", 0.5, 1)])
+        self.assertEqual(loaded.domains_for("trail", "paidsearch"), [("c.com", 0.5, 1)])
+        self.assertEqual(loaded.overlap("a.com", "b.com"), ["running shoes"])
+        self.assertEqual(loaded.competitors_of("a.com"), [("c.com", 0.25)])
+
+        # a loaded index can be extended
+        loaded.add_search_keywords("d.com", {"Data": [{"SearchTerm": "trail", "Visits": 1.0}]})
+        self.assertEqual(loaded.domains_for("trail"), [("d.com", 1.0, 1), ("a.com", 0.25, 1)])
@@ -0,0 +1,52 @@
+import unittest
+import json
+import mock
+import similarweb
+from similarweb import months
+from similarweb.exceptions import InvalidMonthRangeException
+from similarweb.months import MonthRange
+
+
+class TestMonthRange(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(months.parse_month("5-2014"), (2014, 5))
+        self.assertEqual(months.parse_month("05-2014"), (2014, 5))
+        for value in ["2014-05", "13-2014", "0-2014", "May 2014", "", None]:
+            self.assertRaises(InvalidMonthRangeException, months.parse_month, value)
+
+    def test_range(self):
+        month_range = MonthRange("11-2014", "2-2015")
+        self.assertEqual(len(month_range), 4)
+        self.assertEqual(list(month_range), [(2014, 11), (2014, 12), (2015, 1), (2015, 2)])
+        self.assertEqual((month_range.start_month, month_range.end_month), ("11-2014", "2-2015"))
+        self.assertRaises(InvalidMonthRangeException, MonthRange, "3-2015", "2-2015")
+
+    def test_split(self):
+        self.assertEqual(MonthRange("1-2014", "12-2014").split(12), [MonthRange("1-2014", "12-2014")])
+        self.assertEqual(MonthRange("1-2014", "2-2015").split(6),
+                         [MonthRange("1-2014", "5-2014"), MonthRange("6-2014", "10-2014"),
+                          MonthRange("11-2014", "2-2015")])
+
+    def test_api_validates_locally(self):
+        self.assertRaises(InvalidMonthRangeException, similarweb.TrafficAPI, "a", "similarweb.com",
+                          "6-2014", "5-2014")
+        self.assertRaises(InvalidMonthRangeException, similarweb.ReferralsAPI, "a", "similarweb.com",
+                          "2014-05", "6-2014")
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_fetch_series(self, mock_requests_get):
+        def get(url, **kwargs):
+            start = url.split("start=")[1].split("&")[0]
+            end = url.split("end=")[1].split("&")[0]
+            values = [{"Date": "%d-%02d-01" % (year, month), "Value": month}
+                      for year, month in MonthRange(start, end)]
+            return type('response', (object,), {'text': json.dumps({"Values": values})})
+        mock_requests_get.side_effect = get
+
+        series = months.fetch_series(similarweb.TrafficAPI, "a", "similarweb.com", "1-2014", "2-2015",
+                                     max_months=6)
+
+        self.assertEqual(mock_requests_get.call_count, 3)
+        self.assertEqual([record["Date"] for record in series],
+                         ["%d-%02d-01" % month for month in MonthRange("1-2014", "2-2015")])
@@ -0,0 +1,101 @@
+import unittest
+import json
+import mock
+import similarweb
+from similarweb.exceptions import ThrottledException
+from similarweb.ratelimit import AdaptiveConcurrency, RateLimiter
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    @mock.patch("similarweb.ratelimit.time")
+    def test_acquire(self, mock_time):
+        clock = [100.0]
+        mock_time.time.side_effect = lambda: clock[0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+        mock_time.sleep.side_effect = sleep
+
+        limiter = RateLimiter(2, burst=2)
+        for _ in range(4):
+            limiter.acquire()
+
+        # two requests go out immediately, the next two wait half a second each
+        self.assertAlmostEqual(clock[0], 101.0)
+
+    @mock.patch("similarweb.ratelimit.time")
+    def test_acquire_timeout(self, mock_time):
+        mock_time.time.return_value = 100.0
+
+        limiter = RateLimiter(1, burst=1)
+        self.assertTrue(limiter.acquire(timeout=0.5))
+        self.assertFalse(limiter.acquire(timeout=0.5))
+        self.assertFalse(mock_time.sleep.called)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+
+    @mock.patch("similarweb.ratelimit.time.time")
+    def test_aimd(self, mock_time):
+        mock_time.return_value = 100.0
+        controller = AdaptiveConcurrency(initial=4, maximum=8)
+
+        # one round of healthy responses raises the limit by one
+        for _ in range(5):
+            controller.observe(0.1, 200)
+        self.assertEqual(controller.stats()["limit"], 5)
+
+        # a burst of throttling from one round halves it only once
+        mock_time.return_value = 101.0
+        for _ in range(5):
+            controller.observe(0.1, 429)
+        self.assertEqual(controller.stats()["limit"], 2)
+
+        # the next round's failures back off again, down to the minimum
+        mock_time.return_value = 102.0
+        controller.observe(0.5, None, failed=True)
+        mock_time.return_value = 103.0
+        controller.observe(0.5, 503)
+        self.assertEqual(controller.stats()["limit"], 1)
+
+        # responses far slower than the baseline count as overload too
+        controller.limit = 4.0
+        mock_time.return_value = 105.0
+        controller.observe(1.0, 200)
+        self.assertEqual(controller.stats()["limit"], 2)
+
+        for _ in range(100):
+            controller.observe(0.1, 200)
+        self.assertEqual(controller.stats()["limit"], 8)
+
+    def test_acquire_respects_limit(self):
+        controller = AdaptiveConcurrency(initial=2)
+        self.assertTrue(controller.acquire())
+        self.assertTrue(controller.acquire())
+        self.assertFalse(controller.acquire(timeout=0.05))
+        controller.release()
+        self.assertTrue(controller.acquire(timeout=0.05))
+        self.assertEqual(controller.stats()["in_flight"], 2)
+
+    def test_waiting_for_a_slot_spends_no_tokens(self):
+        limiter = RateLimiter(1, burst=2)
+        controller = AdaptiveConcurrency(initial=1, limiter=limiter)
+        self.assertTrue(controller.acquire())
+        # no slot: the token must still be there for whoever gets one
+        self.assertFalse(controller.acquire(timeout=0.05))
+        self.assertEqual(limiter.try_acquire(), 0)
+
+        # a slot but no token: the slot is given back
+        controller.release()
+        self.assertFalse(controller.acquire(timeout=0.05))
+        self.assertEqual(controller.stats()["in_flight"], 0)
+
+    def test_query_feeds_back_throttling(self):
+        session = mock.Mock()
+        session.get.return_value = type('response', (object,), {'text': json.dumps({"Error": "Too many"}),
+                                                                 'status_code': 429, 'headers': {}})
+        controller = AdaptiveConcurrency(initial=8)
+        api = similarweb.RankAndReachAPI("a", "a.com", session=session, rate_limiter=controller)
+        self.assertRaises(ThrottledException, api.query)
+        self.assertEqual(controller.stats(), {"limit": 4, "in_flight": 0, "baseline": None})
@@ -0,0 +1,69 @@
+import unittest
+import json
+import threading
+import time
+import mock
+import similarweb
+from similarweb.rediscache import InProcessRedis, RedisCache
+
+
+class TestRedisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.client = InProcessRedis()
+        self.cache = RedisCache(self.client, ttl=60, compress_min_size=64)
+
+    def test_get_set(self):
+        self.assertEqual(self.cache.get("key"), None)
+        self.cache.set("key", [1, 2], {"ETag": "x"})
+        self.assertEqual(self.cache.get("key"), [1, 2])
+        self.assertEqual(self.cache.lookup("key"), ([1, 2], True, {"ETag": "x"}))
+
+    def test_compression(self):
+        value = [{"Date": "2015-01-01", "Value": 1.0}] * 100
+        self.cache.set("big", value)
+        self.cache.set("small", [1])
+
+        self.assertEqual(self.client.get("similarweb:big")[:1], b"z")
+        self.assertLess(len(self.client.get("similarweb:big")), len(json.dumps(value)) / 10)
+        self.assertEqual(self.client.get("similarweb:small")[:1], b"j")
+        self.assertEqual(self.cache.get("big"), value)
+
+    def test_get_many(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.assertEqual(self.cache.get_many(["a", "b", "c"]), {"a": 1, "b": 2})
+
+    @mock.patch("similarweb.rediscache.time.time")
+    def test_stale(self, mock_time):
+        mock_time.return_value = 100
+        self.cache.set("key", [1])
+        mock_time.return_value = 161
+        self.assertEqual(self.cache.lookup("key"), ([1], False, None))
+        self.assertEqual(self.cache.get_many(["key"]), {})
+        self.cache.touch("key")
+        self.assertEqual(self.cache.get("key"), [1])
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_single_flight(self, mock_requests_get):
+        def slow_get(url, **kwargs):
+            time.sleep(0.1)
+            return type('response', (object,), {'text': json.dumps({"GlobalRank": 2}), 'status_code': 200,
+                                                'headers': {}})
+        mock_requests_get.side_effect = slow_get
+
+        # four "hosts" sharing one server
+        caches = [RedisCache(self.client, ttl=60, lock_poll_interval=0.01) for _ in range(4)]
+        results = []
+
+        def worker(cache):
+            results.append(similarweb.RankAndReachAPI("a", "similarweb.com", cache=cache).query())
+
+        threads = [threading.Thread(target=worker, args=(cache,)) for cache in caches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [{"GlobalRank": 2}] * 4)
+        self.assertEqual(mock_requests_get.call_count, 1)
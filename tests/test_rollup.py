@@ -0,0 +1,103 @@
+import unittest
+import datetime
+import mock
+import similarweb
+from similarweb import rollup
+from similarweb.cache import QueryCache
+
+
+DAILY_VISITS = [
+    {"Date": "2014-05-30", "Value": 100.0},  # Friday
+    {"Date": "2014-05-31", "Value": 200.0},
+    {"Date": "2014-06-01", "Value": 300.0},  # Sunday
+    {"Date": "2014-06-02", "Value": 400.0},
+]
+
+DAILY_BOUNCE_RATE = [
+    {"Date": "2014-05-30", "Value": 0.5},
+    {"Date": "2014-05-31", "Value": 0.2},
+    {"Date": "2014-06-01", "Value": 0.4},
+    {"Date": "2014-06-02", "Value": 0.1},
+]
+
+
+
+
+def daily(start, end, value):
+    """
+    One record per day from `start` to `end` inclusive, valued value(day).
+    """
+    day, end = datetime.date(*start), datetime.date(*end)
+    records = []
+    while day <= end:
+        records.append({"Date": day.isoformat(), "Value": value(day)})
+        day += datetime.timedelta(days=1)
+    return records
+
+
+class TestRollup(unittest.TestCase):
+
+    def test_period_start(self):
+        self.assertEqual(rollup.period_start("2014-06-04", "MONTHLY"), "2014-06-01")
+        self.assertEqual(rollup.period_start("2014-06-04", "WEEKLY"), "2014-06-01")
+        self.assertEqual(rollup.period_start("2014-06-01T00:00:00", "WEEKLY"), "2014-06-01")
+
+    def test_rollup(self):
+        # two days of each period are not the whole period
+        self.assertEqual(rollup.rollup(DAILY_VISITS, "Monthly"), [
+            {"Date": "2014-05-01", "Value": 300.0, "Derived": True, "Partial": True},
+            {"Date": "2014-06-01", "Value": 700.0, "Derived": True, "Partial": True},
+        ])
+        self.assertEqual(rollup.rollup(DAILY_VISITS, "Weekly"), [
+            {"Date": "2014-05-25", "Value": 300.0, "Derived": True, "Partial": True},
+            {"Date": "2014-06-01", "Value": 700.0, "Derived": True, "Partial": True},
+        ])
+        june = daily((2014, 6, 1), (2014, 6, 30), lambda day: 1.0)
+        self.assertEqual(rollup.rollup(june, "Monthly"), [{"Date": "2014-06-01", "Value": 30.0, "Derived": True}])
+        self.assertEqual([record.get("Partial", False) for record in rollup.rollup(june, "Weekly")],
+                         [False, False, False, False, True])
+
+        weighted = rollup.rollup(DAILY_BOUNCE_RATE, "MONTHLY", "mean", DAILY_VISITS)
+        self.assertAlmostEqual(weighted[0]["Value"], (0.5 * 100 + 0.2 * 200) / 300)
+        unweighted = rollup.rollup(DAILY_BOUNCE_RATE, "MONTHLY", "mean")
+        self.assertAlmostEqual(unweighted[1]["Value"], 0.25)
+        self.assertRaises(ValueError, rollup.rollup, DAILY_VISITS, "DAILY")
+
+    def test_zero_visit_days_weigh_nothing(self):
+        visits = [{"Date": "2014-06-01", "Value": 0.0}, {"Date": "2014-06-02", "Value": 100.0}]
+        weighted = rollup.rollup(DAILY_BOUNCE_RATE[2:], "MONTHLY", "mean", visits)
+        self.assertAlmostEqual(weighted[0]["Value"], 0.1)
+
+        # no visits at all: fall back to the plain mean instead of dividing by zero
+        visits[1]["Value"] = 0.0
+        unweighted = rollup.rollup(DAILY_BOUNCE_RATE[2:], "MONTHLY", "mean", visits)
+        self.assertAlmostEqual(unweighted[0]["Value"], 0.25)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_query_served_from_daily_cache(self, mock_requests_get):
+        cache = QueryCache()
+        daily_visits = similarweb.TrafficAPI("a", "similarweb.com", "5-2014", "6-2014", "Daily", cache=cache)
+        daily_bounce = similarweb.EngagementAPI("a", "bouncerate", "similarweb.com", "5-2014", "6-2014", "DAILY",
+                                                cache=cache)
+        cache.set(daily_visits.cache_key, daily((2014, 5, 1), (2014, 6, 30), lambda day: float(day.day)))
+        cache.set(daily_bounce.cache_key, daily((2014, 5, 1), (2014, 6, 30), lambda day: 0.5))
+
+        monthly = similarweb.TrafficAPI("a", "similarweb.com", "5-2014", "6-2014", "MONTHLY", cache=cache).query()
+        self.assertEqual([record["Value"] for record in monthly], [496.0, 465.0])
+        monthly_bounce = similarweb.EngagementAPI("a", "bouncerate", "similarweb.com", "5-2014", "6-2014",
+                                                  "MONTHLY", cache=cache).query()
+        self.assertAlmostEqual(monthly_bounce[1]["Value"], 0.5)
+        self.assertTrue(all(record["Derived"] for record in monthly + monthly_bounce))
+        self.assertFalse(mock_requests_get.called)
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_weeks_cut_by_the_range_are_queried(self, mock_requests_get):
+        mock_requests_get.return_value = type('response', (object,), {
+            'text': '{"Values": [{"Date": "2014-12-28", "Value": 7.0}]}', 'status_code': 200, 'headers': {}})
+        cache = QueryCache()
+        daily_visits = similarweb.TrafficAPI("a", "similarweb.com", "1-2015", "1-2015", "DAILY", cache=cache)
+        cache.set(daily_visits.cache_key, daily((2015, 1, 1), (2015, 1, 31), lambda day: 1.0))
+
+        weekly = similarweb.TrafficAPI("a", "similarweb.com", "1-2015", "1-2015", "WEEKLY", cache=cache).query()
+        self.assertEqual(weekly, [{"Date": "2014-12-28", "Value": 7.0}])
+        self.assertTrue(mock_requests_get.called)
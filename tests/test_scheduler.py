@@ -0,0 +1,53 @@
+import unittest
+import threading
+from similarweb.scheduler import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_concurrency_cap_and_priority(self):
+        scheduler = Scheduler(classes={
+            "interactive": {"priority": 0},
+            "batch": {"priority": 1, "max_concurrency": 1},
+        })
+        batch = scheduler.limiter("batch")
+        interactive = scheduler.limiter("interactive")
+
+        self.assertTrue(batch.acquire())
+        self.assertFalse(batch.acquire(timeout=0.05))
+        self.assertTrue(interactive.acquire(timeout=0.05))
+        self.assertEqual(scheduler.stats(), {"interactive": {"waiting": 0, "active": 1},
+                                             "batch": {"waiting": 0, "active": 1}})
+
+        batch.release()
+        self.assertTrue(batch.acquire(timeout=0.05))
+
+    def test_unknown_class(self):
+        self.assertRaises(ValueError, Scheduler().limiter, "nightly")
+
+    def test_weighted_fair_queuing(self):
+        scheduler = Scheduler(rate=20, burst=1, classes={
+            "heavy": {"weight": 3},
+            "light": {"weight": 1},
+        })
+        # drain the bucket so every request below has to queue
+        scheduler.acquire("heavy")
+        scheduler.release("heavy")
+
+        order = []
+        lock = threading.Lock()
+
+        def worker(name):
+            scheduler.acquire(name)
+            with lock:
+                order.append(name)
+            scheduler.release(name)
+
+        threads = [threading.Thread(target=worker, args=(name,)) for name in ["heavy", "light"] * 6]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(order), 12)
+        self.assertGreaterEqual(order[:8].count("heavy"), 5)
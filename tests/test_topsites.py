@@ -0,0 +1,49 @@
+import unittest
+import json
+import shutil
+import tempfile
+import mock
+from similarweb import topsites
+from similarweb.topsites import SnapshotStore
+
+
+def response(payload):
+    return type('response', (object,), {'text': json.dumps(payload)})
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_ranking_from_result(self):
+        result = {"2": "b.com", "1": "a.com", "10": "j.com", "Meta": "x"}
+        self.assertEqual(topsites.ranking_from_result(result), ["a.com", "b.com", "j.com"])
+
+    @mock.patch("similarweb.base.requests.get")
+    def test_fetch_and_diff(self, mock_requests_get):
+        combinations = [(None, None), ("Shopping", "United States")]
+        store = SnapshotStore(self.tmpdir)
+
+        mock_requests_get.return_value = response({"1": "a.com", "2": "b.com", "3": "c.com"})
+        store.fetch("a", combinations, name="day1")
+        mock_requests_get.return_value = response({"1": "c.com", "2": "a.com", "3": "d.com"})
+        store.fetch("a", combinations, name="day2")
+        self.assertEqual(mock_requests_get.call_count, 4)
+
+        # reload from disk
+        store = SnapshotStore(self.tmpdir)
+        self.assertEqual(store.names(), ["day1", "day2"])
+        self.assertEqual(store.load("day2").ranking("Shopping", "United States"), ["c.com", "a.com", "d.com"])
+
+        report = store.diff("day1", "day2")
+        self.assertEqual(set(report), set([(None, None), ("Shopping", "United States")]))
+        self.assertEqual(report[(None, None)], {
+            "entered": [("d.com", 3)],
+            "exited": [("b.com", 2)],
+            "moved": [("c.com", 3, 1), ("a.com", 1, 2)],
+        })
+        self.assertEqual(store.diff("day1", "day2", min_change=2)[(None, None)]["moved"], [("c.com", 3, 1)])